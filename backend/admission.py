@@ -0,0 +1,124 @@
+"""
+Admission control for LLM-bound work (retrieval + Gemini).
+
+At most ADMISSION_MAX_CONCURRENT requests run the expensive stages at once;
+up to ADMISSION_MAX_QUEUE more wait in FIFO order for at most
+ADMISSION_QUEUE_TIMEOUT seconds. Anything beyond that is rejected right away
+with Overloaded, which the API turns into a 503 with Retry-After, so a traffic
+spike degrades into fast refusals instead of unbounded Gemini calls and a
+growing pile of pending requests. Queue depth and in-flight counts are
+exported on /metrics for autoscaling.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+from backend.metrics import record_stage
+
+# Requests in the retrieval + generation stages at once (0 = no limit)
+ADMISSION_MAX_CONCURRENT = int(os.environ.get("ADMISSION_MAX_CONCURRENT", "32"))
+# Requests allowed to wait for a slot; beyond this they are rejected immediately
+ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE", "64"))
+# Seconds a queued request waits for a slot before it is rejected
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "10"))
+# Retry-After (seconds) sent with 503s
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "5"))
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted (queue full or queue timeout)."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Server is busy ({reason}); retry in {retry_after} s")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency limiter with a bounded, time-limited FIFO wait queue."""
+
+    def __init__(self, max_concurrent: int = ADMISSION_MAX_CONCURRENT, max_queue: int = ADMISSION_MAX_QUEUE,
+                 queue_timeout: float = ADMISSION_QUEUE_TIMEOUT, retry_after: int = ADMISSION_RETRY_AFTER):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._semaphore: asyncio.Semaphore | None = None
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = {"queue_full": 0, "queue_timeout": 0}
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        # Created on first use so it binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        return self._semaphore
+
+    def _reject(self, reason: str) -> Overloaded:
+        self.rejected[reason] += 1
+        return Overloaded(reason.replace("_", " "), self.retry_after)
+
+    async def acquire(self) -> None:
+        """Wait for a slot (recorded as the "queue" stage), or raise Overloaded."""
+        if self.max_concurrent <= 0:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        semaphore = self._get_semaphore()
+        if self.queued == 0 and not semaphore.locked():
+            await semaphore.acquire()
+        else:
+            if self.queued >= self.max_queue:
+                raise self._reject("queue_full")
+            self.queued += 1
+            started = asyncio.get_running_loop().time()
+            try:
+                await asyncio.wait_for(semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                raise self._reject("queue_timeout") from None
+            finally:
+                self.queued -= 1
+                record_stage("queue", asyncio.get_running_loop().time() - started)
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        if self.max_concurrent > 0:
+            self._get_semaphore().release()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one admission slot for the enclosed block."""
+        await self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "rejected": dict(self.rejected),
+        }
+
+    def collect(self):
+        """Scrape-time samples for backend.metrics.register_collector."""
+        stats = self.stats()
+        return [
+            ("admission_queue_depth", "gauge", "Requests waiting for an admission slot.", [({}, stats["queued"])]),
+            ("admission_in_flight", "gauge", "Requests holding an admission slot.", [({}, stats["in_flight"])]),
+            ("admission_limit", "gauge", "Max requests holding an admission slot (0 = no limit).",
+             [({}, stats["max_concurrent"])]),
+            ("admission_rejected_total", "counter", "Requests rejected with 503 by admission control.",
+             [({"reason": reason}, count) for reason, count in stats["rejected"].items()]),
+        ]
+
+
+admission = AdmissionController()
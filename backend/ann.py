@@ -0,0 +1,120 @@
+"""
+FAISS index types for the vector store: flat (exact), HNSW, IVF-PQ and SQ8.
+
+ingest.py builds the index with build_index() and records the choice in
+index_meta.json next to index.faiss; the backend reads it back with
+read_index_meta() and applies the search-time parameters with
+configure_search(), so switching index types needs no code change.
+"""
+
+import json
+from pathlib import Path
+
+import numpy as np
+
+INDEX_META_FILE = "index_meta.json"
+INDEX_TYPES = ("flat", "hnsw", "ivfpq", "sq8")
+# Types that store encoded vectors instead of float32 (the point of choosing them is memory)
+COMPRESSED_INDEX_TYPES = ("ivfpq", "sq8")
+
+# Build and search parameters per index type (overridable from ingest.py flags)
+DEFAULT_PARAMS = {
+    "flat": {},
+    "hnsw": {"m": 32, "ef_construction": 200, "ef_search": 64},
+    "ivfpq": {"nlist": 0, "pq_m": 48, "pq_bits": 8, "nprobe": 8},  # nlist 0 = ~4*sqrt(n)
+    "sq8": {},
+}
+
+
+def resolve_params(index_type: str, overrides: dict | None = None) -> dict:
+    """Default parameters for the index type with non-None overrides applied."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {', '.join(INDEX_TYPES)}")
+    params = dict(DEFAULT_PARAMS[index_type])
+    for key, value in (overrides or {}).items():
+        if key in params and value is not None:
+            params[key] = value
+    return params
+
+
+def build_index(vectors: np.ndarray, index_type: str = "flat", params: dict | None = None):
+    """
+    Build and fill a FAISS index (L2 metric, like LangChain's default) for the vectors.
+    Returns (index, resolved params); for ivfpq the chosen nlist is recorded in params.
+    """
+    import faiss
+
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    params = resolve_params(index_type, params)
+    if index_type == "flat":
+        index = faiss.IndexFlatL2(dim)
+    elif index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, params["m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+    elif index_type == "ivfpq":
+        if dim % params["pq_m"]:
+            raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {dim}")
+        min_train = 2 ** params["pq_bits"]
+        if n < min_train:
+            raise ValueError(f"ivfpq needs at least {min_train} vectors to train; got {n}")
+        nlist = params["nlist"] or int(4 * np.sqrt(n))
+        nlist = max(1, min(nlist, n // 39))  # FAISS wants ~39 training points per list
+        params["nlist"] = nlist
+        quantizer = faiss.IndexFlatL2(dim)
+        index = faiss.IndexIVFPQ(quantizer, dim, nlist, params["pq_m"], params["pq_bits"])
+        index.train(vectors)
+    else:  # sq8
+        index = faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit)
+        index.train(vectors)
+    index.add(vectors)
+    configure_search(index, {"index_type": index_type, "params": params})
+    return index, params
+
+
+def configure_search(index, meta: dict | None) -> None:
+    """Apply search-time parameters (HNSW efSearch, IVF nprobe) from the saved metadata."""
+    import faiss
+
+    if not meta:
+        return
+    params = meta.get("params", {})
+    index_type = meta.get("index_type", "flat")
+    if index_type == "hnsw":
+        faiss.downcast_index(index).hnsw.efSearch = params.get("ef_search", DEFAULT_PARAMS["hnsw"]["ef_search"])
+    elif index_type == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = params.get("nprobe", DEFAULT_PARAMS["ivfpq"]["nprobe"])
+
+
+def reconstruct_all(index) -> np.ndarray:
+    """
+    All stored vectors as a float32 matrix (row i = FAISS id i). Exact for flat and
+    HNSW, approximate (decoded) for compressed indexes; IVF gets a direct map first.
+    """
+    enable_reconstruct(index)
+    return np.ascontiguousarray(index.reconstruct_n(0, index.ntotal), dtype=np.float32)
+
+
+def enable_reconstruct(index) -> None:
+    """Let index.reconstruct / reconstruct_batch look up vectors by id (IVF needs a direct map)."""
+    import faiss
+
+    try:
+        ivf = faiss.extract_index_ivf(index)
+    except RuntimeError:
+        ivf = None
+    if ivf is not None:
+        ivf.make_direct_map()
+
+
+def write_index_meta(store_path: Path, index_type: str, params: dict, dim: int, count: int) -> None:
+    meta = {"index_type": index_type, "params": params, "dim": dim, "count": count, "metric": "l2"}
+    (store_path / INDEX_META_FILE).write_text(json.dumps(meta, indent=2))
+
+
+def read_index_meta(store_path: Path) -> dict | None:
+    """Index metadata written by ingest.py, or None for stores built before index types existed (flat)."""
+    path = store_path / INDEX_META_FILE
+    if not path.exists():
+        return None
+    return json.loads(path.read_text())
@@ -0,0 +1,154 @@
+"""
+In-process semantic cache of chat answers, keyed on the query embedding.
+
+A lookup whose cosine similarity to a stored query is at or above the threshold
+returns the stored answer without running retrieval or calling Gemini. Entries
+expire after a TTL, the cache is bounded with LRU eviction, and every entry is
+tagged with the vector store version it was built from so a re-ingested index
+invalidates the whole cache. A hot reload (or the first lookup with a version
+not seen before) moves the cache to the new version; lookups and answers from a
+request that started on the replaced index are plain misses and are not stored.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+# Configuration (environment overrides)
+ANSWER_CACHE_SIZE = int(os.environ.get("ANSWER_CACHE_SIZE", "256"))
+ANSWER_CACHE_TTL = float(os.environ.get("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_THRESHOLD = float(os.environ.get("ANSWER_CACHE_THRESHOLD", "0.95"))
+
+
+class AnswerCache:
+    """Bounded LRU + TTL cache matching queries by cosine similarity of their embeddings."""
+
+    def __init__(self, max_size: int = ANSWER_CACHE_SIZE, ttl: float = ANSWER_CACHE_TTL,
+                 threshold: float = ANSWER_CACHE_THRESHOLD):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.threshold = threshold
+        self._entries: OrderedDict[int, tuple[np.ndarray, object, float]] = OrderedDict()
+        self._next_key = 0
+        self._version = None
+        self._retired: set = set()  # versions replaced by a newer one; never current again
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_size > 0
+
+    def _check_version(self, version) -> bool:
+        """
+        True if version is current, switching to it first if it is new (dropping every entry).
+        False for a replaced version, which must not touch the cache. Caller holds the lock.
+        """
+        if version == self._version:
+            return True
+        if version in self._retired:
+            return False
+        self._switch(version)
+        return True
+
+    def _switch(self, version) -> None:
+        """Make version current and drop every entry. Caller holds the lock."""
+        if self._entries:
+            self.invalidations += 1
+        self._entries.clear()
+        if self._version != version:
+            self._retired.add(self._version)
+        self._retired.discard(version)
+        self._version = version
+
+    def _expire(self, now: float) -> None:
+        """Remove expired entries. Caller holds the lock."""
+        expired = [key for key, (_, _, expires_at) in self._entries.items() if expires_at <= now]
+        for key in expired:
+            del self._entries[key]
+
+    def get(self, embedding, version=None):
+        """
+        Return the cached value for the closest stored query, or None.
+        A hit requires cosine similarity >= threshold and an unexpired entry.
+        """
+        if not self.enabled:
+            return None
+        query = _normalize(embedding)
+        with self._lock:
+            if not self._check_version(version):
+                self.misses += 1
+                return None
+            self._expire(time.monotonic())
+            if not self._entries:
+                self.misses += 1
+                return None
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[k][0] for k in keys])
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self.misses += 1
+                return None
+            key = keys[best]
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][1]
+
+    def put(self, embedding, value, version=None) -> None:
+        """
+        Store a value for the query embedding, evicting the least recently used entry if full.
+        Dropped if version is not the current one (set by get): it was built from a replaced index.
+        """
+        if not self.enabled:
+            return
+        query = _normalize(embedding)
+        with self._lock:
+            if version != self._version:
+                return
+            self._entries[self._next_key] = (query, value, time.monotonic() + self.ttl)
+            self._next_key += 1
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self, version=None) -> None:
+        """Drop every entry; with a version (hot reload), also make it current, even if it was replaced before."""
+        with self._lock:
+            if version is None:
+                self._entries.clear()
+            else:
+                self._switch(version)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and configuration, for tuning the threshold."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "threshold": self.threshold,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+            }
+
+
+def _normalize(embedding) -> np.ndarray:
+    """Return the embedding as a unit-length float32 vector."""
+    vec = np.asarray(embedding, dtype=np.float32).reshape(-1)
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm > 0 else vec
+
+
+# Process-wide cache used by the chat endpoint
+answer_cache = AnswerCache()
@@ -1,10 +1,19 @@
 """
 Append chat queries and responses to a Google Sheet for review and improvement.
+Rows are queued and written in batches by a background thread, so requests never
+wait on Sheets I/O.
 """
 
+import json
 import logging
+import os
+import queue
+import threading
+import time
 from pathlib import Path
 
+from backend.metrics import LOG_ROWS_DROPPED, stage, upstream_error
+
 # Backend directory (same as this module); sheet_id and oregon-referees*.json live here
 # so they are included when Docker copies backend/ into the image.
 BACKEND_DIR = Path(__file__).resolve().parent
@@ -12,6 +21,19 @@ BACKEND_DIR = Path(__file__).resolve().parent
 # Max characters per cell (Google Sheets limit)
 MAX_CELL_CHARS = 50_000
 
+# Worksheets: chat rows go to the first sheet, feedback to the "Feedback" tab
+CHAT_LOG_SHEET = "sheet1"
+FEEDBACK_SHEET = "Feedback"
+
+# Background writer configuration (environment overrides)
+CHAT_LOG_QUEUE_SIZE = int(os.environ.get("CHAT_LOG_QUEUE_SIZE", "1000"))
+CHAT_LOG_BATCH_SIZE = int(os.environ.get("CHAT_LOG_BATCH_SIZE", "20"))
+CHAT_LOG_FLUSH_SECONDS = float(os.environ.get("CHAT_LOG_FLUSH_SECONDS", "5"))
+# Rows that could not be written to Sheets are kept here and replayed later
+CHAT_LOG_SPOOL = Path(os.environ.get("CHAT_LOG_SPOOL", str(BACKEND_DIR / "chat_log_spool.jsonl")))
+# Max size of the spool file (bytes); rows that do not fit are dropped and counted
+CHAT_LOG_SPOOL_MAX_BYTES = int(os.environ.get("CHAT_LOG_SPOOL_MAX_BYTES", str(20 * 1024 * 1024)))
+
 _sheet_client = None
 _sheet_id = None
 
@@ -56,63 +78,252 @@ def _get_sheet_client():
         return None
 
 
+def _timestamp() -> str:
+    """Pacific time formatted as y/m/d HH:MM pm."""
+    from datetime import datetime
+    from zoneinfo import ZoneInfo
+    dt = datetime.now(ZoneInfo("America/Los_Angeles"))
+    return dt.strftime("%y/%m/%d %I:%M ") + dt.strftime("%p").lower()
+
+
+def _truncate(text: str) -> str:
+    return (text[:MAX_CELL_CHARS] + "...") if len(text) > MAX_CELL_CHARS else text
+
+
 def append_chat_log(env: str, query: str, answer: str, sources: list[str]) -> None:
     """
-    Append one row to the chat log sheet. Columns: Env, Timestamp, Query, Answer, Sources.
-    Does nothing if sheet ID or credentials are missing; logs and swallows errors so chat still works.
+    Queue one row for the chat log sheet. Columns: Env, Timestamp, Query, Answer, Sources.
+    Does nothing if sheet ID or credentials are missing. Never blocks on Sheets I/O;
+    the background writer appends rows in batches.
     Timestamp is Pacific time formatted as y/m/d HH:MM pm.
     """
-    from datetime import datetime
-    from zoneinfo import ZoneInfo
-    sheet_id = _get_sheet_id()
-    if not sheet_id:
-        return
-    client = _get_sheet_client()
-    if not client:
+    if not _is_configured():
         return
-    try:
-        sheet = client.open_by_key(sheet_id).sheet1
-        dt = datetime.now(ZoneInfo("America/Los_Angeles"))
-        ts = dt.strftime("%y/%m/%d %I:%M ") + dt.strftime("%p").lower()
-        answer_trunc = (answer[:MAX_CELL_CHARS] + "...") if len(answer) > MAX_CELL_CHARS else answer
-        sources_str = ", ".join(sources) if sources else ""
-        row = [env, ts, query, answer_trunc, sources_str]
-        sheet.append_row(row, value_input_option="USER_ENTERED")
-    except Exception as e:
-        logging.exception("Chat log append failed: %s", e)
+    sources_str = ", ".join(sources) if sources else ""
+    _log_writer.enqueue(CHAT_LOG_SHEET, [env, _timestamp(), query, _truncate(answer), sources_str])
 
 
 def append_feedback(user: str, feedback: str) -> None:
     """
-    Append one row to the Feedback sheet. Columns: Timestamp, User, Feedback.
+    Queue one row for the Feedback sheet. Columns: Timestamp, User, Feedback.
     Uses the same Google Sheet as the chat log; worksheet title is "Feedback".
-    Creates the worksheet with headers if it does not exist.
-    Does nothing if sheet ID or credentials are missing; logs and swallows errors.
+    The writer creates the worksheet with headers if it does not exist.
+    Does nothing if sheet ID or credentials are missing. Never blocks on Sheets I/O.
     """
-    from datetime import datetime
-    from zoneinfo import ZoneInfo
-
-    sheet_id = _get_sheet_id()
-    if not sheet_id:
-        return
-    client = _get_sheet_client()
-    if not client:
+    if not _is_configured():
         return
-    try:
-        import gspread
-        from gspread.exceptions import WorksheetNotFound
+    user_str = (user or "").strip()
+    _log_writer.enqueue(FEEDBACK_SHEET, [_timestamp(), user_str, _truncate(feedback)])
+
 
-        spreadsheet = client.open_by_key(sheet_id)
+def _is_configured() -> bool:
+    """True if both the sheet ID and service account credentials are present (checked once)."""
+    global _configured
+    if _configured is None:
+        _configured = bool(_get_sheet_id()) and _get_credentials_path() is not None
+    return _configured
+
+
+class _LogWriter:
+    """
+    Background thread that appends queued rows to Google Sheets in batches.
+
+    Rows are flushed with one append_rows call per worksheet when CHAT_LOG_BATCH_SIZE
+    rows are pending or CHAT_LOG_FLUSH_SECONDS have passed. Spreadsheet and worksheet
+    handles are cached. If Sheets is unavailable the writer thread spills rows to a
+    local JSONL spool file, which is replayed before the next batch. Request threads
+    (and the event loop) never touch the disk: when the queue is full the row is
+    dropped. Once the spool reaches CHAT_LOG_SPOOL_MAX_BYTES, further failed rows are
+    dropped too. Both are counted in osro_chat_log_rows_dropped_total{reason}.
+    """
+
+    def __init__(self):
+        self._queue: queue.Queue = queue.Queue(maxsize=CHAT_LOG_QUEUE_SIZE)
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._spool_lock = threading.Lock()
+        self._dropping = False  # warn once per run of queue-full drops, not per row
+        self._spreadsheet = None
+        self._worksheets: dict[str, object] = {}
+
+    def start(self) -> None:
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="chat-log-writer", daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout: float = 10.0) -> None:
+        """Flush pending rows and stop the thread."""
+        with self._start_lock:
+            thread = self._thread
+            self._thread = None
+        if thread is None or not thread.is_alive():
+            return
         try:
-            sheet = spreadsheet.worksheet("Feedback")
-        except WorksheetNotFound:
-            sheet = spreadsheet.add_worksheet(title="Feedback", rows=1000, cols=3)
-            sheet.append_row(["Timestamp", "User", "Feedback"], value_input_option="USER_ENTERED")
-
-        dt = datetime.now(ZoneInfo("America/Los_Angeles"))
-        ts = dt.strftime("%y/%m/%d %I:%M ") + dt.strftime("%p").lower()
-        feedback_trunc = (feedback[:MAX_CELL_CHARS] + "...") if len(feedback) > MAX_CELL_CHARS else feedback
-        user_str = (user or "").strip()
-        sheet.append_row([ts, user_str, feedback_trunc], value_input_option="USER_ENTERED")
-    except Exception as e:
-        logging.exception("Feedback append failed: %s", e)
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def enqueue(self, sheet: str, row: list) -> None:
+        """Queue a row without blocking or disk I/O; drop it (and count it) if the queue is full."""
+        self.start()
+        try:
+            self._queue.put_nowait((sheet, row))
+            self._dropping = False
+        except queue.Full:
+            LOG_ROWS_DROPPED.inc(reason="queue_full")
+            if not self._dropping:
+                self._dropping = True
+                logging.warning("Chat log queue full (%d rows); dropping rows until it drains", CHAT_LOG_QUEUE_SIZE)
+
+    def _run(self) -> None:
+        pending: dict[str, list[list]] = {}
+        count = 0
+        deadline = time.monotonic() + CHAT_LOG_FLUSH_SECONDS
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+                if item is _STOP:
+                    stopping = True
+                else:
+                    sheet, row = item
+                    pending.setdefault(sheet, []).append(row)
+                    count += 1
+            except queue.Empty:
+                pass
+            if stopping or count >= CHAT_LOG_BATCH_SIZE or time.monotonic() >= deadline:
+                self._flush(pending)
+                pending = {}
+                count = 0
+                deadline = time.monotonic() + CHAT_LOG_FLUSH_SECONDS
+
+    def _flush(self, pending: dict[str, list[list]]) -> None:
+        """Replay the spool file (if any), then append pending rows. Spool everything on failure."""
+        spooled = self._read_spool()
+        if not pending and not spooled:
+            return
+        batches: dict[str, list[list]] = {}
+        for source in (spooled, pending):
+            for sheet, rows in source.items():
+                batches.setdefault(sheet, []).extend(rows)
+        written: set[str] = set()
+        try:
+            for sheet, rows in batches.items():
+                with stage("sheets_append"):
+                    self._worksheet(sheet).append_rows(rows, value_input_option="USER_ENTERED")
+                written.add(sheet)
+        except Exception as e:
+            logging.warning("Chat log batch append failed; spooling rows: %s", e)
+            upstream_error("sheets")
+            self._spreadsheet = None
+            self._worksheets.clear()
+            remaining = {sheet: rows for sheet, rows in batches.items() if sheet not in written}
+            # Appended after any rows enqueue() spilled meanwhile; the replayed file goes below
+            self._spool(remaining)
+        if spooled:
+            self._clear_spool()
+
+    def _worksheet(self, sheet: str):
+        """Return a cached worksheet handle, opening the spreadsheet on first use."""
+        ws = self._worksheets.get(sheet)
+        if ws is not None:
+            return ws
+        if self._spreadsheet is None:
+            client = _get_sheet_client()
+            if client is None:
+                raise RuntimeError("Sheets client not available")
+            self._spreadsheet = client.open_by_key(_get_sheet_id())
+        if sheet == CHAT_LOG_SHEET:
+            ws = self._spreadsheet.sheet1
+        else:
+            from gspread.exceptions import WorksheetNotFound
+            try:
+                ws = self._spreadsheet.worksheet(sheet)
+            except WorksheetNotFound:
+                ws = self._spreadsheet.add_worksheet(title=sheet, rows=1000, cols=3)
+                ws.append_row(["Timestamp", "User", "Feedback"], value_input_option="USER_ENTERED")
+        self._worksheets[sheet] = ws
+        return ws
+
+    def _spool(self, batches: dict[str, list[list]]) -> None:
+        """Append rows to the local spool file (one JSON object per row), up to CHAT_LOG_SPOOL_MAX_BYTES."""
+        if not any(batches.values()):
+            return
+        with self._spool_lock:
+            try:
+                CHAT_LOG_SPOOL.parent.mkdir(parents=True, exist_ok=True)
+                size = CHAT_LOG_SPOOL.stat().st_size if CHAT_LOG_SPOOL.exists() else 0
+                dropped = 0
+                with open(CHAT_LOG_SPOOL, "a") as f:
+                    for sheet, rows in batches.items():
+                        for row in rows:
+                            line = json.dumps({"sheet": sheet, "row": row}) + "\n"
+                            if size + len(line) > CHAT_LOG_SPOOL_MAX_BYTES:
+                                dropped += 1
+                                continue
+                            f.write(line)
+                            size += len(line)
+                if dropped:
+                    LOG_ROWS_DROPPED.inc(dropped, reason="spool_full")
+                    logging.warning("Chat log spool %s is full; dropped %d rows", CHAT_LOG_SPOOL, dropped)
+            except Exception as e:
+                logging.exception("Chat log spool write failed; %d rows lost: %s",
+                                  sum(len(r) for r in batches.values()), e)
+
+    def _read_spool(self) -> dict[str, list[list]]:
+        """
+        Move the spool file aside and return its rows. Rows spilled while they are being
+        replayed go to a new spool file, so _clear_spool never deletes them.
+        """
+        batches: dict[str, list[list]] = {}
+        replaying = _replay_path()
+        with self._spool_lock:
+            try:
+                if CHAT_LOG_SPOOL.exists():
+                    if replaying.exists():
+                        # Left over from a replay that never finished (e.g. a crash): keep both
+                        with open(replaying, "a") as out, open(CHAT_LOG_SPOOL) as f:
+                            out.write(f.read())
+                        CHAT_LOG_SPOOL.unlink()
+                    else:
+                        os.replace(CHAT_LOG_SPOOL, replaying)
+            except OSError as e:
+                logging.warning("Chat log spool could not be moved aside: %s", e)
+            if not replaying.exists():
+                return batches
+            try:
+                with open(replaying) as f:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            batches.setdefault(entry["sheet"], []).append(entry["row"])
+            except Exception as e:
+                logging.warning("Chat log spool unreadable: %s", e)
+        return batches
+
+    def _clear_spool(self) -> None:
+        """Delete the replayed rows (the file _read_spool moved aside), never the live spool."""
+        with self._spool_lock:
+            _replay_path().unlink(missing_ok=True)
+
+
+def _replay_path() -> Path:
+    return CHAT_LOG_SPOOL.with_name(CHAT_LOG_SPOOL.name + ".replaying")
+
+
+_STOP = object()
+_configured: bool | None = None
+_log_writer = _LogWriter()
+
+
+def start_log_writer() -> None:
+    """Start the background writer (it also starts on the first queued row)."""
+    _log_writer.start()
+
+
+def stop_log_writer() -> None:
+    """Flush queued rows and stop the background writer (called from lifespan shutdown)."""
+    _log_writer.stop()
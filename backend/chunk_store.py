@@ -0,0 +1,80 @@
+"""
+On-disk chunk store: FAISS row id -> chunk text and metadata, in SQLite.
+
+Replaces LangChain's pickled docstore (index.pkl). ingest.py writes
+chunks.sqlite next to index.faiss; the backend opens it read-only and fetches
+only the rows a search returns, so startup loads just the vector index and
+memory no longer grows with the corpus text. No pickle is involved.
+"""
+
+import json
+import sqlite3
+import threading
+from collections.abc import Sequence
+from pathlib import Path
+
+CHUNKS_FILE = "chunks.sqlite"
+
+
+class ChunkStore(Sequence):
+    """Read-only, thread-safe view of chunks.sqlite; row i is FAISS row i."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM chunks").fetchone()
+
+    @staticmethod
+    def write(path: Path, docs: list) -> None:
+        """Write the documents (row i = docs[i]), replacing any existing file."""
+        tmp = path.with_suffix(".tmp")
+        tmp.unlink(missing_ok=True)
+        conn = sqlite3.connect(tmp)
+        try:
+            conn.execute("CREATE TABLE chunks (id INTEGER PRIMARY KEY, text TEXT NOT NULL, metadata TEXT NOT NULL)")
+            conn.executemany(
+                "INSERT INTO chunks VALUES (?, ?, ?)",
+                ((i, doc.page_content, json.dumps(doc.metadata, default=str)) for i, doc in enumerate(docs)),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        tmp.replace(path)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.get_many(range(*i.indices(self._count)))
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError(i)
+        return self.get_many([i])[0]
+
+    def get_many(self, ids) -> list:
+        """Documents for the given row ids, in the given order."""
+        from langchain_core.documents import Document
+
+        ids = [int(i) for i in ids]
+        if not ids:
+            return []
+        placeholders = ",".join("?" * len(set(ids)))
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, text, metadata FROM chunks WHERE id IN ({placeholders})", list(set(ids))
+            ).fetchall()
+        by_id = {row_id: Document(page_content=text, metadata=json.loads(meta)) for row_id, text, meta in rows}
+        return [by_id[i] for i in ids]
+
+    def close(self) -> None:
+        self._conn.close()
+
+
+def fetch_documents(docs, ids) -> list:
+    """Documents for row ids from a ChunkStore or an in-memory list."""
+    if isinstance(docs, ChunkStore):
+        return docs.get_many(ids)
+    return [docs[i] for i in ids]
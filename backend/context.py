@@ -0,0 +1,173 @@
+"""
+Context packing: turn retrieved chunks into the prompt's context block.
+
+Chunks are split with 250 characters of overlap, and MMR often returns
+neighbouring chunks of the same document, so joining them as-is repeats text.
+pack_context() merges overlapping or adjacent chunks from the same source
+(by start_index when ingest recorded it, otherwise by matching the shared
+text), drops passages that are near-duplicates of one already kept, and packs
+the rest, best-ranked first, into a token budget.
+"""
+
+import logging
+import os
+import re
+
+# Approximate prompt tokens allowed for retrieved context (0 = no limit)
+CONTEXT_TOKEN_BUDGET = int(os.environ.get("CONTEXT_TOKEN_BUDGET", "2000"))
+# Share of a passage's word trigrams already in a kept passage above which it is dropped
+CONTEXT_DEDUP_THRESHOLD = float(os.environ.get("CONTEXT_DEDUP_THRESHOLD", "0.8"))
+
+CHARS_PER_TOKEN = 4  # rough average for English text with Gemini's tokenizer
+MIN_OVERLAP = 40  # shortest shared text that counts as chunk overlap when start_index is missing
+MAX_OVERLAP = 600
+MAX_GAP = 2  # chunks this many characters apart (stripped whitespace) count as adjacent
+MIN_TRUNCATED_TOKENS = 50  # don't append a truncated tail shorter than this
+SEPARATOR = "\n\n"
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def _source_key(doc) -> tuple:
+    meta = doc.metadata
+    return (meta.get("source") or meta.get("title"), meta.get("page"))
+
+
+def _text_overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of a that is a prefix of b (0 if under MIN_OVERLAP)."""
+    for size in range(min(len(a), len(b), MAX_OVERLAP), MIN_OVERLAP - 1, -1):
+        if a.endswith(b[:size]):
+            return size
+    return 0
+
+
+class _Passage:
+    """Merged text from one source, ranked by the best chunk it contains."""
+
+    def __init__(self, doc, rank: int):
+        self.docs = [doc]
+        self.rank = rank
+        self.text = doc.page_content
+        start = doc.metadata.get("start_index")
+        self.start = start if isinstance(start, int) else None
+        self.end = self.start + len(self.text) if self.start is not None else None
+
+    def absorb(self, doc) -> bool:
+        """Merge doc into this passage if they overlap or touch; return whether it merged."""
+        text = doc.page_content
+        start = doc.metadata.get("start_index")
+        if self.start is not None and isinstance(start, int):
+            end = start + len(text)
+            if start > self.end + MAX_GAP or end < self.start - MAX_GAP:
+                return False
+            # Order the two spans, then keep the part of the later one past the earlier one's end
+            (s1, e1, t1), (s2, e2, t2) = sorted([(self.start, self.end, self.text), (start, end, text)])
+            if e2 <= e1:
+                self.text = t1
+            elif s2 >= e1:
+                self.text = t1 + "\n" + t2
+            else:
+                self.text = t1 + t2[e1 - s2:]
+            self.start, self.end = s1, max(e1, e2)
+        else:
+            if text in self.text:
+                pass
+            elif self.text in text:
+                self.text = text
+            elif overlap := _text_overlap(self.text, text):
+                self.text += text[overlap:]
+            elif overlap := _text_overlap(text, self.text):
+                self.text = text + self.text[overlap:]
+            else:
+                return False
+            self.start = self.end = None
+        self.docs.append(doc)
+        return True
+
+
+def _trigrams(text: str) -> set:
+    words = _WORD_RE.findall(text.lower())
+    return {tuple(words[i:i + 3]) for i in range(max(len(words) - 2, 1))} if words else set()
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    """Cut text to at most max_chars, at the last paragraph, line or word break."""
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars]
+    for sep in ("\n\n", "\n", " "):
+        pos = cut.rfind(sep)
+        if pos > max_chars // 2:
+            return cut[:pos].rstrip()
+    return cut.rstrip()
+
+
+def pack_context(docs: list, budget: int = CONTEXT_TOKEN_BUDGET,
+                 dedup_threshold: float = CONTEXT_DEDUP_THRESHOLD) -> tuple[str, list, dict]:
+    """
+    Build the context block from ranked chunk documents.
+    Returns (context, docs that made it into the context, stats).
+    """
+    passages: list[_Passage] = []
+    by_source: dict[tuple, list[_Passage]] = {}
+    for rank, doc in enumerate(docs):
+        group = by_source.setdefault(_source_key(doc), [])
+        if not any(p.absorb(doc) for p in group):
+            passage = _Passage(doc, rank)
+            group.append(passage)
+            passages.append(passage)
+
+    kept: list[_Passage] = []
+    seen: list[set] = []
+    duplicates = 0
+    for passage in sorted(passages, key=lambda p: p.rank):
+        grams = _trigrams(passage.text)
+        if grams and any(len(grams & other) / len(grams) >= dedup_threshold for other in seen):
+            duplicates += 1
+            continue
+        kept.append(passage)
+        seen.append(grams)
+
+    parts: list[str] = []
+    used_docs: list = []
+    remaining = budget * CHARS_PER_TOKEN if budget > 0 else None
+    truncated = 0
+    for passage in kept:
+        text = passage.text.strip()
+        if remaining is not None:
+            cost = len(text) + (len(SEPARATOR) if parts else 0)
+            if cost > remaining:
+                room = remaining - (len(SEPARATOR) if parts else 0)
+                if room < MIN_TRUNCATED_TOKENS * CHARS_PER_TOKEN:
+                    break
+                text = _truncate(text, room)
+                truncated += 1
+            remaining -= len(text) + (len(SEPARATOR) if parts else 0)
+        parts.append(text)
+        used_docs.extend(passage.docs)
+        if remaining is not None and remaining <= 0:
+            break
+
+    context = SEPARATOR.join(parts)
+    naive = SEPARATOR.join(doc.page_content for doc in docs)
+    stats = {
+        "chunks": len(docs),
+        "passages": len(parts),
+        "merged": len(docs) - len(passages),
+        "duplicates_dropped": duplicates,
+        "truncated": truncated,
+        "tokens_before": estimate_tokens(naive),
+        "tokens_after": estimate_tokens(context),
+    }
+    if docs:
+        # Per-request detail for debugging; the totals are the chat_context_tokens histogram on /metrics
+        logging.debug(
+            "Context packed: %d chunks -> %d passages, ~%d -> ~%d tokens (%d merged, %d duplicates, %d truncated)",
+            stats["chunks"], stats["passages"], stats["tokens_before"], stats["tokens_after"],
+            stats["merged"], duplicates, truncated,
+        )
+    return context, used_docs, stats
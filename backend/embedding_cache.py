@@ -0,0 +1,110 @@
+"""
+LRU cache of query embeddings in front of the FastEmbed model.
+
+Repeated questions skip ONNX inference entirely, including ones that still need
+a fresh LLM answer. Vectors are stored as float32 NumPy arrays keyed on the
+normalized question text.
+"""
+
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# Max query embeddings kept in memory (0 disables the cache)
+EMBED_CACHE_SIZE = int(os.environ.get("EMBED_CACHE_SIZE", "2048"))
+
+
+def normalize_query(text: str) -> str:
+    """
+    Cache key for a question: case-folded with whitespace collapsed.
+    BAAI/bge-small-en-v1.5 uses an uncased tokenizer, so this does not change the embedding.
+    """
+    return " ".join(text.split()).casefold()
+
+
+class CachedEmbeddings(Embeddings):
+    """Wraps a LangChain Embeddings object, caching embed_query results (documents are not cached)."""
+
+    def __init__(self, inner: Embeddings, max_size: int = EMBED_CACHE_SIZE):
+        self.inner = inner
+        self.max_size = max_size
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.inner.embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_query_array(text).tolist()
+
+    def embed_query_array(self, text: str) -> np.ndarray:
+        """Return the query embedding as a float32 array, from cache when possible."""
+        key = normalize_query(text)
+        with self._lock:
+            vec = self._cache.get(key)
+            if vec is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+        vec = np.asarray(self.inner.embed_query(key), dtype=np.float32)
+        self._store(key, vec)
+        return vec
+
+    def embed_queries_array(self, texts: list[str]) -> np.ndarray:
+        """
+        Embed many questions as a float32 matrix [len(texts), dim]. Cached ones are looked up;
+        the rest go through the model in one batch (FastEmbed query_embed) instead of one call each.
+        """
+        keys = [normalize_query(t) for t in texts]
+        found: dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                vec = self._cache.get(key)
+                if vec is not None:
+                    self._cache.move_to_end(key)
+                    self.hits += 1
+                    found[key] = vec
+                elif key not in found:
+                    self.misses += 1
+        missing = list(dict.fromkeys(k for k in keys if k not in found))
+        if missing:
+            model = getattr(self.inner, "model", None)
+            if hasattr(model, "query_embed"):
+                batch_size = getattr(self.inner, "batch_size", 256)
+                vectors = list(model.query_embed(missing, batch_size=batch_size))
+            else:
+                vectors = [self.inner.embed_query(key) for key in missing]
+            for key, vec in zip(missing, vectors):
+                vec = np.asarray(vec, dtype=np.float32)
+                self._store(key, vec)
+                found[key] = vec
+        if not keys:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
+    def _store(self, key: str, vec: np.ndarray) -> None:
+        """Freeze the vector and add it to the LRU cache."""
+        vec.setflags(write=False)
+        if self.max_size > 0:
+            with self._lock:
+                self._cache[key] = vec
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._cache),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
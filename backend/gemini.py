@@ -0,0 +1,77 @@
+"""
+Process-wide Gemini client.
+
+One google-genai client is created lazily on first use and reused by every
+request, backed by a pooled keep-alive httpx.AsyncClient, so questions do not
+pay client construction and a fresh TLS handshake each time. It is closed from
+the FastAPI lifespan hook.
+"""
+
+import os
+import threading
+
+import httpx
+
+# Configuration (environment overrides)
+GEMINI_MODEL = os.environ.get("GEMINI_MODEL", "gemini-3-flash-preview")
+GEMINI_TIMEOUT = float(os.environ.get("GEMINI_TIMEOUT", "120"))  # seconds
+GEMINI_MAX_CONNECTIONS = int(os.environ.get("GEMINI_MAX_CONNECTIONS", "20"))
+GEMINI_MAX_KEEPALIVE = int(os.environ.get("GEMINI_MAX_KEEPALIVE", "10"))
+GEMINI_KEEPALIVE_EXPIRY = float(os.environ.get("GEMINI_KEEPALIVE_EXPIRY", "60"))  # seconds
+# Alternate API endpoint, e.g. the local stand-in used by scripts/loadtest.py (default: Google's)
+GEMINI_BASE_URL = os.environ.get("GEMINI_BASE_URL") or None
+
+_client = None
+_http_client: httpx.AsyncClient | None = None
+_lock = threading.Lock()
+
+
+def get_client():
+    """
+    Return the shared genai.Client, creating it on first use.
+    Raises RuntimeError if GOOGLE_API_KEY / GEMINI_API_KEY is not set.
+    """
+    global _client, _http_client
+    if _client is not None:
+        return _client
+    with _lock:
+        if _client is None:
+            from google import genai
+            from google.genai import types
+
+            api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
+            if not api_key:
+                raise RuntimeError("GOOGLE_API_KEY or GEMINI_API_KEY must be set")
+            _http_client = httpx.AsyncClient(
+                timeout=GEMINI_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=GEMINI_MAX_CONNECTIONS,
+                    max_keepalive_connections=GEMINI_MAX_KEEPALIVE,
+                    keepalive_expiry=GEMINI_KEEPALIVE_EXPIRY,
+                ),
+            )
+            _client = genai.Client(
+                api_key=api_key,
+                http_options=types.HttpOptions(
+                    base_url=GEMINI_BASE_URL,
+                    timeout=int(GEMINI_TIMEOUT * 1000),  # milliseconds
+                    httpx_async_client=_http_client,
+                ),
+            )
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool (called from lifespan shutdown)."""
+    global _client, _http_client
+    client, http_client = _client, _http_client
+    _client = None
+    _http_client = None
+    if client is not None:
+        try:
+            await client.aio.aclose()
+            client.close()
+        except Exception:
+            pass
+    if http_client is not None:
+        await http_client.aclose()
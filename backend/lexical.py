@@ -0,0 +1,138 @@
+"""
+Compact BM25 inverted index over the same chunks as the FAISS index.
+
+Row i of the BM25 index is row i of the FAISS index, so lexical and dense
+results can be fused by id. The index is built by ingest.py and saved next to
+the FAISS files as bm25.npz (plain NumPy arrays, no pickle). It loads in
+milliseconds and needs no embedding model, so the backend can answer with
+lexical-only retrieval while FastEmbed is still warming up.
+"""
+
+import re
+from pathlib import Path
+
+import numpy as np
+
+BM25_FILE = "bm25.npz"
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or "
+    "the that this to was what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens without common stopwords ("Law 11" -> ["law", "11"])."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a CSR-style inverted index: for term t, postings
+    doc_ids[offsets[t]:offsets[t + 1]] with term frequencies tfs[...].
+    """
+
+    def __init__(self, terms: list[str], offsets: np.ndarray, doc_ids: np.ndarray, tfs: np.ndarray,
+                 doc_lens: np.ndarray, k1: float = 1.5, b: float = 0.75):
+        self.vocab = {t: i for i, t in enumerate(terms)}
+        self.terms = terms
+        self.offsets = offsets
+        self.doc_ids = doc_ids
+        self.tfs = tfs
+        self.doc_lens = doc_lens
+        self.k1 = k1
+        self.b = b
+        n_docs = len(doc_lens)
+        avgdl = float(doc_lens.mean()) if n_docs else 1.0
+        # Per-document length normalization, precomputed once
+        self._norm = (k1 * (1 - b + b * doc_lens / max(avgdl, 1e-9))).astype(np.float32)
+        df = np.diff(offsets).astype(np.float64)
+        self._idf = np.log(1 + (n_docs - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    def __len__(self) -> int:
+        return len(self.doc_lens)
+
+    @classmethod
+    def build(cls, texts: list[str], k1: float = 1.5, b: float = 0.75) -> "BM25Index":
+        """Build the index from chunk texts (row i = texts[i])."""
+        postings: dict[str, list[tuple[int, int]]] = {}
+        doc_lens = np.zeros(len(texts), dtype=np.int32)
+        for doc_id, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lens[doc_id] = len(tokens)
+            counts: dict[str, int] = {}
+            for tok in tokens:
+                counts[tok] = counts.get(tok, 0) + 1
+            for tok, tf in counts.items():
+                postings.setdefault(tok, []).append((doc_id, tf))
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        for i, t in enumerate(terms):
+            offsets[i + 1] = offsets[i] + len(postings[t])
+        doc_ids = np.empty(offsets[-1], dtype=np.int32)
+        tfs = np.empty(offsets[-1], dtype=np.uint16)
+        for i, t in enumerate(terms):
+            plist = postings[t]
+            doc_ids[offsets[i]:offsets[i + 1]] = [d for d, _ in plist]
+            tfs[offsets[i]:offsets[i + 1]] = [min(tf, 65535) for _, tf in plist]
+        return cls(terms, offsets, doc_ids, tfs, doc_lens, k1, b)
+
+    def save(self, path: Path) -> None:
+        np.savez_compressed(
+            path,
+            terms=np.array(self.terms, dtype=str),
+            offsets=self.offsets,
+            doc_ids=self.doc_ids,
+            tfs=self.tfs,
+            doc_lens=self.doc_lens,
+            params=np.array([self.k1, self.b], dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: Path) -> "BM25Index":
+        with np.load(path, allow_pickle=False) as data:
+            k1, b = data["params"].tolist()
+            return cls(data["terms"].tolist(), data["offsets"], data["doc_ids"], data["tfs"],
+                       data["doc_lens"], k1, b)
+
+    def scores(self, query: str) -> np.ndarray:
+        """BM25 score of every document for the query (float32 array of length N)."""
+        scores = np.zeros(len(self.doc_lens), dtype=np.float32)
+        for tok in set(tokenize(query)):
+            t = self.vocab.get(tok)
+            if t is None:
+                continue
+            start, end = self.offsets[t], self.offsets[t + 1]
+            ids = self.doc_ids[start:end]
+            tf = self.tfs[start:end].astype(np.float32)
+            scores[ids] += self._idf[t] * tf * (self.k1 + 1) / (tf + self._norm[ids])
+        return scores
+
+    def search(self, query: str, k: int = 20, allowed: np.ndarray | None = None) -> list[int]:
+        """Row ids of the top-k documents with a non-zero score, best first (optionally only allowed ids)."""
+        scores = self.scores(query)
+        if allowed is not None:
+            mask = np.zeros(len(scores), dtype=bool)
+            mask[allowed] = True
+            scores[~mask] = 0.0
+        nonzero = int(np.count_nonzero(scores))
+        k = min(k, nonzero)
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        return top[np.argsort(-scores[top], kind="stable")].tolist()
+
+
+def fuse_rankings(rankings: list[list[int]], weights: list[float], k: int = 60) -> list[int]:
+    """
+    Weighted reciprocal rank fusion: score(d) = sum_i w_i / (k + rank_i(d)).
+    Returns ids ordered by fused score (ties keep first-seen order).
+    """
+    fused: dict[int, float] = {}
+    for ranking, weight in zip(rankings, weights):
+        if weight <= 0:
+            continue
+        for rank, doc_id in enumerate(ranking):
+            fused[doc_id] = fused.get(doc_id, 0.0) + weight / (k + rank + 1)
+    return sorted(fused, key=fused.get, reverse=True)
@@ -1,16 +1,51 @@
 """
 Service module for interacting with the USSF Learning Center Certification API.
 Uses the public API endpoints which require no authentication.
+
+All calls share one app-lifetime httpx.AsyncClient (connection pool, keep-alive,
+HTTP/2 when the h2 package is installed), created in the FastAPI lifespan, so a
+/license-status lookup reuses warm connections instead of two new TLS handshakes.
+
+get_ussf_id and get_active_licenses put both lookups behind in-memory TTL caches
+(email -> USSF ID, USSF ID -> licenses; "no USSF ID" is cached briefly) and
+single-flight, so concurrent lookups of the same person share one upstream call.
 """
 
+import importlib.util
 import json
+import os
+import threading
+import time
+from collections import OrderedDict
 from datetime import date
 from pathlib import Path
 
 import httpx
 
-# Public API base URL (no authentication required)
-USSF_API_BASE_URL = "https://connect.learning.ussoccer.com/certifications/public"
+from backend.metrics import stage, upstream_error
+from backend.singleflight import SingleFlight
+
+# Public API base URL (no authentication required); overridable for local stand-ins (scripts/loadtest.py)
+USSF_API_BASE_URL = os.environ.get("USSF_API_BASE_URL", "https://connect.learning.ussoccer.com/certifications/public")
+
+# Shared client tuning (environment overrides)
+USSF_TIMEOUT = float(os.environ.get("USSF_TIMEOUT", "30"))  # seconds
+USSF_MAX_CONNECTIONS = int(os.environ.get("USSF_MAX_CONNECTIONS", "20"))
+USSF_MAX_KEEPALIVE = int(os.environ.get("USSF_MAX_KEEPALIVE", "10"))
+USSF_KEEPALIVE_EXPIRY = float(os.environ.get("USSF_KEEPALIVE_EXPIRY", "60"))  # seconds
+# HTTP/2 multiplexes concurrent lookups over one connection; needs the optional h2 package
+USSF_HTTP2 = os.environ.get("USSF_HTTP2", "1").lower() in ("1", "true", "yes")
+
+_client: httpx.AsyncClient | None = None
+
+# Lookup caches: seconds an email -> USSF ID result, a "no USSF ID" result and a license list stay valid
+USSF_ID_CACHE_TTL = float(os.environ.get("USSF_ID_CACHE_TTL", "86400"))
+USSF_NOT_FOUND_CACHE_TTL = float(os.environ.get("USSF_NOT_FOUND_CACHE_TTL", "60"))
+USSF_LICENSE_CACHE_TTL = float(os.environ.get("USSF_LICENSE_CACHE_TTL", "900"))
+USSF_CACHE_SIZE = int(os.environ.get("USSF_CACHE_SIZE", "10000"))  # entries per cache (0 disables)
+
+# License status buckets from _calculate_status, most urgent last
+STATUS_BUCKETS = ("active", "expiring_soon", "critical", "expired")
 
 # License reference data loaded at startup
 _license_reference: dict = {}
@@ -29,28 +64,70 @@ def get_license_reference() -> dict:
     return _license_reference
 
 
+def init_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """
+    Create the shared client (called from lifespan startup). Tests can pass a transport,
+    e.g. httpx.MockTransport, to serve USSF responses without the network.
+    """
+    global _client
+    http2 = USSF_HTTP2 and transport is None and importlib.util.find_spec("h2") is not None
+    _client = httpx.AsyncClient(
+        timeout=USSF_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=USSF_MAX_CONNECTIONS,
+            max_keepalive_connections=USSF_MAX_KEEPALIVE,
+            keepalive_expiry=USSF_KEEPALIVE_EXPIRY,
+        ),
+        http2=http2,
+        transport=transport,
+    )
+    return _client
+
+
+def get_client() -> httpx.AsyncClient:
+    """Return the shared client, creating it on first use when lifespan has not (scripts, tests)."""
+    if _client is None or _client.is_closed:
+        return init_client()
+    return _client
+
+
+async def close_client() -> None:
+    """Close the shared client and its connection pool (called from lifespan shutdown)."""
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.aclose()
+
+
+async def _get(client: httpx.AsyncClient, stage_name: str, url: str, **kwargs) -> httpx.Response:
+    """GET timed as one request stage; transport errors count as USSF upstream errors."""
+    try:
+        with stage(stage_name):
+            return await client.get(url, **kwargs)
+    except httpx.HTTPError:
+        upstream_error("ussf")
+        raise
+
+
 async def lookup_ussf_id(email: str) -> tuple[str | None, str | None]:
     """
     Look up the USSF ID for the given email address.
     Returns tuple of (ussf_id, full_name) or (None, None) if not found.
     """
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(
-            f"{USSF_API_BASE_URL}/users",
-            params={"email": email},
-        )
-        if resp.status_code == 404:
-            return None, None
-        if resp.status_code != 200:
-            raise RuntimeError(f"USSF API user lookup failed with status {resp.status_code}")
-        
-        users = resp.json()
-        if not users or len(users) == 0:
-            return None, None
-        
-        # Return the first matching user
-        first_user = users[0]
-        return first_user.get("ussf_id"), first_user.get("full_name")
+    resp = await _get(get_client(), "ussf_lookup", f"{USSF_API_BASE_URL}/users", params={"email": email})
+    if resp.status_code == 404:
+        return None, None
+    if resp.status_code != 200:
+        upstream_error("ussf")
+        raise RuntimeError(f"USSF API user lookup failed with status {resp.status_code}")
+
+    users = resp.json()
+    if not users or len(users) == 0:
+        return None, None
+
+    # Return the first matching user
+    first_user = users[0]
+    return first_user.get("ussf_id"), first_user.get("full_name")
 
 
 async def fetch_active_licenses(ussf_id: str) -> list[dict]:
@@ -58,25 +135,133 @@ async def fetch_active_licenses(ussf_id: str) -> list[dict]:
     Fetch the list of licenses for the given USSF ID.
     Filters to only include non-expired licenses.
     """
-    async with httpx.AsyncClient(timeout=30.0) as client:
-        resp = await client.get(
-            f"{USSF_API_BASE_URL}/users/{ussf_id}/user-licenses",
-        )
-        if resp.status_code != 200:
-            raise RuntimeError(f"USSF API license fetch failed with status {resp.status_code}")
-        
-        licenses = resp.json()
-        today = date.today().isoformat()
-        
-        # Filter out expired licenses
-        active_licenses = []
-        for lic in licenses:
-            exp_date = lic.get("expiration_date")
-            # Include if no expiration or expiration is in the future
-            if exp_date is None or exp_date >= today:
-                active_licenses.append(lic)
-        
-        return active_licenses
+    resp = await _get(get_client(), "ussf_licenses", f"{USSF_API_BASE_URL}/users/{ussf_id}/user-licenses")
+    if resp.status_code != 200:
+        upstream_error("ussf")
+        raise RuntimeError(f"USSF API license fetch failed with status {resp.status_code}")
+
+    return _active(resp.json())
+
+
+def _active(licenses: list[dict]) -> list[dict]:
+    """Filter out expired licenses (also applied again to snapshot records, which may be a day old)."""
+    today = date.today().isoformat()
+    active_licenses = []
+    for lic in licenses:
+        exp_date = lic.get("expiration_date")
+        # Include if no expiration or expiration is in the future
+        if exp_date is None or exp_date >= today:
+            active_licenses.append(lic)
+    return active_licenses
+
+
+class TTLCache:
+    """Bounded LRU cache whose entries each carry their own expiry."""
+
+    def __init__(self, max_size: int = USSF_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: OrderedDict[str, tuple[object, float]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> tuple[object, float] | None:
+        """(value, seconds left) for a live entry, or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0], entry[1] - now
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value, ttl: float) -> None:
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+_id_cache = TTLCache()
+_license_cache = TTLCache()
+_id_flight = SingleFlight("ussf_id")
+_license_flight = SingleFlight("ussf_licenses")
+
+
+async def _cached(cache: TTLCache, flight: SingleFlight, name: str, key: str, fetch, ttl_for) -> tuple:
+    """
+    Cached, coalesced fetch(). Returns (value, cache status) where the status is one
+    RFC 9211 Cache-Status entry: "<name>; hit; ttl=N", "<name>; fwd=miss; stored", or
+    "...; collapsed" when the call joined another request's in-flight lookup.
+    Errors are not cached.
+    """
+    entry = cache.get(key)
+    if entry is not None:
+        value, ttl_left = entry
+        return value, f"{name}; hit; ttl={int(ttl_left)}"
+    collapsed = flight.in_flight(key)
+
+    async def fetch_and_store():
+        value = await fetch()
+        cache.put(key, value, ttl_for(value))
+        return value
+
+    value = await flight.do(key, fetch_and_store)
+    return value, f"{name}; fwd=miss; {'collapsed' if collapsed else 'stored'}"
+
+
+async def get_ussf_id(email: str) -> tuple[tuple[str | None, str | None], str]:
+    """lookup_ussf_id behind the email cache (not-found results cached briefly). Returns (result, cache status)."""
+    return await _cached(
+        _id_cache, _id_flight, "ussf-id", email.strip().casefold(), lambda: lookup_ussf_id(email),
+        lambda result: USSF_ID_CACHE_TTL if result[0] is not None else USSF_NOT_FOUND_CACHE_TTL,
+    )
+
+
+async def get_active_licenses(ussf_id: str) -> tuple[list[dict], str]:
+    """fetch_active_licenses behind the license cache. Returns (licenses, cache status)."""
+    return await _cached(
+        _license_cache, _license_flight, "ussf-licenses", ussf_id, lambda: fetch_active_licenses(ussf_id),
+        lambda licenses: USSF_LICENSE_CACHE_TTL,
+    )
+
+
+def clear_caches() -> None:
+    _id_cache.clear()
+    _license_cache.clear()
+
+
+def cache_stats() -> dict:
+    """Counters for /cache-stats and /metrics."""
+    from backend.license_snapshot import get_snapshot
+
+    snapshot = get_snapshot()
+    return {
+        "snapshot": snapshot.stats() if snapshot is not None else None,
+        "ussf_id": _id_cache.stats() | {"coalescing": _id_flight.stats()},
+        "ussf_licenses": _license_cache.stats() | {"coalescing": _license_flight.stats()},
+    }
 
 
 def _calculate_status(expiration_date: str | None) -> str:
@@ -148,3 +333,98 @@ def enrich_and_group_licenses(raw_licenses: list[dict]) -> dict:
         grouped[discipline_name].sort(key=lambda x: x["rank"])
 
     return grouped
+
+
+async def get_referee_licenses(email: str) -> dict:
+    """
+    USSF ID, name and raw active licenses for an email, from the local snapshot when it
+    has a fresh entry (see backend.license_snapshot), otherwise from the cached live
+    lookups, which then update the snapshot. If the live lookup fails and a stale
+    snapshot entry exists, that is served instead. Returns {"ussf_id" (None = no USSF ID),
+    "full_name", "licenses", "source" (snapshot | live), "as_of" (snapshot fetch time,
+    unix seconds, or None), "stale", "cache_status" (RFC 9211 Cache-Status value)}.
+    Raises RuntimeError / httpx.HTTPError when USSF fails and there is nothing to fall back on.
+    """
+    from backend.license_snapshot import LICENSE_SNAPSHOT_MAX_AGE, get_snapshot
+    from backend.workers import run_blocking
+
+    snapshot = get_snapshot()
+    # Primary-key reads (and touch's hourly one-row update) on a local SQLite file: cheap enough
+    # to run on the event loop
+    entry = snapshot.get(email) if snapshot is not None else None
+    if entry is not None:
+        ttl_left = entry["fetched_at"] + LICENSE_SNAPSHOT_MAX_AGE - time.time()
+        if ttl_left > 0:
+            snapshot.served += 1
+            snapshot.touch(entry)
+            return _from_snapshot(entry, stale=False, cache_status=f"ussf-snapshot; hit; ttl={int(ttl_left)}")
+
+    try:
+        (ussf_id, full_name), id_status = await get_ussf_id(email)
+        if ussf_id is None:
+            return {"ussf_id": None, "full_name": None, "licenses": [], "source": "live", "as_of": None,
+                    "stale": False, "cache_status": id_status}
+        licenses, licenses_status = await get_active_licenses(ussf_id)
+    except (RuntimeError, httpx.HTTPError):
+        if entry is None:
+            raise
+        snapshot.served += 1
+        snapshot.touch(entry)
+        return _from_snapshot(entry, stale=True, cache_status="ussf-snapshot; hit; detail=stale-upstream-error")
+    if snapshot is not None:
+        await run_blocking(snapshot.put, email, ussf_id, full_name, licenses)
+    return {"ussf_id": ussf_id, "full_name": full_name, "licenses": licenses, "source": "live", "as_of": None,
+            "stale": False, "cache_status": f"{id_status}, {licenses_status}"}
+
+
+def _from_snapshot(entry: dict, stale: bool, cache_status: str) -> dict:
+    return {"ussf_id": entry["ussf_id"], "full_name": entry["full_name"], "licenses": _active(entry["licenses"]),
+            "source": "snapshot", "as_of": entry["fetched_at"], "stale": stale, "cache_status": cache_status}
+
+
+def freshness(result: dict) -> dict:
+    """Response fields telling the client where the data came from and how old it is."""
+    fields = {"source": result["source"]}
+    if result["as_of"] is not None:
+        from datetime import datetime, timezone
+
+        fields["as_of"] = datetime.fromtimestamp(result["as_of"], timezone.utc).isoformat(timespec="seconds")
+        fields["stale"] = result["stale"]
+    return fields
+
+
+async def resolve_referee(email: str) -> dict:
+    """
+    License status for one roster email, never raising: {"email", "result"} plus
+    ussf_id/full_name/licenses when found, or error. result is ok, not_found or error.
+    """
+    try:
+        found = await get_referee_licenses(email)
+    except Exception as e:
+        return {"email": email, "result": "error", "error": str(e)}
+    if found["ussf_id"] is None:
+        return {"email": email, "result": "not_found"}
+    with stage("enrich"):
+        grouped = enrich_and_group_licenses(found["licenses"])
+    return {"email": email, "result": "ok", "ussf_id": found["ussf_id"], "full_name": found["full_name"],
+            "licenses": grouped, **freshness(found)}
+
+
+def summarize_roster(records: list[dict]) -> dict:
+    """
+    Roster totals: referees by lookup result, licenses per status bucket, and referees
+    by their most urgent license status (referees without licenses count as "none").
+    """
+    results = {"ok": 0, "not_found": 0, "error": 0}
+    licenses = dict.fromkeys(STATUS_BUCKETS, 0)
+    referees = dict.fromkeys(STATUS_BUCKETS + ("none",), 0)
+    for record in records:
+        results[record["result"]] += 1
+        if record["result"] != "ok":
+            continue
+        statuses = [lic["status"] for group in record["licenses"].values() for lic in group]
+        for status in statuses:
+            licenses[status] += 1
+        referees[max(statuses, key=STATUS_BUCKETS.index) if statuses else "none"] += 1
+    return {"referees": len(records), "results": results, "licenses": licenses,
+            "referees_by_most_urgent_status": referees}
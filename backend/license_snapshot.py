@@ -0,0 +1,302 @@
+"""
+Local snapshot of USSF license records for referees we already know about.
+
+Opt-in with LICENSE_SNAPSHOT_DB (a SQLite file). Every successful live lookup
+is recorded: email, USSF ID, name and the raw records fetch_active_licenses
+returned, with the time they were fetched. /license-status serves a referee
+from the snapshot while it is younger than LICENSE_SNAPSHOT_MAX_AGE and only
+goes to the USSF API for unknown or stale entries. A background refresher
+re-fetches entries older than LICENSE_SNAPSHOT_REFRESH_AFTER, stalest first,
+at no more than LICENSE_SNAPSHOT_RATE upstream calls per second, so popular
+referees stay fresh without bursts against the USSF API. Entries nobody has
+asked for in LICENSE_SNAPSHOT_IDLE_AFTER are no longer refreshed and are then
+deleted, so the table and the refresh load follow the referees actually served.
+
+Seed referees the scheduler should fetch before anyone asks for them with:
+    python -m backend.license_snapshot add roster.csv   (or emails as arguments)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+# SQLite file for the snapshot (unset = no snapshot, every lookup is live)
+LICENSE_SNAPSHOT_DB = os.environ.get("LICENSE_SNAPSHOT_DB", "")
+# Serve from the snapshot while an entry is younger than this (seconds)
+LICENSE_SNAPSHOT_MAX_AGE = float(os.environ.get("LICENSE_SNAPSHOT_MAX_AGE", "86400"))
+# The refresher re-fetches entries older than this (seconds); keep it below MAX_AGE
+LICENSE_SNAPSHOT_REFRESH_AFTER = float(os.environ.get("LICENSE_SNAPSHOT_REFRESH_AFTER", "43200"))
+# Max USSF API calls per second made by the refresher
+LICENSE_SNAPSHOT_RATE = float(os.environ.get("LICENSE_SNAPSHOT_RATE", "0.5"))
+# Entries not served (or seeded) for this long are dropped instead of refreshed (seconds)
+LICENSE_SNAPSHOT_IDLE_AFTER = float(os.environ.get("LICENSE_SNAPSHOT_IDLE_AFTER", "2592000"))
+# last_served_at is written at most this often per entry (seconds), not on every hit
+_TOUCH_INTERVAL = 3600.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS referees (
+    email TEXT PRIMARY KEY,      -- case-folded
+    ussf_id TEXT,                -- NULL until first fetched (seeded entries)
+    full_name TEXT,
+    licenses TEXT,               -- JSON: raw records from fetch_active_licenses
+    fetched_at REAL NOT NULL,    -- unix time of the last successful fetch (0 = never)
+    checked_at REAL NOT NULL,    -- unix time of the last attempt; refresh order
+    last_error TEXT,
+    last_served_at REAL NOT NULL DEFAULT 0  -- unix time it was last served or seeded; idle entries are pruned
+);
+CREATE INDEX IF NOT EXISTS referees_checked_at ON referees (checked_at);
+"""
+
+
+def _key(email: str) -> str:
+    return email.strip().casefold()
+
+
+class LicenseSnapshot:
+    """SQLite-backed snapshot; one connection shared by the event loop and worker threads."""
+
+    def __init__(self, path: Path | str):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(referees)")}
+            if "last_served_at" not in columns:
+                # Snapshot written before idle pruning: count every entry as served now
+                self._conn.execute("ALTER TABLE referees ADD COLUMN last_served_at REAL NOT NULL DEFAULT 0")
+                self._conn.execute("UPDATE referees SET last_served_at = ?", (time.time(),))
+        self.served = 0
+        self.refreshed = 0
+        self.refresh_errors = 0
+        self.pruned = 0
+
+    def get(self, email: str) -> dict | None:
+        """The entry for email with its licenses decoded, or None if unknown or never fetched."""
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM referees WHERE email = ?", (_key(email),)).fetchone()
+        if row is None or row["ussf_id"] is None:
+            return None
+        entry = dict(row)
+        entry["licenses"] = json.loads(entry["licenses"] or "[]")
+        return entry
+
+    def put(self, email: str, ussf_id: str, full_name: str | None, licenses: list[dict],
+            fetched_at: float | None = None, served: bool = True) -> None:
+        """Record a fetch; served=False (the refresher) leaves last_served_at alone on existing entries."""
+        fetched_at = time.time() if fetched_at is None else fetched_at
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO referees (email, ussf_id, full_name, licenses, fetched_at, checked_at, last_error,"
+                " last_served_at) VALUES (?, ?, ?, ?, ?, ?, NULL, ?)"
+                " ON CONFLICT(email) DO UPDATE SET ussf_id = excluded.ussf_id, full_name = excluded.full_name,"
+                " licenses = excluded.licenses, fetched_at = excluded.fetched_at,"
+                " checked_at = excluded.checked_at, last_error = NULL,"
+                " last_served_at = CASE WHEN ? THEN excluded.last_served_at ELSE last_served_at END",
+                (_key(email), ussf_id, full_name, json.dumps(licenses), fetched_at, fetched_at, time.time(), served),
+            )
+
+    def touch(self, entry: dict) -> None:
+        """Note that entry (from get) was just served; written at most once per _TOUCH_INTERVAL."""
+        now = time.time()
+        if entry["last_served_at"] > now - _TOUCH_INTERVAL:
+            return
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE referees SET last_served_at = ? WHERE email = ?", (now, entry["email"]))
+
+    def add(self, emails: list[str]) -> int:
+        """Register emails to be fetched by the refresher (existing entries untouched). Returns how many were new."""
+        keys = {_key(e) for e in emails if "@" in e}
+        now = time.time()
+        with self._lock, self._conn:
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO referees (email, fetched_at, checked_at, last_served_at) VALUES (?, 0, 0, ?)",
+                [(k, now) for k in sorted(keys)],
+            )
+            return self._conn.total_changes - before
+
+    def mark_failed(self, email: str, error: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("UPDATE referees SET checked_at = ?, last_error = ? WHERE email = ?",
+                               (time.time(), error, _key(email)))
+
+    def due(self, older_than: float, limit: int = 50) -> list[dict]:
+        """Entries not checked for older_than seconds and not idle, least recently checked first."""
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT email, ussf_id, checked_at FROM referees WHERE checked_at <= ? AND last_served_at > ?"
+                " ORDER BY checked_at LIMIT ?",
+                (now - older_than, now - LICENSE_SNAPSHOT_IDLE_AFTER, limit),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def next_due_in(self, older_than: float) -> float | None:
+        """Seconds until the least recently checked active entry is due, or None when there is none."""
+        with self._lock:
+            oldest = self._conn.execute("SELECT MIN(checked_at) FROM referees WHERE last_served_at > ?",
+                                        (time.time() - LICENSE_SNAPSHOT_IDLE_AFTER,)).fetchone()[0]
+        if oldest is None:
+            return None
+        return max(0.0, oldest + older_than - time.time())
+
+    def prune(self) -> int:
+        """Delete entries not served for LICENSE_SNAPSHOT_IDLE_AFTER seconds. Returns how many."""
+        with self._lock, self._conn:
+            deleted = self._conn.execute("DELETE FROM referees WHERE last_served_at <= ?",
+                                         (time.time() - LICENSE_SNAPSHOT_IDLE_AFTER,)).rowcount
+        self.pruned += deleted
+        return deleted
+
+    def stats(self) -> dict:
+        now = time.time()
+        with self._lock:
+            total, fresh, never = self._conn.execute(
+                "SELECT COUNT(*), SUM(ussf_id IS NOT NULL AND fetched_at > ?), SUM(ussf_id IS NULL)"
+                " FROM referees", (now - LICENSE_SNAPSHOT_MAX_AGE,),
+            ).fetchone()
+        return {
+            "referees": total,
+            "fresh": fresh or 0,
+            "never_fetched": never or 0,
+            "served": self.served,
+            "refreshed": self.refreshed,
+            "refresh_errors": self.refresh_errors,
+            "pruned": self.pruned,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_snapshot: LicenseSnapshot | None = None
+_snapshot_lock = threading.Lock()
+_refresher: asyncio.Task | None = None
+
+
+def get_snapshot() -> LicenseSnapshot | None:
+    """The snapshot store, opened on first use, or None when LICENSE_SNAPSHOT_DB is not set."""
+    global _snapshot
+    if not LICENSE_SNAPSHOT_DB:
+        return None
+    if _snapshot is None:
+        with _snapshot_lock:
+            if _snapshot is None:
+                _snapshot = LicenseSnapshot(LICENSE_SNAPSHOT_DB)
+    return _snapshot
+
+
+class _RateLimiter:
+    """Spaces calls at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+
+    async def wait(self) -> None:
+        loop = asyncio.get_running_loop()
+        delay = self._next - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        self._next = max(loop.time(), self._next) + self.interval
+
+
+async def refresh_entry(snapshot: LicenseSnapshot, entry: dict, limiter: _RateLimiter) -> None:
+    """Re-fetch one entry's licenses (and its USSF ID if never fetched), bypassing the lookup caches."""
+    from backend.license_service import fetch_active_licenses, lookup_ussf_id
+    from backend.workers import run_blocking
+
+    email, ussf_id, full_name = entry["email"], entry["ussf_id"], None
+    try:
+        if ussf_id is None:
+            await limiter.wait()
+            ussf_id, full_name = await lookup_ussf_id(email)
+            if ussf_id is None:
+                snapshot.refresh_errors += 1
+                await run_blocking(snapshot.mark_failed, email, "no USSF ID for this email")
+                return
+        else:
+            full_name = (await run_blocking(snapshot.get, email) or {}).get("full_name")
+        await limiter.wait()
+        licenses = await fetch_active_licenses(ussf_id)
+    except Exception as e:
+        snapshot.refresh_errors += 1
+        await run_blocking(snapshot.mark_failed, email, str(e))
+        return
+    await run_blocking(snapshot.put, email, ussf_id, full_name, licenses, served=False)
+    snapshot.refreshed += 1
+
+
+async def _refresh_loop(snapshot: LicenseSnapshot) -> None:
+    from backend.workers import run_blocking
+
+    limiter = _RateLimiter(LICENSE_SNAPSHOT_RATE)
+    while True:
+        try:
+            due = await run_blocking(snapshot.due, LICENSE_SNAPSHOT_REFRESH_AFTER)
+            for entry in due:
+                await refresh_entry(snapshot, entry, limiter)
+            if not due:
+                await run_blocking(snapshot.prune)
+                wait = await run_blocking(snapshot.next_due_in, LICENSE_SNAPSHOT_REFRESH_AFTER)
+                await asyncio.sleep(min(60.0, wait if wait is not None else 60.0))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logging.exception("License snapshot refresh failed: %s", e)
+            await asyncio.sleep(60.0)
+
+
+def start_refresher() -> None:
+    """Start the background refresh task (lifespan startup); no-op without LICENSE_SNAPSHOT_DB."""
+    global _refresher
+    snapshot = get_snapshot()
+    if snapshot is None or (_refresher is not None and not _refresher.done()):
+        return
+    _refresher = asyncio.create_task(_refresh_loop(snapshot))
+
+
+async def stop_refresher() -> None:
+    """Cancel the refresh task (lifespan shutdown)."""
+    global _refresher
+    task, _refresher = _refresher, None
+    if task is not None:
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+
+def main():
+    """python -m backend.license_snapshot add <roster.csv | email ...>: seed referees to fetch."""
+    if len(sys.argv) < 3 or sys.argv[1] != "add":
+        raise SystemExit("Usage: python -m backend.license_snapshot add <roster.csv | email ...>")
+    snapshot = get_snapshot()
+    if snapshot is None:
+        raise SystemExit("Set LICENSE_SNAPSHOT_DB to the snapshot file first")
+    emails = []
+    for arg in sys.argv[2:]:
+        path = Path(arg)
+        if "@" not in arg and path.exists():
+            emails += [cell.strip() for line in path.read_text().splitlines() for cell in line.split(",")]
+        else:
+            emails.append(arg)
+    added = snapshot.add(emails)
+    print(f"Added {added} referees to {snapshot.path}; the refresher fetches them at {LICENSE_SNAPSHOT_RATE}/s")
+
+
+if __name__ == "__main__":
+    main()
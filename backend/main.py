@@ -2,23 +2,58 @@
 FastAPI backend for Oregon Soccer Referee Concierge.
 """
 
+import json
 import os
+import time
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from pathlib import Path
+
+from backend import store as vector_store_state
+from backend.admission import Overloaded, admission
+from backend.metrics import (
+    ANSWER_CHARS, CONTEXT_TOKENS, PROMPT_CHARS, MetricsMiddleware, record_stage, register_collector, render, stage,
+    upstream_error,
+)
+from backend.singleflight import SingleFlight
+from backend.store import get_vector_store
 # genai/langchain/FAISS imported lazily in handlers for fast startup
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Startup: load license reference. Vector store is loaded lazily on first use. Shutdown: nothing."""
+    """
+    Startup: load license reference. Vector store and Gemini client are created lazily on first use,
+    or (WARMUP_ON_STARTUP) the vector store and embedding model are warmed up in the background.
+    Start polling for newly published vector store versions (hot reload), open the pooled USSF client
+    and (LICENSE_SNAPSHOT_DB) start the license snapshot refresher.
+    Shutdown: flush the chat log, stop the refresher, close the Gemini and USSF clients and stop the worker pool.
+    """
+    from backend.chat_log import stop_log_writer
+    from backend.gemini import close_client
+    from backend.license_service import close_client as close_ussf_client
+    from backend.license_service import init_client as init_ussf_client
     from backend.license_service import load_license_reference
+    from backend.license_snapshot import start_refresher, stop_refresher
+    from backend.workers import shutdown_executor
     load_license_reference()
+    init_ussf_client()
+    start_refresher()
+    if vector_store_state.WARMUP_ON_STARTUP:
+        vector_store_state.start_warm_up()
+    vector_store_state.start_reload_watcher()
     yield
+    vector_store_state.stop_warm_up()
+    vector_store_state.stop_reload_watcher()
+    stop_log_writer()
+    await stop_refresher()
+    await close_client()
+    await close_ussf_client()
+    shutdown_executor()
 
 
 app = FastAPI(
@@ -35,23 +70,48 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Server-Timing", "Cache-Status"],
 )
+# Outermost: in-flight count, request duration and Server-Timing for every request
+app.add_middleware(MetricsMiddleware)
+
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Admission control rejected the request: fast 503 with Retry-After."""
+    return JSONResponse(status_code=503, content={"detail": str(exc)},
+                        headers={"Retry-After": str(exc.retry_after)})
 
 # Static files directory (for production Docker deployment)
 STATIC_DIR = Path(__file__).parent.parent / "static"
 
-# Configuration
-VECTOR_STORE_PATH = Path(__file__).parent.parent / "vector_store"
+# Identical questions in flight at the same time share one answer (/chat) or one Gemini stream (/chat/stream)
+_chat_flight = SingleFlight("chat")
+_stream_flight = SingleFlight("chat_stream")
+
+# POST /license-status/bulk: max emails per roster, and USSF lookups in flight per roster
+LICENSE_BULK_MAX_EMAILS = int(os.environ.get("LICENSE_BULK_MAX_EMAILS", "1000"))
+LICENSE_BULK_CONCURRENCY = int(os.environ.get("LICENSE_BULK_CONCURRENCY", "8"))
+# Max request body size for a roster (bytes); larger uploads get a 413 without being read in full
+LICENSE_BULK_MAX_BYTES = int(os.environ.get("LICENSE_BULK_MAX_BYTES", str(1024 * 1024)))
 
-# Global vector store instance
-vector_store = None
+# Token for /admin endpoints (Authorization: Bearer <token>); unset = admin endpoints disabled
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
 
+# POST /chat/batch: max questions per request, and Gemini calls in flight per batch
+CHAT_BATCH_MAX_QUESTIONS = int(os.environ.get("CHAT_BATCH_MAX_QUESTIONS", "500"))
+CHAT_BATCH_CONCURRENCY = int(os.environ.get("CHAT_BATCH_CONCURRENCY", "8"))
 
 class Query(BaseModel):
     """Request model for chat queries."""
     question: str
 
 
+class BatchQuery(BaseModel):
+    """Request model for batch chat queries."""
+    questions: list[str]
+
+
 class Response(BaseModel):
     """Response model for chat answers."""
     answer: str
@@ -64,29 +124,6 @@ class FeedbackSubmit(BaseModel):
     description: str
 
 
-def load_vector_store():
-    """Load the FAISS vector store if it exists."""
-    global vector_store
-    from langchain_community.embeddings import FastEmbedEmbeddings
-    from langchain_community.vectorstores import FAISS
-
-    if VECTOR_STORE_PATH.exists():
-        embeddings = FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-        vector_store = FAISS.load_local(
-            str(VECTOR_STORE_PATH), 
-            embeddings,
-            allow_dangerous_deserialization=True
-        )
-
-
-def get_vector_store():
-    """Return the vector store, loading it on first use (lazy load for fast Cloud Run startup)."""
-    global vector_store
-    if vector_store is None:
-        load_vector_store()
-    return vector_store
-
-
 @app.get("/")
 async def root():
     """Health check endpoint."""
@@ -95,14 +132,103 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Detailed health check."""
-    store = get_vector_store()
+    """Detailed health check. Reports vector store state without loading it."""
+    status = vector_store_state.load_status()
     return {
         "status": "healthy",
-        "vector_store_loaded": store is not None
+        "vector_store_loaded": status["vector_store_loaded"],
+        "vector_store_state": status["state"],
     }
 
 
+@app.get("/livez")
+async def livez():
+    """Liveness probe: the process is up. Never touches the vector store."""
+    return {"status": "alive"}
+
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness probe: 200 once the vector store is warmed up, 503 while loading or after a failed load."""
+    status = vector_store_state.load_status()
+    status["ready"] = vector_store_state.is_ready()
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+
+@app.get("/cache-stats")
+async def cache_stats():
+    """Answer, query embedding and USSF lookup cache counters, request coalescing and admission counters."""
+    from backend.answer_cache import answer_cache
+    from backend.license_service import cache_stats as cache_stats_ussf
+    return {
+        "answer_cache": answer_cache.stats(),
+        "query_embeddings": vector_store_state.embedding_cache_stats(),
+        "coalescing": {flight.name: flight.stats() for flight in (_chat_flight, _stream_flight)},
+        "admission": admission.stats(),
+        "ussf": cache_stats_ussf(),
+    }
+
+
+def _cache_metrics():
+    """Scrape-time cache and coalescing counters for /metrics (they live in their own modules)."""
+    from backend.answer_cache import answer_cache
+
+    from backend.license_service import cache_stats as cache_stats_ussf
+
+    ussf = cache_stats_ussf()
+    caches = {"answer": answer_cache.stats(), "query_embedding": vector_store_state.embedding_cache_stats() or {},
+              "ussf_id": ussf["ussf_id"], "ussf_licenses": ussf["ussf_licenses"]}
+    flights = [flight.stats() | {"name": flight.name} for flight in (_chat_flight, _stream_flight)]
+    flights += [ussf[name]["coalescing"] | {"name": name} for name in ("ussf_id", "ussf_licenses")]
+    return [
+        ("cache_hits_total", "counter", "Cache hits.",
+         [({"cache": name}, stats.get("hits", 0)) for name, stats in caches.items()]),
+        ("cache_misses_total", "counter", "Cache misses.",
+         [({"cache": name}, stats.get("misses", 0)) for name, stats in caches.items()]),
+        ("cache_hit_ratio", "gauge", "Cache hits / lookups since startup.",
+         [({"cache": name}, stats.get("hit_rate", 0.0)) for name, stats in caches.items()]),
+        ("requests_coalesced_total", "counter", "Requests served by another request's in-flight computation.",
+         [({"flight": f["name"]}, f["coalesced"]) for f in flights]),
+    ]
+
+
+register_collector(_cache_metrics)
+register_collector(admission.collect)
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics: stage latencies, in-flight requests, sizes, caches, upstream errors."""
+    return PlainTextResponse(render(), media_type="text/plain; version=0.0.4")
+
+
+def _require_admin(request: Request) -> None:
+    """403 unless the request carries ADMIN_TOKEN as a bearer token (404 when no token is configured)."""
+    import hmac
+
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    supplied = request.headers.get("authorization", "").removeprefix("Bearer ").strip()
+    if not hmac.compare_digest(supplied.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+@app.post("/admin/reload")
+async def admin_reload(request: Request, force: bool = False):
+    """
+    Load the vector store version ingest last published (vector_store/CURRENT) and swap it in
+    without a restart; force=true reloads even when the version is unchanged. Requests in
+    flight finish on the old version. Returns once the new version is live (or failed to load).
+    """
+    import asyncio
+
+    _require_admin(request)
+    # Not on the chat worker pool: a reload takes seconds and must not hold up questions
+    return await asyncio.to_thread(vector_store_state.reload_if_changed, force)
+
+
 @app.get("/chat", response_model=Response)
 async def chat_get(q: str = ""):
     """Chat via GET ?q= for Cloud Run (avoids 405 on POST)."""
@@ -111,100 +237,582 @@ async def chat_get(q: str = ""):
     return await chat(Query(question=q.strip()))
 
 
-@app.post("/chat", response_model=Response)
-async def chat(query: Query):
+def _log_chat(question: str, result: Response) -> None:
+    """Queue a row for the Google Sheet review log (best-effort; never fail or delay the request)."""
+    env = "prod" if os.environ.get("K_SERVICE") else "dev"
+    try:
+        from backend.chat_log import append_chat_log
+        append_chat_log(env, question, result.answer, result.sources)
+    except Exception:
+        pass
+
+
+def _embed_question(question: str):
     """
-    Process a chat query and return an AI-generated response.
+    Embed the question as a float32 vector (query embedding cache first), or None when
+    there is no store. While the embedding model is still loading, returns None right
+    away if the lexical index can answer instead of waiting.
     """
-    if not query.question.strip():
-        raise HTTPException(status_code=400, detail="Question cannot be empty")
+    store = get_vector_store(wait=vector_store_state.get_lexical() is None)
+    if not store:
+        return None
+    return store.embeddings.embed_query_array(question)
+
+
+def _search(question: str, query_embedding, state: tuple | None = None) -> tuple[str, list[str]]:
+    """
+    Hybrid dense + BM25 retrieval (lexical only while warming up), routed to org/doc_type
+    shards when the question names one. state is a search_state() snapshot (taken here if
+    not given). Returns (context, sources).
+    """
+    from backend.retrieval import retrieve
 
+    retriever, lexical, router, _ = state or vector_store_state.search_state()
+    if query_embedding is None:
+        retriever = None
+    docs = retrieve(question, query_embedding, retriever, lexical, router)
+    return _context_and_sources(docs)
+
+
+def _embed_questions(questions: list[str]):
+    """Embed a batch of questions as a [B, dim] float32 matrix in one model call, or None when there is no store."""
+    store = get_vector_store()
+    if not store:
+        return None
+    return store.embeddings.embed_queries_array(questions)
+
+
+def _search_batch(questions: list[str], query_embeddings, state: tuple | None = None) -> list[tuple[str, list[str]]]:
+    """_search for a batch of questions with a single FAISS search. Returns (context, sources) per question."""
+    from backend.retrieval import retrieve_batch
+
+    retriever, lexical, router, _ = state or vector_store_state.search_state()
+    if query_embeddings is None:
+        retriever = None
+    results = retrieve_batch(questions, query_embeddings, retriever, lexical, router)
+    return [_context_and_sources(docs) for docs in results]
+
+
+def _context_and_sources(docs: list) -> tuple[str, list[str]]:
+    """Pack retrieved chunks into the prompt context (merged, de-duplicated, within the token budget)."""
+    from backend.context import pack_context
+
+    context, used, stats = pack_context(docs)
+    if docs:
+        CONTEXT_TOKENS.observe(stats["tokens_before"], packing="raw")
+        CONTEXT_TOKENS.observe(stats["tokens_after"], packing="packed")
+    sources = [doc.metadata.get("title") or doc.metadata.get("source", "Unknown") for doc in used]
+    return context, list(set(sources))
+
+
+def _get_genai_client():
+    """Return the shared, pooled Gemini client (see backend.gemini)."""
+    from backend.gemini import get_client
     try:
-        context = ""
-        sources = []
-        
-        # Retrieve relevant context if vector store is available (MMR for diverse results)
-        store = get_vector_store()
-        if store:
-            docs = store.max_marginal_relevance_search(query.question, k=5, fetch_k=20)
-            context = "\n\n".join([doc.page_content for doc in docs])
-            sources = [doc.metadata.get("title") or doc.metadata.get("source", "Unknown") for doc in docs]
-        
-        # Generate response using Gemini
-        from google import genai
-        api_key = os.environ.get("GOOGLE_API_KEY") or os.environ.get("GEMINI_API_KEY")
-        if not api_key:
-            raise HTTPException(status_code=500, detail="GOOGLE_API_KEY or GEMINI_API_KEY must be set")
-        client = genai.Client(api_key=api_key)
-
-        prompt = f"""I am a soccer referee in Oregon.  I am not an assignor or an administrator.  
+        return get_client()
+    except RuntimeError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+def _build_prompt(question: str, context: str) -> str:
+    """Build the Gemini prompt from the question and retrieved context."""
+    return f"""I am a soccer referee in Oregon.  I am not an assignor or an administrator.  
 You are a helpful assistant for Oregon soccer referees. 
 Answer questions about soccer rules, referee procedures, Reftown, and Oregon-specific regulations.
 
 Context from knowledge base:
 {context if context else "No specific context available."}
 
-Question: {query.question}
+Question: {question}
 
 Provide a clear, accurate, and helpful response. If you're unsure about something, 
 say so rather than making up information."""
 
-        response = client.models.generate_content(
-            model="gemini-3-flash-preview",
-            contents=prompt
-        )
-        
-        result = Response(
-            answer=response.text,
-            sources=list(set(sources))
-        )
-        # Log to Google Sheet for review (best-effort; never fail the request)
-        env = "prod" if os.environ.get("K_SERVICE") else "dev"
+
+async def _answer(question: str) -> Response:
+    """
+    Embed, check the semantic answer cache, retrieve, and ask Gemini. Runs once per
+    distinct in-flight question (see _chat_flight). Retrieval and Gemini run under
+    admission control; raises Overloaded when no slot is available.
+    """
+    from backend.answer_cache import answer_cache
+    from backend.gemini import GEMINI_MODEL
+    from backend.workers import run_blocking
+
+    # Embedding and FAISS run on the worker pool; the query embedding doubles
+    # as the answer cache key, so embed it once.
+    with stage("embed"):
+        query_embedding = await run_blocking(_embed_question, question)
+    # One snapshot for the cache lookup, retrieval and the cache write: an answer is stored
+    # under the version its context came from, even if a hot reload lands mid-request
+    state = await run_blocking(vector_store_state.search_state)
+    version = state[3]
+    if query_embedding is not None:
+        cached = answer_cache.get(query_embedding, version=version)
+        if cached is not None:
+            return cached
+    async with admission.slot():
+        with stage("search"):
+            context, sources = await run_blocking(_search, question, query_embedding, state)
+
+        # Generate response using Gemini (native async client, no thread needed)
+        client = _get_genai_client()
+        prompt = _build_prompt(question, context)
+        PROMPT_CHARS.observe(len(prompt))
         try:
-            from backend.chat_log import append_chat_log
-            append_chat_log(env, query.question, result.answer, result.sources)
+            with stage("gemini"):
+                response = await client.aio.models.generate_content(model=GEMINI_MODEL, contents=prompt)
         except Exception:
-            pass
+            upstream_error("gemini")
+            raise
+    ANSWER_CHARS.observe(len(response.text or ""))
+
+    result = Response(answer=response.text, sources=sources)
+    if query_embedding is not None:
+        answer_cache.put(query_embedding, result, version=version)
+    return result
+
+
+@app.post("/chat", response_model=Response)
+async def chat(query: Query):
+    """
+    Process a chat query and return an AI-generated response.
+    Near-identical questions are answered from the semantic answer cache, and identical
+    questions asked while one is already being answered share that answer.
+    """
+    if not query.question.strip():
+        raise HTTPException(status_code=400, detail="Question cannot be empty")
+
+    from backend.embedding_cache import normalize_query
+
+    try:
+        result = await _chat_flight.do(normalize_query(query.question), lambda: _answer(query.question))
+        with stage("log"):
+            _log_chat(query.question, result)
         return result
-        
+    except Overloaded:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _answer_events(question: str):
+    """
+    Yield (event, data) pairs for a streamed answer: sources, tokens, done. Runs once per
+    distinct in-flight question and is shared by every stream asking it (see _stream_flight).
+    Retrieval and the Gemini stream hold an admission slot for as long as they run, even
+    after every client has gone; raises Overloaded when no slot is available.
+    """
+    from backend.answer_cache import answer_cache
+    from backend.gemini import GEMINI_MODEL
+    from backend.workers import run_blocking
+
+    with stage("embed"):
+        query_embedding = await run_blocking(_embed_question, question)
+    state = await run_blocking(vector_store_state.search_state)
+    version = state[3]
+    if query_embedding is not None:
+        cached = answer_cache.get(query_embedding, version=version)
+        if cached is not None:
+            yield "sources", {"sources": cached.sources}
+            yield "token", {"text": cached.answer}
+            yield "done", {}
+            return
+    async with admission.slot():
+        with stage("search"):
+            context, sources = await run_blocking(_search, question, query_embedding, state)
+        yield "sources", {"sources": sources}
+
+        client = _get_genai_client()
+        prompt = _build_prompt(question, context)
+        PROMPT_CHARS.observe(len(prompt))
+        parts = []
+        started = time.perf_counter()
+        try:
+            async for chunk in await client.aio.models.generate_content_stream(model=GEMINI_MODEL, contents=prompt):
+                if chunk.text:
+                    if not parts:
+                        record_stage("gemini_first_token", time.perf_counter() - started)
+                    parts.append(chunk.text)
+                    yield "token", {"text": chunk.text}
+        except Exception:
+            upstream_error("gemini")
+            raise
+        record_stage("gemini", time.perf_counter() - started)
+    answer = "".join(parts)
+    ANSWER_CHARS.observe(len(answer))
+    if query_embedding is not None:
+        result = Response(answer=answer, sources=sources)
+        answer_cache.put(query_embedding, result, version=version)
+    yield "done", {}
+
+
+@app.get("/chat/stream")
+async def chat_stream(q: str = ""):
+    """
+    Stream a chat answer as Server-Sent Events: one `sources` event, then `token`
+    events with answer text as Gemini produces it, then `done` (or `error`).
+    Concurrent streams for the same question share one Gemini stream; a stream that
+    joins late first receives everything produced so far.
+    The shared Gemini stream holds one admission slot while it runs; the response starts
+    once the first event (the sources) is ready, so a rejection is still a 503 with Retry-After.
+    The full answer is logged once the stream completes.
+    """
+    question = (q or "").strip()
+    if not question:
+        raise HTTPException(status_code=400, detail="Query parameter 'q' cannot be empty")
+
+    from backend.embedding_cache import normalize_query
+
+    shared = _stream_flight.stream(normalize_query(question), lambda: _answer_events(question))
+    first, error = None, None
+    try:
+        first = await anext(shared, None)
+    except Overloaded:
+        await shared.aclose()
+        raise
+    except Exception as e:
+        error = e
+
+    async def upstream():
+        if first is not None:
+            yield first
+            async for item in shared:
+                yield item
+
+    async def events():
+        sources, parts = [], []
+        try:
+            if error is not None:
+                raise error
+            async for event, data in upstream():
+                if event == "sources":
+                    sources = data["sources"]
+                elif event == "token":
+                    parts.append(data["text"])
+                yield _sse(event, data)
+            with stage("log"):
+                _log_chat(question, Response(answer="".join(parts), sources=sources))
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            yield _sse("error", {"detail": detail})
+        finally:
+            await shared.aclose()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # X-Accel-Buffering tells nginx not to buffer this response
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/chat/batch")
+async def chat_batch(body: BatchQuery):
+    """
+    Answer many questions in one request (bulk answer checks after a re-ingest, FAQ
+    regeneration). Questions are embedded in one FastEmbed batch and retrieved together,
+    then answered by Gemini with at most CHAT_BATCH_CONCURRENCY calls in flight, each
+    under admission control (a rejected question gets an error line).
+
+    Streams NDJSON, one line per question in completion order:
+    {"index", "question", "answer", "sources", "cached"}, or {"index", "question", "error"}
+    for a question that failed. Batch answers are not written to the chat review log.
+    """
+    if not body.questions:
+        raise HTTPException(status_code=400, detail="questions cannot be empty")
+    if len(body.questions) > CHAT_BATCH_MAX_QUESTIONS:
+        raise HTTPException(status_code=400, detail=f"At most {CHAT_BATCH_MAX_QUESTIONS} questions per batch")
+
+    import asyncio
+    from backend.answer_cache import answer_cache
+    from backend.gemini import GEMINI_MODEL
+    from backend.workers import run_blocking
+
+    questions = [q.strip() for q in body.questions]
+
+    def line(index: int, **fields) -> str:
+        return json.dumps({"index": index, "question": questions[index], **fields}) + "\n"
+
+    async def answer(index: int, client, semaphore, context: str, sources: list[str], query_embedding,
+                     version) -> str:
+        async with semaphore:
+            prompt = _build_prompt(questions[index], context)
+            PROMPT_CHARS.observe(len(prompt))
+            try:
+                async with admission.slot():
+                    with stage("gemini"):
+                        response = await client.aio.models.generate_content(model=GEMINI_MODEL, contents=prompt)
+            except Overloaded as e:
+                return line(index, error=str(e))
+            except Exception as e:
+                upstream_error("gemini")
+                return line(index, error=str(e))
+        ANSWER_CHARS.observe(len(response.text or ""))
+        result = Response(answer=response.text, sources=sources)
+        if query_embedding is not None:
+            answer_cache.put(query_embedding, result, version=version)
+        return line(index, answer=result.answer, sources=result.sources, cached=False)
+
+    async def results():
+        pending = []
+        for i, question in enumerate(questions):
+            if question:
+                pending.append(i)
+            else:
+                yield line(i, error="Question cannot be empty")
+        if not pending:
+            return
+
+        answered = set()
+        try:
+            with stage("embed"):
+                embeddings = await run_blocking(_embed_questions, [questions[i] for i in pending])
+            state = await run_blocking(vector_store_state.search_state)
+            version = state[3]
+            to_search = []  # (question index, row in embeddings)
+            for row, i in enumerate(pending):
+                cached = None
+                if embeddings is not None:
+                    cached = answer_cache.get(embeddings[row], version=version)
+                if cached is not None:
+                    answered.add(i)
+                    yield line(i, answer=cached.answer, sources=cached.sources, cached=True)
+                else:
+                    to_search.append((i, row))
+            if not to_search:
+                return
+            rows = [row for _, row in to_search]
+            with stage("search"):
+                searched = await run_blocking(_search_batch, [questions[i] for i, _ in to_search],
+                                              embeddings[rows] if embeddings is not None else None, state)
+            client = _get_genai_client()
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else str(e)
+            for i in pending:
+                if i not in answered:
+                    yield line(i, error=detail)
+            return
+
+        semaphore = asyncio.Semaphore(max(1, CHAT_BATCH_CONCURRENCY))
+        tasks = [
+            asyncio.create_task(answer(i, client, semaphore, context, sources,
+                                       embeddings[row] if embeddings is not None else None, version))
+            for (i, row), (context, sources) in zip(to_search, searched)
+        ]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(results(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
 @app.get("/license-status")
 async def license_status(email: str = ""):
     """
     Look up the active USSF licenses for a referee by email address.
     Returns licenses grouped by discipline, ordered by rank within each group.
+    Known referees are served from the local license snapshot when it is fresh (source,
+    as_of), others live; both USSF lookups are cached, and the Cache-Status header
+    (RFC 9211) says which were hits.
     """
     if not email.strip():
         raise HTTPException(status_code=400, detail="Query parameter 'email' is required")
 
-    from backend.license_service import lookup_ussf_id, fetch_active_licenses, enrich_and_group_licenses
+    from backend.license_service import enrich_and_group_licenses, freshness, get_referee_licenses
 
     try:
-        ussf_id, full_name = await lookup_ussf_id(email.strip())
+        found = await get_referee_licenses(email.strip())
     except RuntimeError as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-    if ussf_id is None:
+    if found["ussf_id"] is None:
         raise HTTPException(
             status_code=404,
             detail="No USSF ID found associated with that e-mail address",
+            headers={"Cache-Status": found["cache_status"]},
         )
 
+    with stage("enrich"):
+        grouped_licenses = enrich_and_group_licenses(found["licenses"])
+
+    return JSONResponse(
+        content={
+            "ussf_id": found["ussf_id"],
+            "full_name": found["full_name"],
+            "licenses": grouped_licenses,
+            **freshness(found),
+        },
+        headers={"Cache-Status": found["cache_status"]},
+    )
+
+
+ROSTER_CSV_COLUMNS = ["email", "result", "ussf_id", "full_name", "discipline", "license", "rank", "status",
+                      "issue_date", "expiration_date", "issuer", "error", "count"]
+
+
+def _parse_roster(body: bytes, content_type: str) -> list[str]:
+    """
+    Emails from a JSON body ({"emails": [...]}) or a CSV upload (the "email" column,
+    or every cell containing "@" when there is no such header). De-duplicated
+    case-insensitively, in roster order.
+    """
+    import csv
+    import io
+
+    if "csv" in content_type or "text/plain" in content_type:
+        try:
+            text = body.decode("utf-8-sig")
+        except UnicodeDecodeError:
+            raise HTTPException(status_code=400, detail="The CSV roster must be UTF-8 text") from None
+        rows = list(csv.reader(io.StringIO(text)))
+        header = [cell.strip().lower() for cell in rows[0]] if rows else []
+        if "email" in header:
+            column = header.index("email")
+            emails = [row[column] for row in rows[1:] if len(row) > column]
+        else:
+            emails = [cell for row in rows for cell in row if "@" in cell]
+    else:
+        try:
+            emails = json.loads(body or b"{}").get("emails")
+        except (ValueError, AttributeError):
+            emails = None
+        if not isinstance(emails, list) or not all(isinstance(e, str) for e in emails):
+            raise HTTPException(status_code=400, detail='Send {"emails": [...]} as JSON or a CSV with an email column')
+    seen, roster = set(), []
+    for email in (e.strip() for e in emails):
+        if email and email.casefold() not in seen:
+            seen.add(email.casefold())
+            roster.append(email)
+    return roster
+
+
+async def _read_roster_body(request: Request) -> bytes:
+    """The request body, or a 413 once it exceeds LICENSE_BULK_MAX_BYTES (checked before reading when declared)."""
+    too_large = HTTPException(status_code=413, detail=f"Roster uploads are limited to {LICENSE_BULK_MAX_BYTES} bytes")
+    declared = request.headers.get("content-length", "")
+    if declared.isdigit() and int(declared) > LICENSE_BULK_MAX_BYTES:
+        raise too_large
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > LICENSE_BULK_MAX_BYTES:
+            raise too_large
+    return bytes(body)
+
+
+async def _roster_upload(request: Request, body: bytes) -> tuple[bytes, str]:
+    """
+    (content, content type) of the roster file in a multipart/form-data body: the "roster"
+    field (curl -F roster=@roster.csv), else the first uploaded file. Parsed as CSV unless
+    the file is JSON.
+    """
+    from starlette.datastructures import UploadFile
+    from starlette.formparsers import MultiPartException, MultiPartParser
+
+    async def stream():
+        yield body
+
     try:
-        raw_licenses = await fetch_active_licenses(ussf_id)
-    except RuntimeError as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        form = await MultiPartParser(request.headers, stream(), max_files=1, max_fields=10).parse()
+    except MultiPartException as e:
+        raise HTTPException(status_code=400, detail=f"Malformed multipart upload: {e.message}")
+    upload = form.get("roster")
+    if not isinstance(upload, UploadFile):
+        upload = next((value for value in form.values() if isinstance(value, UploadFile)), None)
+    if upload is None:
+        raise HTTPException(status_code=400, detail="Upload the roster as a file field named roster")
+    try:
+        content = await upload.read()
+    finally:
+        await upload.close()
+    is_json = "json" in (upload.content_type or "") or (upload.filename or "").lower().endswith(".json")
+    return content, "application/json" if is_json else "text/csv"
 
-    grouped_licenses = enrich_and_group_licenses(raw_licenses)
-    
-    return {
-        "ussf_id": ussf_id,
-        "full_name": full_name,
-        "licenses": grouped_licenses
-    }
+
+def _roster_csv_rows(record: dict) -> list[list]:
+    """One CSV row per license (or one row for a referee with none / a failed lookup)."""
+    base = [record["email"], record["result"], record.get("ussf_id", ""), record.get("full_name", "")]
+    licenses = [lic for group in record.get("licenses", {}).values() for lic in group]
+    if not licenses:
+        return [base + [""] * 7 + [record.get("error", ""), ""]]
+    return [base + [lic["discipline"], lic["name"], lic["rank"], lic["status"], lic["issue_date"],
+                    lic["expiration_date"], lic["issuer"], "", ""] for lic in licenses]
+
+
+@app.post("/license-status/bulk")
+async def license_status_bulk(request: Request, format: str = ""):
+    """
+    License status for a whole roster (assignors). Body: {"emails": [...]} as JSON, a CSV
+    (Content-Type: text/csv) with an email column, or that CSV as a multipart file upload;
+    at most LICENSE_BULK_MAX_BYTES. Lookups run with at most LICENSE_BULK_CONCURRENCY in
+    flight and share the /license-status caches.
+
+    Streams results in completion order, then a roster summary: NDJSON by default, one
+    {"index", "email", "result", "ussf_id", "full_name", "licenses"} line per referee (or
+    "error") and a final {"summary": ...} line; CSV (?format=csv or Accept: text/csv) has
+    one row per license and "summary" rows with counts per status at the end.
+    """
+    import asyncio
+    import csv
+    import io
+    from backend.license_service import resolve_referee, summarize_roster
+
+    body = await _read_roster_body(request)
+    content_type = request.headers.get("content-type", "")
+    if content_type.startswith("multipart/form-data"):
+        body, content_type = await _roster_upload(request, body)
+    roster = _parse_roster(body, content_type)
+    if not roster:
+        raise HTTPException(status_code=400, detail="No email addresses in the roster")
+    if len(roster) > LICENSE_BULK_MAX_EMAILS:
+        raise HTTPException(status_code=400, detail=f"At most {LICENSE_BULK_MAX_EMAILS} emails per roster")
+    as_csv = format.lower() == "csv" or (not format and "text/csv" in request.headers.get("accept", ""))
+
+    def csv_text(rows: list[list]) -> str:
+        out = io.StringIO()
+        csv.writer(out).writerows(rows)
+        return out.getvalue()
+
+    async def resolve(index: int, semaphore) -> dict:
+        async with semaphore:
+            return {"index": index, **await resolve_referee(roster[index])}
+
+    async def results():
+        semaphore = asyncio.Semaphore(max(1, LICENSE_BULK_CONCURRENCY))
+        tasks = [asyncio.create_task(resolve(i, semaphore)) for i in range(len(roster))]
+        records = []
+        if as_csv:
+            yield csv_text([ROSTER_CSV_COLUMNS])
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                record = await next_done
+                records.append(record)
+                yield csv_text(_roster_csv_rows(record)) if as_csv else json.dumps(record) + "\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+        summary = summarize_roster(records)
+        if as_csv:
+            rows = [["summary", f"referees_{result}", *[""] * 10, count] for result, count in summary["results"].items()]
+            rows += [["summary", "licenses", *[""] * 5, status, *[""] * 4, count]
+                     for status, count in summary["licenses"].items()]
+            yield csv_text(rows)
+        else:
+            yield json.dumps({"summary": summary}) + "\n"
+
+    media_type = "text/csv" if as_csv else "application/x-ndjson"
+    return StreamingResponse(results(), media_type=media_type,
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @app.post("/feedback")
@@ -231,7 +839,7 @@ if STATIC_DIR.exists():
     async def serve_frontend(request: Request, full_path: str):
         """Serve the frontend for all non-API routes."""
         # Don't serve frontend for API routes
-        if full_path.startswith("api/") or full_path in ["health", "chat", "license-status", "feedback", "docs", "openapi.json", "redoc"]:
+        if full_path.startswith("api/") or full_path in ["health", "livez", "readyz", "cache-stats", "metrics", "chat", "license-status", "feedback", "docs", "openapi.json", "redoc"]:
             raise HTTPException(status_code=404, detail="Not found")
         
         # Serve index.html for SPA routing
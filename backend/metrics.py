@@ -0,0 +1,232 @@
+"""
+Lightweight request metrics: per-stage timers, Server-Timing headers, Prometheus text.
+
+MetricsMiddleware tracks in-flight requests and request durations per route and
+gives each request a Timings collector. Code on the request path wraps its
+stages (embed, search, gemini, USSF calls, ...) in stage(name). Each stage is
+recorded in a histogram and listed in the response's Server-Timing header when
+it finishes before the headers are sent. render() returns every metric in the
+Prometheus text exposition format for GET /metrics. There is no
+prometheus_client dependency: observations are a lock plus a bisect, cheap
+enough to leave on in production.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+
+PREFIX = "osro_"
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+SIZE_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000)
+
+_registry: list = []
+_collectors: list = []
+
+
+def _format_labels(names: tuple, values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labelnames: tuple = ()):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = labelnames
+        self._values: dict[tuple, float] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Gauge(Counter):
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def render(self) -> list[str]:
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} gauge"
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labelnames: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = PREFIX + name
+        self.help = help
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self._series: dict[tuple, list] = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels) -> None:
+        key = tuple(str(labels.get(n, "")) for n in self.labelnames)
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = sorted((key, list(series)) for key, series in self._series.items())
+        for key, series in snapshot:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{_format_value(float(bound))}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{le} {series[-1]}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(float(series[-2]))}")
+            lines.append(f"{self.name}_count{labels} {series[-1]}")
+        return lines
+
+
+# Metrics shared by the API and the services it calls
+REQUESTS_IN_FLIGHT = Gauge("http_requests_in_flight", "Requests currently being handled (including open streams).")
+REQUEST_SECONDS = Histogram("http_request_duration_seconds", "Time to response headers, by route and status.",
+                            ("route", "method", "status"))
+STAGE_SECONDS = Histogram("stage_duration_seconds", "Time spent in each request stage.", ("route", "stage"))
+UPSTREAM_ERRORS = Counter("upstream_errors_total", "Failed calls to upstream services.", ("upstream",))
+LOG_ROWS_DROPPED = Counter("chat_log_rows_dropped_total", "Chat log and feedback rows dropped, by reason.",
+                           ("reason",))
+PROMPT_CHARS = Histogram("chat_prompt_chars", "Characters in the Gemini prompt.", buckets=SIZE_BUCKETS)
+ANSWER_CHARS = Histogram("chat_answer_chars", "Characters in the generated answer.", buckets=SIZE_BUCKETS)
+CONTEXT_TOKENS = Histogram("chat_context_tokens", "Estimated context tokens before (raw) and after (packed) packing.",
+                           ("packing",), buckets=SIZE_BUCKETS)
+
+
+class Timings:
+    """Stage durations for one request, in the order they finished."""
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.stages: dict[str, float] = {}
+
+    @property
+    def route(self) -> str:
+        return _route(self.scope)
+
+    def add(self, stage: str, seconds: float) -> None:
+        self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    def server_timing(self) -> str:
+        """Server-Timing header value, e.g. "embed;dur=3.1, gemini;dur=812.4, total;dur=820.0"."""
+        items = list(self.stages.items()) + [("total", time.perf_counter() - self.started)]
+        return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in items)
+
+
+_current: contextvars.ContextVar[Timings | None] = contextvars.ContextVar("request_timings", default=None)
+
+
+def _route(scope: dict) -> str:
+    """Route template ("/chat") rather than the raw path, so labels stay low-cardinality."""
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def record_stage(stage_name: str, seconds: float) -> None:
+    timings = _current.get()
+    STAGE_SECONDS.observe(seconds, route=timings.route if timings else "background", stage=stage_name)
+    if timings is not None:
+        timings.add(stage_name, seconds)
+
+
+@contextmanager
+def stage(stage_name: str):
+    """Time the enclosed block as one stage of the current request."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage_name, time.perf_counter() - started)
+
+
+def upstream_error(upstream: str) -> None:
+    UPSTREAM_ERRORS.inc(upstream=upstream)
+
+
+def register_collector(fn) -> None:
+    """
+    Add a function called at scrape time that returns (name, type, help, samples),
+    samples being (labels dict, value) pairs. For values that already live elsewhere,
+    such as cache hit counters.
+    """
+    _collectors.append(fn)
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    for collect in _collectors:
+        for name, kind, help, samples in collect():
+            lines.append(f"# HELP {PREFIX}{name} {help}")
+            lines.append(f"# TYPE {PREFIX}{name} {kind}")
+            for labels, value in samples:
+                label_text = _format_labels(tuple(labels), tuple(labels.values()))
+                lines.append(f"{PREFIX}{name}{label_text} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: in-flight gauge, request duration, and the Server-Timing header."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = Timings(scope)
+        token = _current.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", timings.server_timing().encode()))
+                message = {**message, "headers": headers}
+                REQUEST_SECONDS.observe(time.perf_counter() - timings.started, route=timings.route,
+                                        method=scope["method"], status=message["status"])
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            _current.reset(token)
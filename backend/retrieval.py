@@ -0,0 +1,214 @@
+"""
+Vectorized max-marginal-relevance retrieval directly on the FAISS index.
+
+LangChain's FAISS.max_marginal_relevance_search reconstructs every candidate
+vector from the index and runs a Python-loop MMR on each call. MMRRetriever
+instead keeps one contiguous, unit-normalized float32 matrix of all chunk
+embeddings (built once at load) and computes MMR with NumPy, for a single
+query or a batch of queries. Results match LangChain's implementation.
+For compressed indexes (IVF-PQ, SQ8) that matrix would cost more memory than
+the index itself, so only the fetch_k candidates are decoded per search.
+"""
+
+import os
+
+import numpy as np
+
+from backend.chunk_store import fetch_documents
+from backend.lexical import fuse_rankings
+
+# Chunks returned per question, and dense/lexical candidates considered for MMR
+RETRIEVAL_K = 5
+RETRIEVAL_FETCH_K = 20
+# Weight of BM25 ranks relative to dense ranks in hybrid fusion (0 = dense only)
+LEXICAL_WEIGHT = float(os.environ.get("LEXICAL_WEIGHT", "1.0"))
+
+
+class MMRRetriever:
+    """
+    MMR search over a FAISS index whose row i is the embedding of docs[i]
+    (a ChunkStore read on demand, or an in-memory list). With cache_vectors=False
+    no vector matrix is kept and candidates are decoded from the index per search.
+    """
+
+    def __init__(self, index, docs: list, matrix: np.ndarray | None = None, cache_vectors: bool = True):
+        from backend.ann import enable_reconstruct, reconstruct_all
+
+        self.index = index
+        self.docs = docs
+        self.unit: np.ndarray | None = None
+        if matrix is None and not cache_vectors:
+            enable_reconstruct(index)
+            return
+        if matrix is None:
+            matrix = reconstruct_all(index)
+        self.unit = _unit_rows(matrix)
+
+    @classmethod
+    def from_langchain(cls, store) -> "MMRRetriever":
+        """Build from a LangChain FAISS store (index plus docstore)."""
+        ntotal = store.index.ntotal
+        docs = [store.docstore.search(store.index_to_docstore_id[i]) for i in range(ntotal)]
+        return cls(store.index, docs)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def search(self, query: np.ndarray, k: int = 5, fetch_k: int = 20, lambda_mult: float = 0.5) -> list[int]:
+        """Return the row ids of the k MMR-selected chunks for one query embedding."""
+        return self.search_batch(np.asarray(query, dtype=np.float32).reshape(1, -1), k, fetch_k, lambda_mult)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 5, fetch_k: int = 20,
+                     lambda_mult: float = 0.5) -> list[list[int]]:
+        """
+        MMR for a batch of query embeddings (shape [B, dim]) with one FAISS search call.
+        Returns one list of row ids per query, in selection order.
+        """
+        queries = np.ascontiguousarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        if len(self.docs) == 0 or k <= 0:
+            return [[] for _ in range(len(queries))]
+        _, cand = self.index.search(queries, fetch_k)
+        return self._mmr(cand, queries, k, lambda_mult)
+
+    def candidates(self, query: np.ndarray, fetch_k: int = 20) -> list[int]:
+        """Row ids of the fetch_k nearest chunks, nearest first."""
+        return self.candidates_batch(np.asarray(query, dtype=np.float32).reshape(1, -1), fetch_k)[0]
+
+    def candidates_batch(self, queries: np.ndarray, fetch_k: int = 20) -> list[list[int]]:
+        """candidates() for a batch of query embeddings [B, dim] with one FAISS search call."""
+        _, cand = self.index.search(np.ascontiguousarray(queries, dtype=np.float32), fetch_k)
+        return [[int(i) for i in row if i >= 0] for row in cand]
+
+    def search_in(self, query: np.ndarray, candidate_ids: np.ndarray, k: int = 5,
+                  lambda_mult: float = 0.5) -> list[int]:
+        """MMR restricted to the given candidate row ids (e.g. from a lexical or sharded search)."""
+        cand = np.asarray(candidate_ids, dtype=np.int64).reshape(1, -1)
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        return self._mmr(cand, query, k, lambda_mult)[0]
+
+    def documents(self, ids: list[int]) -> list:
+        return fetch_documents(self.docs, ids)
+
+    def _mmr(self, cand: np.ndarray, queries: np.ndarray, k: int, lambda_mult: float) -> list[list[int]]:
+        if self.unit is not None:
+            return mmr_select(self.unit, cand, queries, k, lambda_mult)
+        # Decode just the candidates into a small matrix and run MMR on local row numbers
+        valid = cand >= 0
+        ids, local = np.unique(cand[valid], return_inverse=True)
+        if ids.size == 0:
+            return [[] for _ in range(len(cand))]
+        local_cand = np.full(cand.shape, -1, dtype=np.int64)
+        local_cand[valid] = local
+        unit = _unit_rows(self.index.reconstruct_batch(ids))
+        return [[int(ids[i]) for i in row] for row in mmr_select(unit, local_cand, queries, k, lambda_mult)]
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    """Rows scaled to unit length: cosine similarity becomes a plain dot product."""
+    matrix = np.ascontiguousarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return np.ascontiguousarray(matrix / norms)
+
+
+def mmr_select(unit: np.ndarray, cand: np.ndarray, queries: np.ndarray, k: int,
+               lambda_mult: float = 0.5) -> list[list[int]]:
+    """
+    Vectorized MMR over candidate row ids cand [B, F] (-1 = no candidate).
+
+    Same selection as langchain_core's maximal_marginal_relevance: the first pick is
+    the candidate most similar to the query; each next pick maximizes
+    lambda * sim(query) - (1 - lambda) * max sim(already selected), ties to the
+    earliest candidate.
+    """
+    batch, fetch = cand.shape
+    valid = cand >= 0
+    vecs = unit[np.where(valid, cand, 0)]  # [B, F, D]
+    qnorm = np.linalg.norm(queries, axis=1, keepdims=True)
+    qnorm[qnorm == 0] = 1.0
+    sim_q = np.einsum("bfd,bd->bf", vecs, queries / qnorm)  # [B, F]
+    sim_c = vecs @ vecs.transpose(0, 2, 1)  # [B, F, F]
+
+    rows = np.arange(batch)
+    blocked = ~valid
+    redundancy = np.full((batch, fetch), -np.inf, dtype=np.float32)
+    selected = np.empty((batch, min(k, fetch)), dtype=np.int64)
+    first = np.where(blocked, -np.inf, sim_q).argmax(axis=1)
+    selected[:, 0] = first
+    blocked[rows, first] = True
+    for step in range(1, selected.shape[1]):
+        redundancy = np.maximum(redundancy, sim_c[rows, :, selected[:, step - 1]])
+        score = lambda_mult * sim_q - (1 - lambda_mult) * redundancy
+        score[blocked] = -np.inf
+        pick = score.argmax(axis=1)
+        selected[:, step] = pick
+        blocked[rows, pick] = True
+
+    counts = np.minimum(valid.sum(axis=1), selected.shape[1])
+    return [cand[b, selected[b, :counts[b]]].tolist() for b in range(batch)]
+
+
+def retrieve(question: str, query_embedding, retriever=None, lexical=None, router=None,
+             k: int = RETRIEVAL_K, fetch_k: int = RETRIEVAL_FETCH_K, dense: list[int] | None = None) -> list:
+    """
+    Retrieve chunk documents for a question.
+
+    - If the question names a known org or competition (router), candidates come only
+      from the matching shard sub-indexes.
+    - Dense and lexical available: fuse FAISS and BM25 rankings (weighted reciprocal
+      rank fusion), then MMR over the fused candidates.
+    - Dense only: MMR over the FAISS candidates.
+    - Lexical only (embedding model still warming up): top BM25 chunks.
+    lexical is a (BM25Index, docs) pair or None. dense optionally passes in the global
+    FAISS candidates already found for this query (see retrieve_batch).
+    """
+    if retriever is not None and query_embedding is not None:
+        candidates = retrieve_candidates(question, query_embedding, retriever, lexical, router, k, fetch_k, dense)
+        return retriever.documents(retriever.search_in(query_embedding, candidates, k=k))
+    if lexical is not None:
+        shards = router.route(question) if router is not None else []
+        allowed = router.members(shards) if shards else None
+        index, docs = lexical
+        return fetch_documents(docs, index.search(question, k, allowed=allowed))
+    return []
+
+
+def retrieve_candidates(question: str, query_embedding, retriever, lexical=None, router=None,
+                        k: int = RETRIEVAL_K, fetch_k: int = RETRIEVAL_FETCH_K,
+                        dense: list[int] | None = None) -> list[int]:
+    """Candidate row ids for MMR: shard routing, FAISS search and BM25 fusion (the dense path of retrieve)."""
+    shards = router.route(question) if router is not None else []
+    allowed = router.members(shards) if shards else None
+    if shards:
+        candidates = router.candidates(query_embedding, shards, fetch_k)
+    else:
+        if dense is None:
+            dense = retriever.candidates(query_embedding, fetch_k)
+        candidates = list(dense)
+    if lexical is not None and LEXICAL_WEIGHT > 0:
+        lexical_ids = lexical[0].search(question, fetch_k, allowed=allowed)
+        candidates = fuse_rankings([candidates, lexical_ids], [1.0, LEXICAL_WEIGHT])[:fetch_k]
+    if len(candidates) < k:
+        # Tiny shard: top up from the global index
+        if dense is None:
+            dense = retriever.candidates(query_embedding, fetch_k)
+        candidates += [i for i in dense if i not in candidates]
+    return candidates
+
+
+def retrieve_batch(questions: list[str], query_embeddings, retriever=None, lexical=None, router=None,
+                   k: int = RETRIEVAL_K, fetch_k: int = RETRIEVAL_FETCH_K) -> list[list]:
+    """
+    retrieve() for many questions: one FAISS search for the whole batch, then the same
+    per-question routing, fusion and MMR. query_embeddings is a [B, dim] matrix or None.
+    """
+    if retriever is None or query_embeddings is None:
+        return [retrieve(q, None, None, lexical, router, k, fetch_k) for q in questions]
+    queries = np.ascontiguousarray(query_embeddings, dtype=np.float32)
+    dense = retriever.candidates_batch(queries, fetch_k)
+    return [
+        retrieve(q, queries[i], retriever, lexical, router, k, fetch_k, dense=dense[i])
+        for i, q in enumerate(questions)
+    ]
@@ -0,0 +1,123 @@
+"""
+Metadata-sharded retrieval: one small FAISS sub-index per org and per doc_type.
+
+ingest.py writes vector_store/shards/ with one IndexIDMap2 per shard (ids are
+global FAISS row ids) and a manifest.json listing the shards and the names each
+org is known by. ShardRouter routes a question that names a known org or
+competition to the matching shard(s), so the search runs over a much smaller
+index and returns fewer irrelevant chunks.
+"""
+
+import json
+import re
+from pathlib import Path
+
+import numpy as np
+
+SHARDS_DIR = "shards"
+MANIFEST_FILE = "manifest.json"
+
+# Competitions and topics that map to shards even though no org folder is named after them
+TOPIC_ROUTES = {
+    "founders cup": ["org:OYSA"],
+    "presidents cup": ["org:OYSA"],
+    "state cup": ["org:OYSA"],
+    "valley academy": ["org:OYSA"],
+    "competitive youth soccer league": ["org:OYSA"],
+    "developmental league": ["org:OYSA"],
+    "soccer 5": ["doc_type:league_rules"],
+    "laws of the game": ["doc_type:laws"],
+    "ifab": ["doc_type:laws"],
+}
+_LAW_NUMBER_RE = re.compile(r"\blaw (\d{1,2})\b")
+
+
+def normalize_name(text: str) -> str:
+    """Lowercase words separated by single spaces ("Albion_SC" -> "albion sc")."""
+    return " ".join(re.findall(r"[a-z0-9]+", text.lower()))
+
+
+def shard_name(kind: str, value: str) -> str:
+    return f"{kind}:{value}"
+
+
+class ShardRouter:
+    """Routes questions to shards and searches the selected shard indexes."""
+
+    def __init__(self, indexes: dict, aliases: dict[str, list[str]]):
+        self.indexes = indexes  # shard name -> faiss IndexIDMap2
+        routes: dict[str, list[str]] = {}
+        for name, alias_list in aliases.items():
+            for alias in alias_list:
+                routes.setdefault(normalize_name(alias), []).append(name)
+        for phrase, names in TOPIC_ROUTES.items():
+            routes.setdefault(phrase, []).extend(names)
+        # Longest phrases first so "lake oswego soccer club" wins over shorter aliases
+        self._routes = sorted(
+            ((phrase, names) for phrase, names in routes.items() if phrase),
+            key=lambda item: -len(item[0]),
+        )
+        self._members: dict[str, np.ndarray] = {}
+
+    @classmethod
+    def load(cls, store_path: Path) -> "ShardRouter | None":
+        """Load shards written by ingest.py, or None if the store has none."""
+        import faiss
+
+        shard_dir = store_path / SHARDS_DIR
+        manifest_path = shard_dir / MANIFEST_FILE
+        if not manifest_path.exists():
+            return None
+        from backend.ann import configure_search
+
+        manifest = json.loads(manifest_path.read_text())
+        indexes = {
+            shard["name"]: faiss.read_index(str(shard_dir / shard["file"]))
+            for shard in manifest["shards"]
+        }
+        for index in indexes.values():
+            configure_search(index, manifest)  # IVF-PQ shards: same nprobe as the global index
+        return cls(indexes, manifest.get("aliases", {}))
+
+    def route(self, question: str) -> list[str]:
+        """Names of the shards a question is about (empty list = search the global index)."""
+        text = f" {normalize_name(question)} "
+        names: list[str] = []
+        for phrase, targets in self._routes:
+            if f" {phrase} " in text:
+                names.extend(t for t in targets if t in self.indexes and t not in names)
+        if _LAW_NUMBER_RE.search(text) and "doc_type:laws" in self.indexes and "doc_type:laws" not in names:
+            names.append("doc_type:laws")
+        return names
+
+    def candidates(self, query: np.ndarray, names: list[str], fetch_k: int = 20) -> list[int]:
+        """Global row ids of the fetch_k nearest chunks across the given shards, nearest first."""
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        hits: list[tuple[float, int]] = []
+        for name in names:
+            dist, ids = self.indexes[name].search(query, fetch_k)
+            hits.extend((float(d), int(i)) for d, i in zip(dist[0], ids[0]) if i >= 0)
+        hits.sort()
+        seen: set[int] = set()
+        result = []
+        for _, i in hits:
+            if i not in seen:
+                seen.add(i)
+                result.append(i)
+        return result[:fetch_k]
+
+    def members(self, names: list[str]) -> np.ndarray:
+        """Sorted global row ids belonging to any of the given shards."""
+        import faiss
+
+        arrays = []
+        for name in names:
+            ids = self._members.get(name)
+            if ids is None:
+                ids = faiss.vector_to_array(self.indexes[name].id_map).astype(np.int64)
+                self._members[name] = ids
+            arrays.append(ids)
+        return np.unique(np.concatenate(arrays)) if arrays else np.empty(0, dtype=np.int64)
+
+    def stats(self) -> dict:
+        return {name: int(index.ntotal) for name, index in self.indexes.items()}
@@ -0,0 +1,108 @@
+"""
+Request coalescing (single-flight) for async work.
+
+Concurrent callers with the same key share one in-flight computation instead
+of each running it: the first caller starts it as a task, later callers await
+the same result. The task is shielded, so a caller that disconnects does not
+cancel the work for the others. SingleFlight.stream() does the same for an
+async generator, replaying what was already produced to late joiners.
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Awaitable, Callable, Hashable
+
+_DONE = object()
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key; counts leaders and coalesced followers."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self._calls: dict[Hashable, asyncio.Task] = {}
+        self._streams: dict[Hashable, "_Broadcast"] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable]):
+        """Return fn()'s result, sharing one execution among concurrent callers with the same key."""
+        task = self._calls.get(key)
+        if task is None:
+            self.leaders += 1
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: _forget(self._calls, key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    async def stream(self, key: Hashable, fn: Callable[[], AsyncIterator]) -> AsyncIterator:
+        """Iterate fn()'s items, sharing one upstream generator among concurrent callers with the same key."""
+        broadcast = self._streams.get(key)
+        if broadcast is None:
+            self.leaders += 1
+            broadcast = _Broadcast(fn())
+            self._streams[key] = broadcast
+            broadcast.task.add_done_callback(lambda t: _forget(self._streams, key, t))
+        else:
+            self.coalesced += 1
+        async for item in broadcast.subscribe():
+            yield item
+
+    def in_flight(self, key: Hashable) -> bool:
+        """True if a call or stream for key is running (a new caller would join it)."""
+        return key in self._calls or key in self._streams
+
+    def stats(self) -> dict:
+        total = self.leaders + self.coalesced
+        return {
+            "in_flight": len(self._calls) + len(self._streams),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+            "coalesced_rate": round(self.coalesced / total, 4) if total else 0.0,
+        }
+
+
+def _forget(registry: dict, key: Hashable, task: asyncio.Task) -> None:
+    """Done callback: drop the finished entry so the next caller starts a fresh computation."""
+    entry = registry.get(key)
+    if entry is task or getattr(entry, "task", None) is task:
+        del registry[key]
+    if not task.cancelled():
+        task.exception()  # mark retrieved; the callers already received it
+
+
+class _Broadcast:
+    """Runs an async generator once and lets any number of subscribers read all of its items."""
+
+    def __init__(self, source: AsyncIterator):
+        self.items: list = []
+        self.error: BaseException | None = None
+        self._changed = asyncio.Condition()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    async def _pump(self, source: AsyncIterator) -> None:
+        try:
+            async for item in source:
+                async with self._changed:
+                    self.items.append(item)
+                    self._changed.notify_all()
+        except Exception as e:
+            self.error = e
+        async with self._changed:
+            self.items.append(_DONE)
+            self._changed.notify_all()
+
+    async def subscribe(self) -> AsyncIterator:
+        i = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.items) > i)
+                new = self.items[i:]
+            for item in new:
+                if item is _DONE:
+                    if self.error is not None:
+                        raise self.error
+                    return
+                yield item
+            i += len(new)
@@ -0,0 +1,458 @@
+"""
+Vector store loading and load-state tracking.
+
+The FAISS store and FastEmbed model are loaded lazily on first use, or in the
+background at startup when WARMUP_ON_STARTUP is set, so Cloud Run can route
+traffic only to warmed instances via /readyz. The BM25 lexical index needs no
+embedding model and loads separately, so it can serve retrieval while the
+dense store is still loading.
+
+When ingest publishes a new version (see backend.versions), reload_if_changed()
+loads it beside the live one (polled every RELOAD_POLL_SECONDS, or triggered via
+POST /admin/reload) and swaps the store, retriever, lexical index and shard
+router in together. Requests already running keep the objects they captured and
+finish on the old version, which is freed once they are done.
+"""
+
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+# langchain/FAISS imported lazily in load_vector_store for fast startup
+
+# Configuration
+VECTOR_STORE_PATH = Path(__file__).parent.parent / "vector_store"
+EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
+# Load the store and embedding model in the background at startup instead of on first request
+WARMUP_ON_STARTUP = os.environ.get("WARMUP_ON_STARTUP", "").lower() in ("1", "true", "yes")
+# Retry a failed (or missing) load after this many seconds, doubling per failure up to the max
+LOAD_RETRY_SECONDS = float(os.environ.get("VECTOR_STORE_RETRY_SECONDS", "1"))
+LOAD_RETRY_MAX_SECONDS = float(os.environ.get("VECTOR_STORE_RETRY_MAX_SECONDS", "60"))
+# Check for a newly published store version this often (0 = only via POST /admin/reload)
+RELOAD_POLL_SECONDS = float(os.environ.get("VECTOR_STORE_RELOAD_SECONDS", "30"))
+
+# Global vector store instance, its NumPy MMR retriever, a version stamp of the index,
+# the index type metadata written by ingest (None = flat), and the directory it came from
+vector_store = None
+retriever = None
+vector_store_version = None
+index_meta = None
+store_path: Path | None = None
+
+# Load state: not_loaded | loading | ready | missing (no index on disk) | failed
+load_state = "not_loaded"
+load_error: str | None = None
+load_duration: float | None = None  # seconds, for the last completed load
+warmed = False  # warm_up has run its dummy embedding (the ONNX session is hot)
+
+# Single-flight: one thread loads while concurrent callers wait on the lock
+_load_lock = threading.Lock()
+_load_failures = 0
+_next_retry_at = 0.0  # time.monotonic() before which get_vector_store will not retry
+_stop_warm_up = threading.Event()
+_background_load: threading.Thread | None = None
+_background_lock = threading.Lock()
+
+# BM25 lexical index and the chunk documents its row ids point at (None until loaded)
+lexical_index = None
+lexical_docs = None
+_lexical_lock = threading.Lock()
+_lexical_checked = False
+
+# Org / doc_type shard router (None if ingest wrote no shards)
+shard_router = None
+_shards_lock = threading.Lock()
+_shards_checked = False
+
+# Hot reload: one reload at a time; _swap_lock makes the swap atomic for search_state()
+_reload_lock = threading.Lock()
+_swap_lock = threading.Lock()
+_stop_reload_watcher = threading.Event()
+_reload_watcher: threading.Thread | None = None
+reload_stats = {"reloads": 0, "last_reload_at": None, "last_error": None}
+
+
+def _active_path() -> Path:
+    """
+    Directory of the loaded version, or of the published one before the first load.
+    The lexical index and shards can load before the dense store; whichever loads first
+    pins the version, so the others load from the same directory.
+    """
+    from backend.versions import resolve_store_path
+
+    return store_path or resolve_store_path(VECTOR_STORE_PATH)
+
+
+def _pin(path: Path) -> None:
+    global store_path
+    if store_path is None:
+        store_path = path
+
+
+def _index_version(path: Path) -> tuple | None:
+    """Version stamp (directory, mtime, size) of the saved FAISS index; changes whenever ingest publishes."""
+    index_file = path / "index.faiss"
+    try:
+        st = index_file.stat()
+    except OSError:
+        return None
+    return (path.name, st.st_mtime_ns, st.st_size)
+
+
+def load_vector_store():
+    """Load the FAISS vector store if it exists. Concurrent callers share one in-progress load."""
+    with _load_lock:
+        _load_locked()
+
+
+def _load_locked():
+    """Load the store, recording state and duration, and schedule a retry on failure. Caller holds _load_lock."""
+    global vector_store, retriever, vector_store_version, index_meta, store_path
+    global load_state, load_error, load_duration
+
+    path = _active_path()
+    if not path.exists():
+        load_state = "missing"
+        _schedule_retry()
+        return
+    load_state = "loading"
+    started = time.monotonic()
+    try:
+        from backend.ann import read_index_meta
+
+        store, store_retriever = _open_store(path)
+        index_meta = read_index_meta(path)
+        retriever = store_retriever
+        store_path = path
+        vector_store = store
+        vector_store_version = _index_version(path)
+        load_state = "ready"
+        load_error = None
+        _reset_retry()
+    except Exception as e:
+        load_state = "failed"
+        load_error = str(e)
+        logging.exception("Vector store load failed: %s", e)
+        _schedule_retry()
+    finally:
+        load_duration = time.monotonic() - started
+
+
+def _open_store(path: Path, embeddings=None):
+    """
+    Open the saved FAISS store with its FastEmbed embeddings (behind the query embedding cache)
+    and build its MMR retriever. Any index type ingest can build (flat, HNSW, IVF-PQ, SQ8)
+    loads as-is; search parameters come from index_meta.json. Chunk text stays on disk in
+    chunks.sqlite; stores from before the chunk store fall back to the pickled docstore.
+    Pass the live store's embeddings to reuse the loaded model (and its cache) on reload.
+    Returns (store, retriever).
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    from langchain_community.embeddings import FastEmbedEmbeddings
+    from langchain_community.vectorstores import FAISS
+    from backend.ann import COMPRESSED_INDEX_TYPES, configure_search, read_index_meta
+    from backend.chunk_store import CHUNKS_FILE, ChunkStore
+    from backend.embedding_cache import CachedEmbeddings
+    from backend.retrieval import MMRRetriever
+
+    if embeddings is None:
+        embeddings = CachedEmbeddings(FastEmbedEmbeddings(model_name=EMBEDDING_MODEL))
+    chunks_path = path / CHUNKS_FILE
+    if chunks_path.exists():
+        index = faiss.read_index(str(path / "index.faiss"))
+        store = FAISS(embedding_function=embeddings, index=index, docstore=InMemoryDocstore(),
+                      index_to_docstore_id={})
+        meta = read_index_meta(path)
+        configure_search(store.index, meta)
+        # A float32 copy of a compressed index would undo its memory savings
+        compressed = (meta or {}).get("index_type") in COMPRESSED_INDEX_TYPES
+        return store, MMRRetriever(store.index, ChunkStore(chunks_path), cache_vectors=not compressed)
+
+    logging.warning("No %s in %s; loading the legacy pickled docstore", CHUNKS_FILE, path)
+    store = FAISS.load_local(
+        str(path),
+        embeddings,
+        allow_dangerous_deserialization=True
+    )
+    configure_search(store.index, read_index_meta(path))
+    return store, MMRRetriever.from_langchain(store)
+
+
+def _schedule_retry() -> None:
+    """Exponential backoff before the next load attempt."""
+    global _load_failures, _next_retry_at
+    _load_failures += 1
+    delay = min(LOAD_RETRY_MAX_SECONDS, LOAD_RETRY_SECONDS * 2 ** (_load_failures - 1))
+    _next_retry_at = time.monotonic() + delay
+
+
+def _reset_retry() -> None:
+    global _load_failures, _next_retry_at
+    _load_failures = 0
+    _next_retry_at = 0.0
+
+
+def get_vector_store(wait: bool = True):
+    """
+    Return the vector store, loading it on first use (lazy load for fast Cloud Run startup).
+    Thread-safe and single-flight: during a cold start only one caller loads and the
+    others wait for it. After a failed load, returns None until the backoff expires.
+    With wait=False, a cold store starts loading in the background and None is returned.
+    """
+    if vector_store is not None:
+        return vector_store
+    if time.monotonic() < _next_retry_at:
+        return None
+    if not wait:
+        _start_background_load()
+        return None
+    with _load_lock:
+        if vector_store is None and time.monotonic() >= _next_retry_at:
+            _load_locked()
+    return vector_store
+
+
+def _start_background_load() -> None:
+    """Start loading the store on a background thread unless a load is already running."""
+    global _background_load
+    with _background_lock:
+        if _background_load is None or not _background_load.is_alive():
+            _background_load = threading.Thread(target=get_vector_store, name="vector-store-load", daemon=True)
+            _background_load.start()
+
+
+def get_lexical():
+    """
+    Return (bm25_index, docs), loading them on first use, or None if ingest did not
+    write a BM25 index. Does not need (or wait for) the embedding model.
+    """
+    global lexical_index, lexical_docs, _lexical_checked
+    if lexical_index is not None:
+        return lexical_index, lexical_docs
+    if _lexical_checked:
+        return None
+    with _lexical_lock:
+        if lexical_index is None and not _lexical_checked:
+            _lexical_checked = True
+            try:
+                path = _active_path()
+                loaded = _open_lexical(path, retriever)
+                if loaded is not None:
+                    _pin(path)
+                    lexical_index, lexical_docs = loaded
+            except Exception as e:
+                logging.exception("Lexical index load failed: %s", e)
+    if lexical_index is None:
+        return None
+    return lexical_index, lexical_docs
+
+
+def _open_lexical(path: Path, store_retriever=None):
+    """(BM25Index, docs) for the store at path, or None if it has no BM25 index."""
+    from backend.lexical import BM25_FILE, BM25Index
+
+    bm25_path = path / BM25_FILE
+    if not bm25_path.exists():
+        return None
+    index = BM25Index.load(bm25_path)
+    docs = store_retriever.docs if store_retriever is not None else _load_docs(path)
+    return index, docs
+
+
+def get_shard_router():
+    """Return the ShardRouter, loading it on first use, or None if ingest wrote no shards."""
+    global shard_router, _shards_checked
+    if shard_router is not None or _shards_checked:
+        return shard_router
+    with _shards_lock:
+        if shard_router is None and not _shards_checked:
+            _shards_checked = True
+            try:
+                from backend.shards import ShardRouter
+                path = _active_path()
+                shard_router = ShardRouter.load(path)
+                if shard_router is not None:
+                    _pin(path)
+            except Exception as e:
+                logging.exception("Shard load failed: %s", e)
+    return shard_router
+
+
+def _load_docs(path: Path):
+    """Chunk documents in FAISS row order, without loading the index or embeddings."""
+    from backend.chunk_store import CHUNKS_FILE, ChunkStore
+
+    if (path / CHUNKS_FILE).exists():
+        return ChunkStore(path / CHUNKS_FILE)
+    import pickle
+
+    with open(path / "index.pkl", "rb") as f:
+        docstore, index_to_docstore_id = pickle.load(f)
+    return [docstore.search(index_to_docstore_id[i]) for i in range(len(index_to_docstore_id))]
+
+
+def search_state() -> tuple:
+    """
+    (retriever, lexical, shard_router, version) for one request, all from the same store
+    version, so a reload that lands mid-request cannot mix row ids from two indexes, and
+    an answer built from them is cached under the version it actually came from.
+    """
+    get_lexical()
+    get_shard_router()
+    with _swap_lock:
+        lexical = (lexical_index, lexical_docs) if lexical_index is not None else None
+        return retriever, lexical, shard_router, vector_store_version
+
+
+def reload_if_changed(force: bool = False) -> dict:
+    """
+    Load the published store version if it differs from the live one (or force), then
+    swap it in. The live store keeps serving while the new one loads; on failure it
+    stays live. Does nothing before the first load (that load picks up CURRENT itself).
+    Returns what happened, for POST /admin/reload and the logs.
+    """
+    global vector_store, retriever, vector_store_version, index_meta, store_path
+    global lexical_index, lexical_docs, _lexical_checked, shard_router, _shards_checked, load_duration
+    from backend.ann import read_index_meta
+    from backend.shards import ShardRouter
+    from backend.versions import resolve_store_path
+
+    with _reload_lock:
+        path = resolve_store_path(VECTOR_STORE_PATH)
+        version = _index_version(path)
+        current = {"version": path.name, "previous": store_path.name if store_path else None}
+        if vector_store is None:
+            return {"reloaded": False, "reason": "not loaded yet", **current}
+        if version is None:
+            return {"reloaded": False, "reason": f"no index in {path}", **current}
+        if not force and path == store_path and version == vector_store_version:
+            return {"reloaded": False, "reason": "unchanged", **current}
+
+        started = time.monotonic()
+        try:
+            new_store, new_retriever = _open_store(path, vector_store.embeddings)
+            new_meta = read_index_meta(path)
+            new_lexical = _open_lexical(path, new_retriever)
+            new_router = ShardRouter.load(path)
+        except Exception as e:
+            reload_stats["last_error"] = str(e)
+            logging.exception("Vector store reload from %s failed; still serving %s", path, store_path)
+            return {"reloaded": False, "reason": f"load failed: {e}", **current}
+
+        with _swap_lock:
+            vector_store, retriever, index_meta = new_store, new_retriever, new_meta
+            store_path, vector_store_version = path, version
+            lexical_index, lexical_docs = new_lexical if new_lexical is not None else (None, None)
+            shard_router = new_router
+            _lexical_checked = _shards_checked = True
+        # Answers from the old index are stale; lookups still carrying its version become misses
+        from backend.answer_cache import answer_cache
+        answer_cache.clear(version)
+        load_duration = time.monotonic() - started
+        reload_stats["reloads"] += 1
+        reload_stats["last_reload_at"] = time.time()
+        reload_stats["last_error"] = None
+        logging.info("Vector store reloaded from %s in %.2f s", path, load_duration)
+        return {"reloaded": True, "load_seconds": round(load_duration, 3), **current}
+
+
+def _watch_for_reloads() -> None:
+    while not _stop_reload_watcher.wait(RELOAD_POLL_SECONDS):
+        try:
+            reload_if_changed()
+        except Exception as e:
+            logging.exception("Vector store reload check failed: %s", e)
+
+
+def start_reload_watcher() -> None:
+    """Poll for newly published store versions every RELOAD_POLL_SECONDS (0 = off)."""
+    global _reload_watcher
+    if RELOAD_POLL_SECONDS <= 0 or (_reload_watcher is not None and _reload_watcher.is_alive()):
+        return
+    _stop_reload_watcher.clear()
+    _reload_watcher = threading.Thread(target=_watch_for_reloads, name="vector-store-reload", daemon=True)
+    _reload_watcher.start()
+
+
+def stop_reload_watcher() -> None:
+    _stop_reload_watcher.set()
+
+
+def get_retriever():
+    """Return the MMR retriever for the loaded store (loading it if needed), or None."""
+    if get_vector_store() is None:
+        return None
+    return retriever
+
+
+def warm_up() -> None:
+    """
+    Load the store and run one dummy embedding so the first real question pays no model
+    start-up cost. A failed load is retried with backoff until it succeeds or shutdown.
+    """
+    global warmed
+    get_lexical()
+    get_shard_router()
+    while not _stop_warm_up.is_set():
+        store = get_vector_store()
+        if store is not None:
+            store.embeddings.embed_query("warm up")
+            warmed = True
+            return
+        if load_state == "missing":
+            return
+        _stop_warm_up.wait(max(0.0, _next_retry_at - time.monotonic()))
+
+
+def start_warm_up() -> None:
+    """
+    Run warm_up on its own daemon thread (lifespan startup). Its retry loop can last as long
+    as the store keeps failing to load, so it must not hold a request worker thread.
+    """
+    _stop_warm_up.clear()
+    threading.Thread(target=warm_up, name="vector-store-warm-up", daemon=True).start()
+
+
+def stop_warm_up() -> None:
+    """Stop a warm-up retry loop (called from lifespan shutdown)."""
+    _stop_warm_up.set()
+
+
+def load_status() -> dict:
+    """Load state for /readyz and /health. Never triggers a load."""
+    return {
+        "state": load_state,
+        "vector_store_loaded": vector_store is not None,
+        "version": store_path.name if store_path is not None and vector_store is not None else None,
+        "lexical_index_loaded": lexical_index is not None,
+        "index_type": (index_meta or {}).get("index_type", "flat") if vector_store is not None else None,
+        "shards_loaded": len(shard_router.indexes) if shard_router is not None else 0,
+        "load_duration_seconds": round(load_duration, 3) if load_duration is not None else None,
+        "error": load_error,
+        "warmup_on_startup": WARMUP_ON_STARTUP,
+        "warmed": warmed,
+        "reloads": reload_stats["reloads"],
+        "last_reload_error": reload_stats["last_error"],
+    }
+
+
+def embedding_cache_stats() -> dict | None:
+    """Query embedding cache counters, or None before the store is loaded."""
+    store = vector_store
+    if store is None:
+        return None
+    stats = getattr(store.embeddings, "stats", None)
+    return stats() if stats else None
+
+
+def is_ready() -> bool:
+    """
+    True once the store is loaded and its embedding model has run once (or there is no
+    store to load). Without warm-up the store loads lazily on first request, so the
+    instance is always ready.
+    """
+    if not WARMUP_ON_STARTUP:
+        return True
+    return load_state == "missing" or (load_state == "ready" and warmed)
@@ -0,0 +1,63 @@
+"""
+Tests for admission control (concurrency limit, bounded queue, queue timeout).
+"""
+
+import asyncio
+
+import pytest
+
+from backend.admission import AdmissionController, Overloaded
+
+
+def test_queue_then_admit_in_order():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=1, retry_after=3)
+    order = []
+
+    async def work(name):
+        async with controller.slot():
+            order.append(name)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(work(n) for n in "abc"))
+
+    asyncio.run(main())
+    assert order == ["a", "b", "c"]
+    stats = controller.stats()
+    assert stats["admitted"] == 3 and stats["in_flight"] == 0 and stats["queued"] == 0
+    assert stats["rejected"] == {"queue_full": 0, "queue_timeout": 0}
+
+
+def test_rejects_when_queue_is_full_or_wait_times_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=1, queue_timeout=0.05, retry_after=3)
+
+    async def hold():
+        async with controller.slot():
+            await asyncio.sleep(0.2)
+
+    async def main():
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(controller.acquire())  # queued, then times out
+        await asyncio.sleep(0)
+        with pytest.raises(Overloaded) as full:
+            await controller.acquire()  # queue already full: rejected immediately
+        with pytest.raises(Overloaded):
+            await waiter
+        await holder
+        return full.value
+
+    error = asyncio.run(main())
+    assert error.retry_after == 3
+    assert controller.stats()["rejected"] == {"queue_full": 1, "queue_timeout": 1}
+    assert controller.stats()["in_flight"] == 0
+
+
+def test_zero_limit_disables_admission_control():
+    controller = AdmissionController(max_concurrent=0, max_queue=0)
+
+    async def main():
+        await asyncio.gather(*(controller.acquire() for _ in range(100)))
+
+    asyncio.run(main())
+    assert controller.stats()["in_flight"] == 100
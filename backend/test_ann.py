@@ -0,0 +1,61 @@
+"""
+Tests for the configurable FAISS index types.
+"""
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from backend.ann import build_index, configure_search, read_index_meta, reconstruct_all, resolve_params, write_index_meta
+
+DIM = 16
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(5).normal(size=(400, DIM)).astype(np.float32)
+
+
+def test_resolve_params_applies_overrides():
+    assert resolve_params("hnsw", {"ef_search": 128, "nprobe": 4, "m": None}) == {
+        "m": 32, "ef_construction": 200, "ef_search": 128}
+    with pytest.raises(ValueError):
+        resolve_params("lsh")
+
+
+@pytest.mark.parametrize("index_type", ["flat", "hnsw", "sq8"])
+def test_index_types_find_stored_vectors(vectors, index_type):
+    index, _ = build_index(vectors, index_type)
+    _, ids = index.search(vectors[:20], 1)
+    assert (ids[:, 0] == np.arange(20)).mean() >= 0.95
+    assert reconstruct_all(index).shape == vectors.shape
+
+
+def test_ivfpq_guards_and_search_params(vectors, tmp_path):
+    with pytest.raises(ValueError):
+        build_index(vectors[:100], "ivfpq", {"pq_m": 8})
+    index, params = build_index(vectors, "ivfpq", {"pq_m": 8, "nprobe": 4})
+    assert 1 <= params["nlist"] <= len(vectors) // 39
+    assert reconstruct_all(index).shape == vectors.shape
+
+    write_index_meta(tmp_path, "ivfpq", params, DIM, len(vectors))
+    meta = read_index_meta(tmp_path)
+    meta["params"]["nprobe"] = 2
+    configure_search(index, meta)
+    assert faiss.extract_index_ivf(index).nprobe == 2
+    assert read_index_meta(tmp_path / "missing") is None
+
+
+@pytest.mark.parametrize("index_type", ["sq8", "ivfpq"])
+def test_compressed_index_mmr_decodes_only_candidates(vectors, index_type):
+    """Without a cached vector matrix, MMR decodes the candidates and selects the same rows."""
+    from backend.retrieval import MMRRetriever
+
+    index, _ = build_index(vectors, index_type, {"pq_m": 8})
+    cached = MMRRetriever(index, list(range(len(vectors))))
+    lazy = MMRRetriever(index, list(range(len(vectors))), cache_vectors=False)
+    assert lazy.unit is None
+    queries = vectors[:4] + 0.01
+    assert lazy.search_batch(queries, k=5, fetch_k=20) == cached.search_batch(queries, k=5, fetch_k=20)
+    assert lazy.search_in(queries[0], [7, 3, -1, 11], k=2) == cached.search_in(queries[0], [7, 3, -1, 11], k=2)
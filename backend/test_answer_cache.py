@@ -0,0 +1,81 @@
+"""
+Tests for the semantic answer cache.
+"""
+
+import numpy as np
+
+from backend.answer_cache import AnswerCache
+
+
+def test_hit_above_threshold():
+    """A near-identical query embedding should return the cached answer."""
+    cache = AnswerCache(max_size=4, ttl=60, threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], "offside answer")
+    assert cache.get([0.99, 0.05, 0.0]) == "offside answer"
+    assert cache.stats()["hits"] == 1
+
+
+def test_miss_below_threshold():
+    """A dissimilar query should miss."""
+    cache = AnswerCache(max_size=4, ttl=60, threshold=0.95)
+    cache.put([1.0, 0.0, 0.0], "offside answer")
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_lru_eviction():
+    """The least recently used entry should be evicted when the cache is full."""
+    cache = AnswerCache(max_size=2, ttl=60, threshold=0.99)
+    cache.put([1.0, 0.0, 0.0], "a")
+    cache.put([0.0, 1.0, 0.0], "b")
+    assert cache.get([1.0, 0.0, 0.0]) == "a"  # "a" is now most recently used
+    cache.put([0.0, 0.0, 1.0], "c")
+    assert cache.get([0.0, 1.0, 0.0]) is None
+    assert cache.get([1.0, 0.0, 0.0]) == "a"
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expiry():
+    """Expired entries should not be returned."""
+    cache = AnswerCache(max_size=4, ttl=0, threshold=0.9)
+    cache.put(np.ones(3), "stale")
+    assert cache.get(np.ones(3)) is None
+
+
+def test_version_change_invalidates():
+    """A new vector store version should drop all entries."""
+    cache = AnswerCache(max_size=4, ttl=60, threshold=0.9)
+    assert cache.get([1.0, 0.0], version=1) is None
+    cache.put([1.0, 0.0], "old index", version=1)
+    assert cache.get([1.0, 0.0], version=1) == "old index"
+    assert cache.get([1.0, 0.0], version=2) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_answer_from_replaced_version_is_not_stored():
+    """A request that started before a reload must not wipe or repopulate the new version's cache."""
+    cache = AnswerCache(max_size=4, ttl=60, threshold=0.9)
+    cache.get([1.0, 0.0], version=2)
+    cache.put([1.0, 0.0], "new index", version=2)
+    cache.put([0.0, 1.0], "old index", version=1)
+    assert cache.get([1.0, 0.0], version=2) == "new index"
+    assert cache.get([0.0, 1.0], version=2) is None
+    assert cache.stats()["size"] == 1 and cache.stats()["invalidations"] == 0
+
+
+def test_lookup_with_replaced_version_is_a_plain_miss():
+    """A request holding a pre-reload snapshot must not wipe the new version's entries."""
+    cache = AnswerCache(max_size=4, ttl=60, threshold=0.9)
+    cache.get([1.0, 0.0], version=1)
+    cache.get([1.0, 0.0], version=2)
+    cache.put([1.0, 0.0], "new index", version=2)
+    assert cache.get([1.0, 0.0], version=1) is None
+    assert cache.get([1.0, 0.0], version=2) == "new index"
+    assert cache.stats()["invalidations"] == 0
+
+    # A hot reload back to version 1 (rollback) makes it current again
+    cache.clear(version=1)
+    assert cache.get([1.0, 0.0], version=1) is None
+    cache.put([1.0, 0.0], "rolled back", version=1)
+    assert cache.get([1.0, 0.0], version=1) == "rolled back"
+    assert cache.get([1.0, 0.0], version=2) is None
@@ -0,0 +1,304 @@
+"""
+Tests for the chat endpoints (Gemini and the vector store are stubbed out).
+"""
+
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+async def _stream(chunks: list[str]):
+    for c in chunks:
+        yield SimpleNamespace(text=c)
+
+
+def _fake_genai_client(chunks: list[str]):
+    """A stand-in for genai.Client whose async streaming call yields the given text chunks."""
+    fake = MagicMock()
+    fake.aio.models.generate_content = AsyncMock(return_value=SimpleNamespace(text="".join(chunks)))
+    fake.aio.models.generate_content_stream = AsyncMock(return_value=_stream(chunks))
+    return fake
+
+
+def _parse_sse(body: str) -> list[tuple[str, dict]]:
+    """Parse an SSE body into (event, data) pairs."""
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+# ---------------------------------------------------------------------------
+# /chat/stream
+# ---------------------------------------------------------------------------
+
+def test_chat_stream_empty_query():
+    """Should return 400 when q is blank."""
+    resp = client.get("/chat/stream", params={"q": "  "})
+    assert resp.status_code == 400
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["OSRO FAQs"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_stream_events(mock_embed, mock_search, mock_log):
+    """Sources come first, then tokens, then done; the full answer is logged once."""
+    with patch("backend.main._get_genai_client", return_value=_fake_genai_client(["Off", "side"])):
+        resp = client.get("/chat/stream", params={"q": "what is offside"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    events = _parse_sse(resp.text)
+    assert events[0] == ("sources", {"sources": ["OSRO FAQs"]})
+    assert [e for e in events if e[0] == "token"] == [("token", {"text": "Off"}), ("token", {"text": "side"})]
+    assert events[-1] == ("done", {})
+    mock_log.assert_called_once()
+    assert mock_log.call_args[0][1].answer == "Offside"
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("", []))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_stream_error_event(mock_embed, mock_search, mock_log):
+    """A Gemini failure should end the stream with an error event instead of a 500."""
+    fake = MagicMock()
+    fake.aio.models.generate_content_stream = AsyncMock(side_effect=RuntimeError("quota exceeded"))
+    with patch("backend.main._get_genai_client", return_value=fake):
+        resp = client.get("/chat/stream", params={"q": "what is offside"})
+    events = _parse_sse(resp.text)
+    assert events[-1] == ("error", {"detail": "quota exceeded"})
+    mock_log.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# /chat
+# ---------------------------------------------------------------------------
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["Laws of the Game"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_success(mock_embed, mock_search, mock_log):
+    """POST /chat should return the generated answer and sources."""
+    with patch("backend.main._get_genai_client", return_value=_fake_genai_client(["A goal kick."])):
+        resp = client.post("/chat", json={"question": "restart after ball leaves over goal line?"})
+    assert resp.status_code == 200
+    assert resp.json() == {"answer": "A goal kick.", "sources": ["Laws of the Game"]}
+    mock_log.assert_called_once()
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["OSRO FAQs"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_stream_releases_slot_when_client_disconnects_before_first_chunk(mock_embed, mock_search, mock_log):
+    """A stream whose response start fails (client gone) still gives its admission slot back."""
+    import asyncio
+
+    from backend.main import admission
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream",
+             "query_string": b"q=what+is+offside", "root_path": "", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("testserver", 80)}
+
+    async def receive():
+        await asyncio.sleep(1)
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset by peer")
+
+    async def main():
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            pass
+
+    before = admission.in_flight
+    with patch("backend.main._get_genai_client", return_value=_fake_genai_client(["Off", "side"])):
+        asyncio.run(main())
+    assert admission.in_flight == before
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["OSRO FAQs"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_stream_slot_lasts_as_long_as_the_gemini_stream(mock_embed, mock_search, mock_log):
+    """A client that disconnects mid-stream does not free the slot while Gemini is still streaming."""
+    import asyncio
+
+    from backend.main import _stream_flight, admission
+
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+             "scheme": "http", "path": "/chat/stream", "raw_path": b"/chat/stream",
+             "query_string": b"q=how+long+is+a+half", "root_path": "", "headers": [],
+             "client": ("127.0.0.1", 1), "server": ("testserver", 80)}
+
+    async def main():
+        first_token = asyncio.Event()
+        finish = asyncio.Event()
+
+        async def gemini_stream():
+            yield SimpleNamespace(text="Forty")
+            await finish.wait()
+            yield SimpleNamespace(text=" five minutes")
+
+        async def receive():
+            await first_token.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            if b"event: token" in message.get("body", b""):
+                first_token.set()
+
+        fake = MagicMock()
+        fake.aio.models.generate_content_stream = AsyncMock(return_value=gemini_stream())
+        before = admission.in_flight
+        with patch("backend.main._get_genai_client", return_value=fake):
+            await app(scope, receive, send)
+            assert admission.in_flight == before + 1  # the client is gone, Gemini is not
+            finish.set()
+            while _stream_flight.stats()["in_flight"]:
+                await asyncio.sleep(0.01)
+        assert admission.in_flight == before
+
+    asyncio.run(main())
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_overloaded_returns_503_with_retry_after(mock_embed, mock_log):
+    """When admission control rejects a request, /chat and /chat/stream answer 503 with Retry-After."""
+    from backend.admission import Overloaded
+
+    with patch("backend.main.admission.acquire", AsyncMock(side_effect=Overloaded("queue full", 7))):
+        resp = client.post("/chat", json={"question": "what is offside"})
+        stream = client.get("/chat/stream", params={"q": "what is offside"})
+    for r in (resp, stream):
+        assert r.status_code == 503
+        assert r.headers["retry-after"] == "7"
+    mock_log.assert_not_called()
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["Laws of the Game"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_identical_concurrent_questions_share_one_gemini_call(mock_embed, mock_search, mock_log):
+    """Concurrent /chat requests with the same normalized question are coalesced; each is still logged."""
+    import asyncio
+    import httpx
+
+    fake = MagicMock()
+
+    async def slow_answer(model, contents):
+        await asyncio.sleep(0.05)
+        return SimpleNamespace(text="A goal kick.")
+
+    fake.aio.models.generate_content = AsyncMock(side_effect=slow_answer)
+
+    async def ask_all():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+            questions = ["Restart after a goal?", "restart after  a GOAL?", "Restart after a goal?"]
+            return await asyncio.gather(*(http.post("/chat", json={"question": q}) for q in questions))
+
+    with patch("backend.main._get_genai_client", return_value=fake):
+        responses = asyncio.run(ask_all())
+    assert [r.json()["answer"] for r in responses] == ["A goal kick."] * 3
+    assert fake.aio.models.generate_content.await_count == 1
+    assert mock_log.call_count == 3
+
+
+# ---------------------------------------------------------------------------
+# /chat/batch
+# ---------------------------------------------------------------------------
+
+def _parse_ndjson(body: str) -> list[dict]:
+    return [json.loads(line) for line in body.splitlines() if line]
+
+
+@patch("backend.main._search_batch", side_effect=lambda qs, emb, state=None: [("ctx", [f"src {q}"]) for q in qs])
+@patch("backend.main._embed_questions", return_value=None)
+def test_chat_batch_per_item_results(mock_embed, mock_search):
+    """Every question gets one NDJSON line; failures are per item, not per batch."""
+    fake = MagicMock()
+
+    async def generate(model, contents):
+        if "bad" in contents:
+            raise RuntimeError("quota exceeded")
+        return SimpleNamespace(text="answer")
+
+    fake.aio.models.generate_content = AsyncMock(side_effect=generate)
+    with patch("backend.main._get_genai_client", return_value=fake):
+        resp = client.post("/chat/batch", json={"questions": ["offside?", "  ", "bad one", "handball?"]})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = {item["index"]: item for item in _parse_ndjson(resp.text)}
+    assert sorted(lines) == [0, 1, 2, 3]
+    assert lines[0] == {"index": 0, "question": "offside?", "answer": "answer", "sources": ["src offside?"],
+                        "cached": False}
+    assert lines[1]["error"] == "Question cannot be empty"
+    assert lines[2]["error"] == "quota exceeded"
+    assert lines[3]["answer"] == "answer"
+    # One batched retrieval for the three non-empty questions
+    mock_embed.assert_called_once_with(["offside?", "bad one", "handball?"])
+    mock_search.assert_called_once()
+
+
+def test_chat_batch_limits():
+    assert client.post("/chat/batch", json={"questions": []}).status_code == 400
+    with patch("backend.main.CHAT_BATCH_MAX_QUESTIONS", 2):
+        assert client.post("/chat/batch", json={"questions": ["a", "b", "c"]}).status_code == 400
+
+
+@patch("backend.main._embed_questions", side_effect=RuntimeError("store broken"))
+def test_chat_batch_retrieval_failure_marks_every_item(mock_embed):
+    resp = client.post("/chat/batch", json={"questions": ["a", "b"]})
+    assert [item["error"] for item in _parse_ndjson(resp.text)] == ["store broken", "store broken"]
+
+
+# ---------------------------------------------------------------------------
+# Health probes
+# ---------------------------------------------------------------------------
+
+def test_livez():
+    """Liveness never depends on the vector store."""
+    resp = client.get("/livez")
+    assert resp.status_code == 200
+    assert resp.json() == {"status": "alive"}
+
+
+def test_readyz_while_warming_up():
+    """With warm-up enabled, readiness is 503 until the store has loaded and embedded once."""
+    from backend import store
+    with patch.object(store, "WARMUP_ON_STARTUP", True), patch.object(store, "load_state", "loading"):
+        resp = client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["state"] == "loading"
+    with patch.object(store, "WARMUP_ON_STARTUP", True), patch.object(store, "load_state", "ready"), \
+            patch.object(store, "warmed", False):
+        resp = client.get("/readyz")
+    assert resp.status_code == 503
+    assert resp.json()["state"] == "ready" and not resp.json()["warmed"]
+    with patch.object(store, "WARMUP_ON_STARTUP", True), patch.object(store, "load_state", "ready"), \
+            patch.object(store, "warmed", True), patch.object(store, "load_duration", 1.5):
+        resp = client.get("/readyz")
+    assert resp.status_code == 200
+    assert resp.json()["load_duration_seconds"] == 1.5
+
+
+def test_admin_reload_requires_token():
+    """POST /admin/reload is disabled without ADMIN_TOKEN and checks the bearer token."""
+    assert client.post("/admin/reload").status_code == 404
+    with patch("backend.main.ADMIN_TOKEN", "s3cret"), \
+            patch("backend.store.reload_if_changed", return_value={"reloaded": True, "version": "v2"}) as reload:
+        assert client.post("/admin/reload", headers={"Authorization": "Bearer nope"}).status_code == 403
+        resp = client.post("/admin/reload?force=true", headers={"Authorization": "Bearer s3cret"})
+    assert resp.status_code == 200 and resp.json()["version"] == "v2"
+    reload.assert_called_once_with(True)
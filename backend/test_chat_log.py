@@ -0,0 +1,131 @@
+"""
+Tests for the batched background chat log writer (Sheets client is faked).
+"""
+
+import json
+
+import pytest
+
+from backend import chat_log
+
+
+class FakeWorksheet:
+    def __init__(self, fail: bool = False):
+        self.rows: list[list] = []
+        self.fail = fail
+        self.append_calls = 0
+
+    def append_rows(self, rows, value_input_option=None):
+        self.append_calls += 1
+        if self.fail:
+            raise RuntimeError("Sheets unavailable")
+        self.rows.extend(rows)
+
+
+class FakeSpreadsheet:
+    def __init__(self, sheet1: FakeWorksheet):
+        self.sheet1 = sheet1
+
+
+class FakeClient:
+    def __init__(self, sheet1: FakeWorksheet):
+        self.spreadsheet = FakeSpreadsheet(sheet1)
+        self.open_calls = 0
+
+    def open_by_key(self, key):
+        self.open_calls += 1
+        return self.spreadsheet
+
+
+@pytest.fixture
+def writer(tmp_path, monkeypatch):
+    """A fresh writer with a temp spool file and a configured fake sheet."""
+    monkeypatch.setattr(chat_log, "CHAT_LOG_SPOOL", tmp_path / "spool.jsonl")
+    monkeypatch.setattr(chat_log, "CHAT_LOG_BATCH_SIZE", 100)
+    monkeypatch.setattr(chat_log, "_configured", True)
+    monkeypatch.setattr(chat_log, "_get_sheet_id", lambda: "sheet-id")
+    w = chat_log._LogWriter()
+    monkeypatch.setattr(chat_log, "_log_writer", w)
+    yield w
+    w.stop()
+
+
+def test_rows_batched_into_one_append(writer, monkeypatch):
+    """Queued rows are written with a single append_rows call and one open_by_key."""
+    ws = FakeWorksheet()
+    client = FakeClient(ws)
+    monkeypatch.setattr(chat_log, "_get_sheet_client", lambda: client)
+    chat_log.append_chat_log("dev", "q1", "a1", ["s1"])
+    chat_log.append_chat_log("dev", "q2", "a2", [])
+    writer.stop()
+    assert [r[2] for r in ws.rows] == ["q1", "q2"]
+    assert ws.append_calls == 1
+    assert client.open_calls == 1
+
+
+def test_failed_flush_spools_then_replays(writer, monkeypatch):
+    """Rows are spooled to disk when Sheets fails and replayed on the next flush."""
+    ws = FakeWorksheet(fail=True)
+    monkeypatch.setattr(chat_log, "_get_sheet_client", lambda: FakeClient(ws))
+    chat_log.append_chat_log("dev", "q1", "a1", [])
+    writer.stop()
+    spooled = [json.loads(line) for line in chat_log.CHAT_LOG_SPOOL.read_text().splitlines()]
+    assert spooled[0]["sheet"] == chat_log.CHAT_LOG_SHEET
+    assert spooled[0]["row"][2] == "q1"
+
+    ws.fail = False
+    chat_log.append_chat_log("dev", "q2", "a2", [])
+    writer.stop()
+    assert [r[2] for r in ws.rows] == ["q1", "q2"]
+    assert not chat_log.CHAT_LOG_SPOOL.exists()
+
+
+@pytest.mark.parametrize("fail", [False, True])
+def test_rows_spilled_during_replay_are_kept(writer, monkeypatch, fail):
+    """A row spilled by enqueue() while the spool is being replayed survives the replay."""
+    writer._spool({chat_log.CHAT_LOG_SHEET: [["dev", "t", "old", "a", ""]]})
+
+    class SpillingWorksheet(FakeWorksheet):
+        def append_rows(self, rows, value_input_option=None):
+            writer._spool({chat_log.CHAT_LOG_SHEET: [["dev", "t", "spilled", "a", ""]]})
+            super().append_rows(rows, value_input_option)
+
+    ws = SpillingWorksheet(fail=fail)
+    monkeypatch.setattr(chat_log, "_get_sheet_client", lambda: FakeClient(ws))
+    writer._flush({})
+    spooled = [json.loads(line)["row"][2] for line in chat_log.CHAT_LOG_SPOOL.read_text().splitlines()]
+    assert spooled == (["spilled", "old"] if fail else ["spilled"])
+    assert [r[2] for r in ws.rows] == ([] if fail else ["old"])
+
+
+def test_full_queue_drops_rows_without_touching_the_disk(writer, monkeypatch):
+    """enqueue() runs on the event loop: a full queue drops and counts the row instead of spooling it."""
+    from backend.metrics import LOG_ROWS_DROPPED
+
+    monkeypatch.setattr(writer, "_queue", chat_log.queue.Queue(maxsize=1))
+    monkeypatch.setattr(writer, "start", lambda: None)
+    before = LOG_ROWS_DROPPED._values.get(("queue_full",), 0)
+    chat_log.append_chat_log("dev", "q1", "a1", [])
+    chat_log.append_chat_log("dev", "q2", "a2", [])
+    assert writer._queue.qsize() == 1
+    assert LOG_ROWS_DROPPED._values[("queue_full",)] == before + 1
+    assert not chat_log.CHAT_LOG_SPOOL.exists()
+
+
+def test_spool_is_capped(writer, monkeypatch):
+    """Rows that would grow the spool past CHAT_LOG_SPOOL_MAX_BYTES are dropped and counted."""
+    from backend.metrics import LOG_ROWS_DROPPED
+
+    monkeypatch.setattr(chat_log, "CHAT_LOG_SPOOL_MAX_BYTES", 200)
+    before = LOG_ROWS_DROPPED._values.get(("spool_full",), 0)
+    writer._spool({chat_log.CHAT_LOG_SHEET: [["dev", "t", f"question {i}", "a", ""] for i in range(10)]})
+    kept = chat_log.CHAT_LOG_SPOOL.read_text().splitlines()
+    assert 0 < len(kept) < 10 and chat_log.CHAT_LOG_SPOOL.stat().st_size <= 200
+    assert LOG_ROWS_DROPPED._values[("spool_full",)] == before + 10 - len(kept)
+
+
+def test_not_configured_is_noop(writer, monkeypatch):
+    """Nothing is queued when the sheet is not configured."""
+    monkeypatch.setattr(chat_log, "_configured", False)
+    chat_log.append_feedback("ref", "missing info")
+    assert writer._queue.empty()
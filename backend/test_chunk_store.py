@@ -0,0 +1,46 @@
+"""
+Tests for the SQLite chunk store that replaces the pickled docstore.
+"""
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from langchain_core.documents import Document
+
+from backend.chunk_store import ChunkStore, fetch_documents
+from backend.retrieval import MMRRetriever
+
+
+@pytest.fixture
+def chunks(tmp_path):
+    docs = [Document(page_content=f"chunk {i}", metadata={"org": "OYSA" if i % 2 else None, "page": i})
+            for i in range(10)]
+    ChunkStore.write(tmp_path / "chunks.sqlite", docs)
+    return ChunkStore(tmp_path / "chunks.sqlite"), docs
+
+
+def test_round_trip_in_requested_order(chunks):
+    store, docs = chunks
+    assert len(store) == 10
+    assert store.get_many([7, 2, 7]) == [docs[7], docs[2], docs[7]]
+    assert store[-1] == docs[9]
+    assert fetch_documents(docs, [3]) == fetch_documents(store, [3])
+    with pytest.raises(IndexError):
+        store[10]
+
+
+def test_rewrite_replaces_existing_file(chunks, tmp_path):
+    ChunkStore.write(tmp_path / "chunks.sqlite", [Document(page_content="only")])
+    assert [d.page_content for d in ChunkStore(tmp_path / "chunks.sqlite")] == ["only"]
+
+
+def test_retriever_reads_documents_on_demand(chunks):
+    store, docs = chunks
+    vectors = np.random.default_rng(1).normal(size=(10, 8)).astype(np.float32)
+    index = faiss.IndexFlatL2(8)
+    index.add(vectors)
+    ids = MMRRetriever(index, store).search(vectors[4], k=3, fetch_k=10)
+    assert ids[0] == 4
+    assert MMRRetriever(index, store).documents(ids) == MMRRetriever(index, docs).documents(ids)
@@ -0,0 +1,46 @@
+"""
+Tests for context packing (merging overlapping chunks, de-duplication, token budget).
+"""
+
+from langchain_core.documents import Document
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from backend.context import estimate_tokens, pack_context
+
+TEXT = " ".join(f"Sentence {i} about the offside position and restarts." for i in range(60))
+
+
+def _chunks(start_index: bool) -> list:
+    splitter = RecursiveCharacterTextSplitter(chunk_size=400, chunk_overlap=100, add_start_index=start_index)
+    return splitter.split_documents([Document(page_content=TEXT, metadata={"source": "laws.pdf", "page": 3})])
+
+
+def test_overlapping_neighbours_merge_back_into_the_source_text():
+    for start_index in (True, False):
+        chunks = _chunks(start_index)
+        context, used, stats = pack_context([chunks[2], chunks[1], chunks[3]], budget=0)
+        expected_start = TEXT.index(chunks[1].page_content)
+        expected_end = TEXT.index(chunks[3].page_content) + len(chunks[3].page_content)
+        assert context == TEXT[expected_start:expected_end]
+        assert stats["passages"] == 1 and stats["merged"] == 2
+        assert stats["tokens_after"] < stats["tokens_before"]
+        assert len(used) == 3
+
+
+def test_other_sources_and_near_duplicates():
+    chunks = _chunks(True)
+    copy = Document(page_content=chunks[0].page_content + " Extra.", metadata={"source": "faq.md"})
+    other = Document(page_content="Goal kicks are taken from anywhere in the goal area.", metadata={"source": "faq.md"})
+    context, used, stats = pack_context([chunks[0], copy, other], budget=0)
+    assert stats["duplicates_dropped"] == 1
+    assert context == chunks[0].page_content + "\n\n" + other.page_content
+    assert copy not in used
+
+
+def test_budget_keeps_best_ranked_and_truncates():
+    docs = [Document(page_content=f"Passage {i} " + "word " * 300, metadata={"source": f"s{i}"}) for i in range(4)]
+    context, used, stats = pack_context(docs, budget=500, dedup_threshold=1.1)
+    assert estimate_tokens(context) <= 500
+    assert context.startswith("Passage 0")
+    assert stats["truncated"] == 1
+    assert [d.metadata["source"] for d in used] == ["s0", "s1"]
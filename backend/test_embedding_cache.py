@@ -0,0 +1,65 @@
+"""
+Tests for the query embedding cache.
+"""
+
+from unittest.mock import MagicMock
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from backend.embedding_cache import CachedEmbeddings, normalize_query
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.calls += 1
+        return [float(len(text)), 1.0]
+
+
+def test_normalize_query():
+    assert normalize_query("  What is   OFFSIDE?\n") == "what is offside?"
+
+
+def test_repeated_question_skips_model():
+    """Equivalent questions embed once; the cached vector is float32."""
+    inner = CountingEmbeddings()
+    emb = CachedEmbeddings(inner, max_size=8)
+    first = emb.embed_query_array("What is offside?")
+    second = emb.embed_query_array("what is  offside?")
+    assert inner.calls == 1
+    assert first.dtype == np.float32
+    assert second is first
+    assert emb.embed_query("WHAT IS OFFSIDE?") == first.tolist()
+    assert emb.stats()["hits"] == 2
+
+
+def test_size_bound():
+    """The least recently used query is evicted when the cache is full."""
+    inner = CountingEmbeddings()
+    emb = CachedEmbeddings(inner, max_size=1)
+    emb.embed_query("a")
+    emb.embed_query("bb")
+    emb.embed_query("a")
+    assert inner.calls == 3
+    assert emb.stats()["size"] == 1
+
+
+def test_batch_embeds_misses_in_one_model_call():
+    """Cached questions are reused; the rest go through query_embed once, in input order."""
+    inner = CountingEmbeddings()
+    inner.model = MagicMock()
+    inner.model.query_embed = MagicMock(side_effect=lambda texts, batch_size: (np.array([len(t), 2.0]) for t in texts))
+    emb = CachedEmbeddings(inner, max_size=8)
+    emb.embed_query_array("offside")
+    matrix = emb.embed_queries_array(["Offside", "handball", "HANDBALL", "dogso"])
+    assert inner.calls == 1
+    inner.model.query_embed.assert_called_once()
+    assert inner.model.query_embed.call_args[0][0] == ["handball", "dogso"]
+    assert matrix.dtype == np.float32 and matrix.shape == (4, 2)
+    assert matrix[:, 0].tolist() == [7.0, 8.0, 8.0, 5.0]
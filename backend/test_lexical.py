@@ -0,0 +1,41 @@
+"""
+Tests for the BM25 lexical index and rank fusion.
+"""
+
+from backend.lexical import BM25Index, fuse_rankings, tokenize
+
+TEXTS = [
+    "Law 11 Offside: a player is in an offside position if any part of the head is nearer the goal line.",
+    "DOGSO: denying an obvious goal-scoring opportunity is a sending-off offence.",
+    "Founders Cup rules: matches are 2 x 40 minutes; no extra time in group play.",
+    "Referees get assigned through RefTown; contact the OSRO assignor for your area.",
+]
+
+
+def test_tokenize():
+    assert tokenize("What is Law 11?") == ["law", "11"]
+
+
+def test_exact_term_lookup():
+    index = BM25Index.build(TEXTS)
+    assert index.search("DOGSO", k=3) == [1]
+    assert index.search("law 11 offside", k=3)[0] == 0
+    assert index.search("founders cup extra time", k=1) == [2]
+    assert index.search("zebra", k=3) == []
+
+
+def test_save_load_roundtrip(tmp_path):
+    index = BM25Index.build(TEXTS)
+    path = tmp_path / "bm25.npz"
+    index.save(path)
+    loaded = BM25Index.load(path)
+    assert loaded.search("assigned reftown", k=2) == index.search("assigned reftown", k=2)
+    assert (loaded.scores("offside") == index.scores("offside")).all()
+
+
+def test_fuse_rankings():
+    """Documents ranked well by both lists come first."""
+    fused = fuse_rankings([[1, 2, 3], [3, 1, 4]], [1.0, 1.0])
+    assert fused[0] == 1
+    assert set(fused) == {1, 2, 3, 4}
+    assert fuse_rankings([[1, 2], [2]], [1.0, 0.0]) == [1, 2]
@@ -11,6 +11,7 @@ import pytest
 from fastapi.testclient import TestClient
 
 from backend.license_service import (
+    clear_caches,
     enrich_and_group_licenses,
     get_license_reference,
     load_license_reference,
@@ -20,6 +21,14 @@ from backend.main import app
 client = TestClient(app, raise_server_exceptions=False)
 
 
+@pytest.fixture(autouse=True)
+def empty_ussf_caches():
+    """Each test starts with empty USSF lookup caches."""
+    clear_caches()
+    yield
+    clear_caches()
+
+
 # ---------------------------------------------------------------------------
 # license_data.json loading
 # ---------------------------------------------------------------------------
@@ -188,3 +197,190 @@ def test_license_status_success(mock_lookup, mock_fetch):
     assert ref_lic["name"] == "Grassroots Referee"
     assert ref_lic["discipline"] == "Referee"
     assert ref_lic["rank"] == 8
+
+
+# ---------------------------------------------------------------------------
+# Shared USSF client
+# ---------------------------------------------------------------------------
+
+def test_lookups_share_one_pooled_client():
+    """lookup_ussf_id and fetch_active_licenses go through the injected shared client."""
+    import asyncio
+
+    from backend import license_service
+
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.url.path)
+        if request.url.path.endswith("/users"):
+            if request.url.params["email"] == "missing@example.com":
+                return httpx.Response(404, json=[])
+            return httpx.Response(200, json=[{"ussf_id": "123", "full_name": "Pat Ref"}])
+        return httpx.Response(200, json=[
+            {"discipline": "referee", "license_id": "1", "expiration_date": "2099-01-01"},
+            {"discipline": "referee", "license_id": "2", "expiration_date": "2000-01-01"},
+        ])
+
+    async def main():
+        shared = license_service.init_client(transport=httpx.MockTransport(handler))
+        try:
+            found = await license_service.lookup_ussf_id("ref@example.com")
+            missing = await license_service.lookup_ussf_id("missing@example.com")
+            licenses = await license_service.fetch_active_licenses("123")
+            assert license_service.get_client() is shared
+        finally:
+            await license_service.close_client()
+        return found, missing, licenses
+
+    found, missing, licenses = asyncio.run(main())
+    assert found == ("123", "Pat Ref") and missing == (None, None)
+    assert [lic["license_id"] for lic in licenses] == ["1"]  # expired one filtered out
+    assert seen[-1].endswith("/users/123/user-licenses")
+
+
+@patch("backend.license_service.fetch_active_licenses", new_callable=AsyncMock, return_value=[])
+@patch("backend.license_service.lookup_ussf_id", new_callable=AsyncMock, return_value=("9876543210123456", "Jane Ref"))
+def test_license_status_is_cached(mock_lookup, mock_fetch):
+    """A repeat lookup (any case) is served from cache, with the status in Cache-Status."""
+    first = client.get("/license-status", params={"email": "ref@example.com"})
+    second = client.get("/license-status", params={"email": " REF@example.com"})
+    assert first.status_code == second.status_code == 200
+    assert first.headers["cache-status"] == "ussf-id; fwd=miss; stored, ussf-licenses; fwd=miss; stored"
+    assert second.headers["cache-status"].startswith("ussf-id; hit; ttl=")
+    assert ", ussf-licenses; hit; ttl=" in second.headers["cache-status"]
+    assert mock_lookup.await_count == 1 and mock_fetch.await_count == 1
+
+
+def test_not_found_is_cached_briefly_and_errors_are_not_cached():
+    import asyncio
+
+    from backend import license_service
+
+    calls = []
+
+    async def lookup(email):
+        calls.append(email)
+        if len(calls) == 1:
+            raise RuntimeError("USSF API user lookup failed with status 503")
+        await asyncio.sleep(0.01)
+        return None, None
+
+    async def main():
+        with pytest.raises(RuntimeError):
+            await license_service.get_ussf_id("nobody@example.org")
+        # Concurrent lookups share one upstream call; the not-found result is then cached
+        results = await asyncio.gather(*(license_service.get_ussf_id("nobody@example.org") for _ in range(3)))
+        again = await license_service.get_ussf_id("nobody@example.org")
+        return results, again
+
+    with patch("backend.license_service.lookup_ussf_id", lookup):
+        results, again = asyncio.run(main())
+    assert len(calls) == 2
+    assert [r[0] for r in results] == [(None, None)] * 3
+    assert [r[1] for r in results] == ["ussf-id; fwd=miss; stored"] + ["ussf-id; fwd=miss; collapsed"] * 2
+    assert again[0] == (None, None) and again[1].startswith("ussf-id; hit")
+
+
+# ---------------------------------------------------------------------------
+# /license-status/bulk
+# ---------------------------------------------------------------------------
+
+def _fake_lookup(email):
+    """USSF stand-in: ids for example.com, nobody elsewhere, an error for broken@."""
+    async def lookup(addr):
+        if addr.startswith("broken@"):
+            raise RuntimeError("USSF API user lookup failed with status 502")
+        if addr.endswith("@example.com"):
+            return f"id-{addr.split('@')[0]}", addr.split("@")[0].title()
+        return None, None
+    return lookup(email)
+
+
+async def _fake_licenses(ussf_id):
+    return [{"discipline": "referee", "license_id": "1", "issue_date": "2024-01-01",
+             "expiration_date": "2099-01-01", "issuer": "OYSA"}]
+
+
+@patch("backend.license_service.fetch_active_licenses", _fake_licenses)
+@patch("backend.license_service.lookup_ussf_id", _fake_lookup)
+def test_license_status_bulk_ndjson():
+    """Each roster email gets one line (duplicates collapsed), then a summary line."""
+    load_license_reference()
+    emails = ["a@example.com", "A@example.com ", "b@example.com", "nobody@example.org", "broken@example.com"]
+    resp = client.post("/license-status/bulk", json={"emails": emails})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in resp.text.splitlines()]
+    records = {r["email"]: r for r in lines[:-1]}
+    assert set(records) == {"a@example.com", "b@example.com", "nobody@example.org", "broken@example.com"}
+    assert records["a@example.com"]["result"] == "ok" and records["a@example.com"]["licenses"]
+    assert records["nobody@example.org"]["result"] == "not_found"
+    assert "502" in records["broken@example.com"]["error"]
+    summary = lines[-1]["summary"]
+    assert summary["referees"] == 4
+    assert summary["results"] == {"ok": 2, "not_found": 1, "error": 1}
+    assert summary["licenses"]["active"] == 2
+
+
+@patch("backend.license_service.fetch_active_licenses", _fake_licenses)
+@patch("backend.license_service.lookup_ussf_id", _fake_lookup)
+def test_license_status_bulk_csv_upload():
+    """A CSV roster with an email column can be posted and returned as CSV."""
+    import csv
+    import io
+
+    load_license_reference()
+    roster = "Name,Email\nAl,a@example.com\nNo One,nobody@example.org\n"
+    resp = client.post("/license-status/bulk?format=csv", content=roster, headers={"Content-Type": "text/csv"})
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(resp.text)))
+    referees = [r for r in rows if r["email"] != "summary"]
+    assert {r["email"]: r["result"] for r in referees} == {"a@example.com": "ok", "nobody@example.org": "not_found"}
+    summary = {(r["result"], r["status"]): r["count"] for r in rows if r["email"] == "summary"}
+    assert summary[("licenses", "active")] == "1" and summary[("referees_not_found", "")] == "1"
+
+
+def test_license_status_bulk_rejects_empty_roster():
+    assert client.post("/license-status/bulk", json={"emails": []}).status_code == 400
+    assert client.post("/license-status/bulk", json={"emails": "a@example.com"}).status_code == 400
+
+
+@patch("backend.license_service.fetch_active_licenses", _fake_licenses)
+@patch("backend.license_service.lookup_ussf_id", _fake_lookup)
+def test_license_status_bulk_multipart_upload():
+    """curl -F roster=@roster.csv: the CSV arrives as a multipart file field."""
+    load_license_reference()
+    roster = b"Name,Email\nAl,a@example.com\nNo One,nobody@example.org\n"
+    resp = client.post("/license-status/bulk", files={"roster": ("roster.csv", roster, "application/octet-stream")})
+    assert resp.status_code == 200
+    records = [json.loads(line) for line in resp.text.splitlines()][:-1]
+    assert {r["email"]: r["result"] for r in records} == {"a@example.com": "ok", "nobody@example.org": "not_found"}
+
+
+def test_license_status_bulk_rejects_malformed_uploads():
+    """Undecodable CSV and broken multipart bodies are client errors (400), not 500s."""
+    bad = [
+        (b"\xff\xfe\xfa,a@example.com", "text/csv"),
+        (b"roster", "multipart/form-data"),
+        (b"not multipart at all", "multipart/form-data; boundary=xyz"),
+    ]
+    for content, content_type in bad:
+        resp = client.post("/license-status/bulk", content=content, headers={"Content-Type": content_type})
+        assert resp.status_code == 400, content_type
+
+
+def test_license_status_bulk_rejects_oversized_body():
+    """Declared or streamed, a body over LICENSE_BULK_MAX_BYTES is refused with 413."""
+    with patch("backend.main.LICENSE_BULK_MAX_BYTES", 64):
+        roster = "email\n" + "".join(f"ref{i}@example.com\n" for i in range(20))
+        resp = client.post("/license-status/bulk", content=roster, headers={"Content-Type": "text/csv"})
+        assert resp.status_code == 413
+
+        def chunks():
+            for _ in range(20):
+                yield b"ref@example.com,"
+
+        resp = client.post("/license-status/bulk", content=chunks(), headers={"Content-Type": "text/csv"})
+        assert resp.status_code == 413
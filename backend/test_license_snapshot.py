@@ -0,0 +1,130 @@
+"""
+Tests for the local license snapshot and its refresher.
+"""
+
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from backend import license_service, license_snapshot
+from backend.license_snapshot import LicenseSnapshot, _RateLimiter, refresh_entry
+
+LICENSES = [{"discipline": "referee", "license_id": "1", "expiration_date": "2099-01-01"}]
+EXPIRED = {"discipline": "referee", "license_id": "2", "expiration_date": "2000-01-01"}
+
+
+@pytest.fixture
+def snapshot(tmp_path, monkeypatch):
+    store = LicenseSnapshot(tmp_path / "licenses.sqlite")
+    monkeypatch.setattr(license_snapshot, "_snapshot", store)
+    monkeypatch.setattr(license_snapshot, "LICENSE_SNAPSHOT_DB", str(store.path))
+    license_service.clear_caches()
+    yield store
+    store.close()
+    license_service.clear_caches()
+
+
+def test_fresh_entry_is_served_without_calling_ussf(snapshot):
+    snapshot.put("Ref@Example.com", "123", "Pat Ref", LICENSES + [EXPIRED])
+    with patch("backend.license_service.lookup_ussf_id", AsyncMock()) as lookup:
+        found = asyncio.run(license_service.get_referee_licenses("ref@example.com"))
+    lookup.assert_not_awaited()
+    assert found["source"] == "snapshot" and not found["stale"]
+    assert found["ussf_id"] == "123" and found["licenses"] == LICENSES  # expired records filtered on read
+    assert found["cache_status"].startswith("ussf-snapshot; hit; ttl=")
+    assert license_service.freshness(found)["as_of"].endswith("+00:00")
+
+
+@patch("backend.license_service.fetch_active_licenses", new_callable=AsyncMock, return_value=LICENSES)
+@patch("backend.license_service.lookup_ussf_id", new_callable=AsyncMock, return_value=("123", "Pat Ref"))
+def test_unknown_or_stale_entry_is_fetched_live_and_recorded(mock_lookup, mock_fetch, snapshot):
+    found = asyncio.run(license_service.get_referee_licenses("new@example.com"))
+    assert found["source"] == "live"
+    assert snapshot.get("new@example.com")["licenses"] == LICENSES
+
+    snapshot.put("old@example.com", "456", "Old Ref", [], fetched_at=time.time() - 10 * 86400)
+    found = asyncio.run(license_service.get_referee_licenses("old@example.com"))
+    assert found["source"] == "live" and found["licenses"] == LICENSES
+    assert time.time() - snapshot.get("old@example.com")["fetched_at"] < 60
+
+
+@patch("backend.license_service.lookup_ussf_id", new_callable=AsyncMock,
+       side_effect=RuntimeError("USSF API user lookup failed with status 503"))
+def test_stale_entry_is_served_when_ussf_fails(mock_lookup, snapshot):
+    snapshot.put("old@example.com", "456", "Old Ref", LICENSES, fetched_at=time.time() - 10 * 86400)
+    found = asyncio.run(license_service.get_referee_licenses("old@example.com"))
+    assert found["source"] == "snapshot" and found["stale"] and found["licenses"] == LICENSES
+    with pytest.raises(RuntimeError):
+        asyncio.run(license_service.get_referee_licenses("unknown@example.com"))
+
+
+def test_refresher_fetches_stalest_first_and_records_failures(snapshot):
+    now = time.time()
+    snapshot.put("b@example.com", "2", "B", [], fetched_at=now - 5000)
+    snapshot.put("a@example.com", "1", "A", [], fetched_at=now - 9000)
+    snapshot.put("fresh@example.com", "3", "C", [], fetched_at=now)
+    assert snapshot.add(["seeded@example.com", "a@example.com"]) == 1
+    due = snapshot.due(older_than=1000)
+    assert [e["email"] for e in due] == ["seeded@example.com", "a@example.com", "b@example.com"]
+
+    async def fetch(ussf_id):
+        if ussf_id == "2":
+            raise RuntimeError("USSF API license fetch failed with status 500")
+        return LICENSES
+
+    async def main():
+        limiter = _RateLimiter(0)
+        for entry in due:
+            await refresh_entry(snapshot, entry, limiter)
+
+    with patch("backend.license_service.lookup_ussf_id", AsyncMock(return_value=("9", "Seeded Ref"))), \
+            patch("backend.license_service.fetch_active_licenses", fetch):
+        asyncio.run(main())
+    assert snapshot.get("seeded@example.com")["ussf_id"] == "9"
+    assert snapshot.get("a@example.com")["licenses"] == LICENSES
+    assert "500" in snapshot.get("b@example.com")["last_error"]
+    assert snapshot.due(older_than=1000) == []  # failures wait a full interval before the next try
+    assert snapshot.stats()["refreshed"] == 2 and snapshot.stats()["refresh_errors"] == 1
+
+
+def test_idle_entries_stop_refreshing_and_are_pruned(snapshot, monkeypatch):
+    """Only referees served (or seeded) within LICENSE_SNAPSHOT_IDLE_AFTER are refreshed and kept."""
+    monkeypatch.setattr(license_snapshot, "LICENSE_SNAPSHOT_IDLE_AFTER", 1000)
+    now = time.time()
+    snapshot.put("idle@example.com", "1", "Idle", [], fetched_at=now - 5000)
+    snapshot.put("active@example.com", "2", "Active", [], fetched_at=now - 5000)
+    snapshot._conn.execute("UPDATE referees SET last_served_at = ? WHERE email = ?", (now - 2000, "idle@example.com"))
+    snapshot.put("active@example.com", "2", "Active", [], fetched_at=now - 5000, served=False)
+
+    assert [e["email"] for e in snapshot.due(older_than=100)] == ["active@example.com"]
+    assert snapshot.prune() == 1
+    assert snapshot.get("idle@example.com") is None and snapshot.stats()["pruned"] == 1
+
+    # Serving an entry counts as use (written at most once per interval)
+    snapshot._conn.execute("UPDATE referees SET last_served_at = ? WHERE email = ?", (now - 900, "active@example.com"))
+    snapshot.touch(snapshot.get("active@example.com"))
+    assert snapshot.get("active@example.com")["last_served_at"] == now - 900
+    snapshot._conn.execute("UPDATE referees SET last_served_at = ? WHERE email = ?", (now - 4000, "active@example.com"))
+    snapshot.touch(snapshot.get("active@example.com"))
+    assert snapshot.get("active@example.com")["last_served_at"] >= now
+
+
+def test_refresh_of_unknown_email_counts_as_error(snapshot):
+    snapshot.add(["gone@example.com"])
+    with patch("backend.license_service.lookup_ussf_id", AsyncMock(return_value=(None, None))):
+        asyncio.run(refresh_entry(snapshot, snapshot.due(older_than=0)[0], _RateLimiter(0)))
+    assert snapshot.stats()["refresh_errors"] == 1
+    assert snapshot.due(older_than=1000) == []
+
+
+def test_rate_limiter_spaces_calls():
+    async def main():
+        limiter = _RateLimiter(50)  # 20 ms apart
+        started = time.perf_counter()
+        for _ in range(4):
+            await limiter.wait()
+        return time.perf_counter() - started
+
+    assert asyncio.run(main()) >= 0.055
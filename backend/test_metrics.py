@@ -0,0 +1,72 @@
+"""
+Tests for stage timers, Server-Timing headers and the Prometheus /metrics output.
+"""
+
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi.testclient import TestClient
+
+from backend.main import app
+from backend.metrics import Histogram
+
+client = TestClient(app, raise_server_exceptions=False)
+
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("test_latency_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        h.observe(value, stage="embed")
+    assert h.render()[2:] == [
+        'osro_test_latency_seconds_bucket{stage="embed",le="0.1"} 1',
+        'osro_test_latency_seconds_bucket{stage="embed",le="1.0"} 3',
+        'osro_test_latency_seconds_bucket{stage="embed",le="+Inf"} 4',
+        'osro_test_latency_seconds_sum{stage="embed"} 4.05',
+        'osro_test_latency_seconds_count{stage="embed"} 4',
+    ]
+
+
+@patch("backend.main._log_chat")
+@patch("backend.main._search", return_value=("context", ["Laws of the Game"]))
+@patch("backend.main._embed_question", return_value=None)
+def test_chat_reports_stages(mock_embed, mock_search, mock_log):
+    fake = MagicMock()
+    fake.aio.models.generate_content = AsyncMock(return_value=SimpleNamespace(text="A goal kick."))
+    with patch("backend.main._get_genai_client", return_value=fake):
+        resp = client.post("/chat", json={"question": "which restart after the ball crosses the goal line?"})
+    assert resp.status_code == 200
+    timing = [part.split(";")[0] for part in resp.headers["server-timing"].split(", ")]
+    assert timing == ["embed", "search", "gemini", "log", "total"]
+
+    body = client.get("/metrics").text
+    assert 'osro_stage_duration_seconds_count{route="/chat",stage="gemini"}' in body
+    assert 'osro_http_request_duration_seconds_count{route="/chat",method="POST",status="200"}' in body
+    assert "# TYPE osro_chat_prompt_chars histogram" in body
+    assert 'osro_cache_hit_ratio{cache="answer"}' in body
+
+
+@patch("backend.main._search", return_value=("", []))
+@patch("backend.main._embed_question", return_value=None)
+def test_gemini_failures_count_as_upstream_errors(mock_embed, mock_search):
+    from backend.metrics import UPSTREAM_ERRORS
+
+    before = UPSTREAM_ERRORS._values.get(("gemini",), 0)
+    fake = MagicMock()
+    fake.aio.models.generate_content = AsyncMock(side_effect=RuntimeError("quota exceeded"))
+    with patch("backend.main._get_genai_client", return_value=fake):
+        assert client.post("/chat", json={"question": "a question that fails"}).status_code == 500
+    assert UPSTREAM_ERRORS._values[("gemini",)] == before + 1
+
+
+def test_context_packing_savings_are_exported():
+    from langchain_core.documents import Document
+
+    from backend.main import _context_and_sources
+    from backend.metrics import CONTEXT_TOKENS
+
+    text = "The ball is out of play when it has wholly passed over the goal line. " * 8
+    docs = [Document(page_content=text, metadata={"source": "laws.pdf"}) for _ in range(2)]
+    _context_and_sources(docs)
+    raw, packed = CONTEXT_TOKENS._series[("raw",)], CONTEXT_TOKENS._series[("packed",)]
+    assert raw[-1] >= 1 and packed[-2] < raw[-2]  # the duplicate chunk is dropped
+    assert 'osro_chat_context_tokens_sum{packing="packed"}' in client.get("/metrics").text
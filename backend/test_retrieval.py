@@ -0,0 +1,93 @@
+"""
+Parity tests: the NumPy MMR retriever must select the same chunks as LangChain's FAISS MMR.
+"""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("faiss")
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from backend.retrieval import MMRRetriever
+
+DIM = 32
+
+
+class TableEmbeddings(Embeddings):
+    """Looks up precomputed vectors by text, so the test needs no model."""
+
+    def __init__(self, table: dict[str, np.ndarray]):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.table[t].tolist() for t in texts]
+
+    def embed_query(self, text):
+        return self.table[text].tolist()
+
+
+@pytest.fixture(scope="module")
+def stores():
+    rng = np.random.default_rng(7)
+    # Clustered vectors so MMR has near-duplicates to skip
+    centers = rng.normal(size=(12, DIM))
+    vectors = centers[rng.integers(0, 12, size=300)] + 0.3 * rng.normal(size=(300, DIM))
+    texts = [f"chunk {i}" for i in range(len(vectors))]
+    table = {t: v.astype(np.float32) for t, v in zip(texts, vectors)}
+    store = FAISS.from_texts(texts, TableEmbeddings(table), metadatas=[{"i": i} for i in range(len(texts))])
+    return store, MMRRetriever.from_langchain(store), rng
+
+
+@pytest.mark.parametrize("k,fetch_k", [(5, 20), (4, 10), (1, 5), (8, 8)])
+def test_single_query_parity(stores, k, fetch_k):
+    store, retriever, rng = stores
+    for _ in range(25):
+        q = rng.normal(size=DIM).astype(np.float32)
+        expected = [d.page_content for d in store.max_marginal_relevance_search_by_vector(q.tolist(), k=k, fetch_k=fetch_k)]
+        got = [d.page_content for d in retriever.documents(retriever.search(q, k=k, fetch_k=fetch_k))]
+        assert got == expected
+
+
+def test_batch_matches_single(stores):
+    _, retriever, rng = stores
+    queries = rng.normal(size=(16, DIM)).astype(np.float32)
+    batch = retriever.search_batch(queries, k=5, fetch_k=20)
+    assert batch == [retriever.search(q, k=5, fetch_k=20) for q in queries]
+
+
+def test_fetch_k_larger_than_index():
+    """Fewer candidates than k returns only the available chunks."""
+    vectors = np.eye(3, DIM, dtype=np.float32)
+    table = {f"t{i}": v for i, v in enumerate(vectors)}
+    store = FAISS.from_texts(list(table), TableEmbeddings(table))
+    retriever = MMRRetriever.from_langchain(store)
+    ids = retriever.search(vectors[0], k=5, fetch_k=20)
+    assert sorted(ids) == [0, 1, 2]
+    assert ids[0] == 0
+
+
+def test_retrieve_lexical_only_and_hybrid(stores):
+    """Without an embedding, retrieve() serves BM25 results; with one, it fuses both."""
+    from backend.lexical import BM25Index
+    from backend.retrieval import retrieve
+
+    store, retriever, rng = stores
+    lexical = (BM25Index.build([d.page_content for d in retriever.docs]), retriever.docs)
+    docs = retrieve("chunk 42", None, None, lexical, k=3)
+    assert docs[0].page_content == "chunk 42"
+    hybrid = retrieve("chunk 42", rng.normal(size=DIM).astype(np.float32), retriever, lexical, k=5)
+    assert len(hybrid) == 5
+
+
+def test_retrieve_batch_matches_single(stores):
+    """retrieve_batch returns what retrieve() returns for each question."""
+    from backend.lexical import BM25Index
+    from backend.retrieval import retrieve, retrieve_batch
+
+    _, retriever, rng = stores
+    lexical = (BM25Index.build([d.page_content for d in retriever.docs]), retriever.docs)
+    questions = ["chunk 3", "chunk 17", "nothing"]
+    queries = rng.normal(size=(3, DIM)).astype(np.float32)
+    batch = retrieve_batch(questions, queries, retriever, lexical, k=5)
+    assert batch == [retrieve(q, e, retriever, lexical, k=5) for q, e in zip(questions, queries)]
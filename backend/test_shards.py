@@ -0,0 +1,52 @@
+"""
+Tests for org/doc_type shard routing.
+"""
+
+import numpy as np
+import pytest
+
+faiss = pytest.importorskip("faiss")
+
+from backend.shards import ShardRouter
+
+DIM = 8
+
+
+@pytest.fixture
+def router():
+    rng = np.random.default_rng(3)
+    vectors = rng.normal(size=(30, DIM)).astype(np.float32)
+    groups = {"org:NWSC": range(0, 10), "org:OYSA": range(10, 20), "doc_type:laws": range(20, 30)}
+    indexes = {}
+    for name, ids in groups.items():
+        index = faiss.IndexIDMap2(faiss.IndexFlatL2(DIM))
+        ids = np.array(list(ids), dtype=np.int64)
+        index.add_with_ids(vectors[ids], ids)
+        indexes[name] = index
+    aliases = {"org:NWSC": ["NWSC", "NorthWest Soccer Central"], "org:OYSA": ["OYSA"]}
+    return ShardRouter(indexes, aliases), vectors
+
+
+def test_route_by_org_alias(router):
+    r, _ = router
+    assert r.route("Who assigns NorthWest Soccer Central games?") == ["org:NWSC"]
+    assert r.route("nwsc field closures") == ["org:NWSC"]
+
+
+def test_route_by_competition_and_law(router):
+    r, _ = router
+    assert r.route("How long are Founders Cup halves?") == ["org:OYSA"]
+    assert r.route("What does Law 11 say?") == ["doc_type:laws"]
+
+
+def test_unrouted_question(router):
+    r, _ = router
+    assert r.route("How do I get assigned?") == []
+
+
+def test_candidates_stay_in_shard(router):
+    r, vectors = router
+    ids = r.candidates(vectors[25], ["doc_type:laws"], fetch_k=5)
+    assert ids[0] == 25
+    assert all(20 <= i < 30 for i in ids)
+    assert r.members(["org:NWSC", "doc_type:laws"]).tolist() == list(range(10)) + list(range(20, 30))
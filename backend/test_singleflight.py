@@ -0,0 +1,82 @@
+"""
+Tests for request coalescing (single-flight).
+"""
+
+import asyncio
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight("test")
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def main():
+        results = await asyncio.gather(*(flight.do("q", work) for _ in range(5)), flight.do("other", work))
+        again = await flight.do("q", work)  # finished calls are not reused
+        return results, again
+
+    results, again = asyncio.run(main())
+    assert results == ["answer"] * 6 and again == "answer"
+    assert len(calls) == 3
+    assert flight.stats() == {"in_flight": 0, "leaders": 3, "coalesced": 4, "coalesced_rate": 0.5714}
+
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight("test")
+
+    async def broken():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("quota exceeded")
+
+    async def main():
+        return await asyncio.gather(*(flight.do("q", broken) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(main())
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+def test_stream_fans_out_and_replays_to_late_joiners():
+    flight = SingleFlight("test")
+    upstream_runs = []
+
+    async def tokens():
+        upstream_runs.append(1)
+        for t in ("Off", "side", "!"):
+            await asyncio.sleep(0.01)
+            yield t
+
+    async def collect(delay):
+        await asyncio.sleep(delay)
+        return [t async for t in flight.stream("q", tokens)]
+
+    async def main():
+        return await asyncio.gather(collect(0), collect(0.015), collect(0))
+
+    assert asyncio.run(main()) == [["Off", "side", "!"]] * 3
+    assert len(upstream_runs) == 1
+    assert flight.stats()["coalesced"] == 2
+
+
+def test_stream_error_after_items():
+    flight = SingleFlight("test")
+
+    async def tokens():
+        yield "partial"
+        raise RuntimeError("stream broke")
+
+    async def main():
+        seen = []
+        with pytest.raises(RuntimeError):
+            async for t in flight.stream("q", tokens):
+                seen.append(t)
+        return seen
+
+    assert asyncio.run(main()) == ["partial"]
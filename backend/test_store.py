@@ -0,0 +1,134 @@
+"""
+Tests for single-flight vector store loading with retry backoff.
+"""
+
+import threading
+import time
+
+import pytest
+
+from backend import store
+
+
+@pytest.fixture
+def fresh_store(monkeypatch, tmp_path):
+    """Reset module state and point the store at an existing temp directory."""
+    monkeypatch.setattr(store, "VECTOR_STORE_PATH", tmp_path)
+    monkeypatch.setattr(store, "vector_store", None)
+    monkeypatch.setattr(store, "store_path", None)
+    monkeypatch.setattr(store, "load_state", "not_loaded")
+    monkeypatch.setattr(store, "_load_failures", 0)
+    monkeypatch.setattr(store, "_next_retry_at", 0.0)
+    return store
+
+
+def test_concurrent_callers_share_one_load(fresh_store, monkeypatch):
+    """Many threads hitting a cold store trigger exactly one load."""
+    calls = []
+
+    def slow_load():
+        calls.append(1)
+        time.sleep(0.05)
+        store.vector_store = object()
+        store.load_state = "ready"
+
+    monkeypatch.setattr(store, "_load_locked", slow_load)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(store.get_vector_store())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 1
+    assert len(set(map(id, results))) == 1 and results[0] is not None
+
+
+def test_failed_load_backs_off_then_retries(fresh_store, monkeypatch):
+    """A failed load is not retried until the backoff expires, then succeeds."""
+    monkeypatch.setattr(store, "LOAD_RETRY_SECONDS", 0.05)
+
+    def broken(path):
+        raise OSError("bad index")
+
+    monkeypatch.setattr(store, "_open_store", broken)
+    assert store.get_vector_store() is None
+    assert store.load_state == "failed"
+    assert store.load_error == "bad index"
+    # Within the backoff window, no new load is attempted
+    monkeypatch.setattr(store, "_open_store", lambda path: ("loaded", None))
+    assert store.get_vector_store() is None
+    time.sleep(0.06)
+    assert store.get_vector_store() == "loaded"
+    assert store.load_state == "ready"
+
+
+def test_warm_up_runs_on_its_own_thread_and_stops(fresh_store, monkeypatch):
+    """A warm-up retrying a broken store runs off the worker pool and ends on stop_warm_up."""
+    monkeypatch.setattr(store, "LOAD_RETRY_SECONDS", 0.01)
+    monkeypatch.setattr(store, "_open_store", lambda path: (_ for _ in ()).throw(OSError("bad index")))
+    monkeypatch.setattr(store, "get_lexical", lambda: None)
+    monkeypatch.setattr(store, "get_shard_router", lambda: None)
+    store.start_warm_up()
+    thread = next(t for t in threading.enumerate() if t.name == "vector-store-warm-up")
+    time.sleep(0.05)
+    assert thread.is_alive() and store.load_state == "failed"
+    store.stop_warm_up()
+    thread.join(1)
+    assert not thread.is_alive()
+
+
+def _publish(root, version: str, content: bytes):
+    from backend.versions import publish_version
+
+    path = root / "versions" / version
+    path.mkdir(parents=True)
+    (path / "index.faiss").write_bytes(content)
+    publish_version(root, path)
+    return path
+
+
+def test_reload_swaps_in_published_version(fresh_store, tmp_path, monkeypatch):
+    """A newly published version is loaded beside the live one and swapped in; an unchanged one is not."""
+    from types import SimpleNamespace
+
+    opened = []
+
+    def fake_open(path, embeddings=None):
+        opened.append((path.name, embeddings))
+        return SimpleNamespace(embeddings=embeddings or "model"), f"retriever-{path.name}"
+
+    monkeypatch.setattr(store, "_open_store", fake_open)
+    monkeypatch.setattr(store, "retriever", None)
+    monkeypatch.setattr(store, "lexical_index", None)
+    monkeypatch.setattr(store, "shard_router", None)
+    _publish(tmp_path, "v1", b"one")
+    assert store.get_vector_store() is not None
+    assert store.search_state()[0] == "retriever-v1"
+    assert store.reload_if_changed()["reason"] == "unchanged"
+
+    _publish(tmp_path, "v2", b"second")
+    old_version = store.vector_store_version
+    result = store.reload_if_changed()
+    assert result["reloaded"] and result["version"] == "v2" and result["previous"] == "v1"
+    assert store.search_state()[0] == "retriever-v2"
+    assert store.vector_store_version != old_version  # invalidates cached answers
+    assert opened[-1] == ("v2", "model")  # the embedding model is reused, not reloaded
+    assert store.load_status()["version"] == "v2"
+
+
+def test_failed_reload_keeps_serving_old_version(fresh_store, tmp_path, monkeypatch):
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(store, "_open_store", lambda path, embeddings=None: (SimpleNamespace(embeddings=None), "old"))
+    monkeypatch.setattr(store, "retriever", None)
+    _publish(tmp_path, "v1", b"one")
+    store.get_vector_store()
+
+    def broken(path, embeddings=None):
+        raise OSError("truncated index")
+
+    monkeypatch.setattr(store, "_open_store", broken)
+    _publish(tmp_path, "v2", b"second")
+    result = store.reload_if_changed()
+    assert not result["reloaded"] and "truncated index" in result["reason"]
+    assert store.retriever == "old" and store.load_status()["version"] == "v1"
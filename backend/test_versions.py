@@ -0,0 +1,25 @@
+"""
+Tests for versioned vector store directories and the CURRENT pointer.
+"""
+
+from backend.versions import CURRENT_FILE, VERSIONS_DIR, current_version, new_version_dir, publish_version, resolve_store_path
+
+
+def test_unversioned_store_resolves_to_root(tmp_path):
+    assert current_version(tmp_path) is None
+    assert resolve_store_path(tmp_path) == tmp_path
+
+
+def test_publish_points_current_at_version_and_prunes_old_ones(tmp_path):
+    published = []
+    for _ in range(4):
+        version = new_version_dir(tmp_path)
+        (version / "index.faiss").write_bytes(b"x")
+        publish_version(tmp_path, version, keep=2)
+        published.append(version)
+    assert len({v.name for v in published}) == 4  # same-second builds get distinct names
+    assert (tmp_path / CURRENT_FILE).read_text().strip() == published[-1].name
+    assert resolve_store_path(tmp_path) == published[-1]
+    remaining = sorted(p.name for p in (tmp_path / VERSIONS_DIR).iterdir())
+    assert remaining == [published[-2].name, published[-1].name]
+    assert not (tmp_path / f".{CURRENT_FILE}.tmp").exists()
@@ -0,0 +1,62 @@
+"""
+Versioned vector store directories with an atomic CURRENT pointer.
+
+ingest.py builds each store in vector_store/versions/<version>/ and only then
+points vector_store/CURRENT at it (write to a temp file, then os.replace), so a
+reader never sees a half-written index. The backend resolves CURRENT on every
+load and can hot-reload when it changes. A store directory without CURRENT
+(the layout before versioning) is used as-is.
+"""
+
+import os
+import shutil
+import time
+from pathlib import Path
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+
+
+def new_version_dir(root: Path) -> Path:
+    """A fresh, not yet published directory under root/versions (named by UTC build time)."""
+    name = time.strftime("%Y%m%dT%H%M%SZ", time.gmtime())
+    versions = root / VERSIONS_DIR
+    taken = [p.name for p in versions.iterdir()] if versions.exists() else []
+    same_second = [n for n in taken if n.startswith(name)]
+    if same_second:
+        # Names must sort in build order (publish_version prunes by name): never reuse a pruned one
+        suffixes = [int(n.rpartition("-")[2]) for n in same_second if "-" in n]
+        name = f"{name}-{max(suffixes, default=1) + 1:03d}"
+    path = versions / name
+    path.mkdir(parents=True)
+    return path
+
+
+def current_version(root: Path) -> str | None:
+    """Name of the published version, or None for an unversioned (legacy) store."""
+    try:
+        name = (root / CURRENT_FILE).read_text().strip()
+    except OSError:
+        return None
+    return name or None
+
+
+def resolve_store_path(root: Path) -> Path:
+    """Directory of the published version, or root itself for an unversioned store."""
+    name = current_version(root)
+    return root / VERSIONS_DIR / name if name else root
+
+
+def publish_version(root: Path, version_dir: Path, keep: int = 3) -> None:
+    """
+    Atomically point CURRENT at version_dir, then delete all but the newest `keep`
+    versions (never the published one). Servers still using an older version keep
+    their open files; they pick up the new one on their next reload.
+    """
+    tmp = root / f".{CURRENT_FILE}.tmp"
+    tmp.write_text(version_dir.name + "\n")
+    os.replace(tmp, root / CURRENT_FILE)
+    versions = sorted((p for p in (root / VERSIONS_DIR).iterdir() if p.is_dir()), key=lambda p: p.name)
+    for old in versions[:-keep] if keep > 0 else []:
+        if old.name != version_dir.name:
+            shutil.rmtree(old, ignore_errors=True)
@@ -0,0 +1,44 @@
+"""
+Dedicated, bounded thread pool for blocking work in request handlers.
+
+FastEmbed ONNX inference, FAISS search and the Google Sheets client are all
+synchronous. Running them here instead of on the asyncio event loop keeps one
+slow question from stalling every other request (/health, /license-status, ...).
+"""
+
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Max threads for blocking chat work (embedding, FAISS/MMR, logging)
+CHAT_WORKERS = int(os.environ.get("CHAT_WORKERS", "4"))
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared executor, creating it on first use."""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=CHAT_WORKERS, thread_name_prefix="osro-worker")
+    return _executor
+
+
+async def run_blocking(func, *args, **kwargs):
+    """Run a blocking function on the shared executor and await its result."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor() -> None:
+    """Wait for queued work to finish and stop the executor (called from lifespan shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True)
+            _executor = None
@@ -145,6 +145,7 @@ function App() {
   const [question, setQuestion] = useState('')
   const [messages, setMessages] = useState([])
   const [isLoading, setIsLoading] = useState(false)
+  const [isStreaming, setIsStreaming] = useState(false)
   
   // License lookup state
   const [showEmailPrompt, setShowEmailPrompt] = useState(false)
@@ -204,22 +205,7 @@ function App() {
     setIsLoading(true)
 
     try {
-      const response = await fetch(
-        `/api/chat?q=${encodeURIComponent(q)}`,
-        { method: 'GET' }
-      )
-
-      if (!response.ok) {
-        throw new Error('Failed to get response')
-      }
-
-      const data = await response.json()
-      const assistantMessage = {
-        role: 'assistant',
-        content: data.answer,
-        sources: data.sources,
-      }
-      setMessages((prev) => [...prev, assistantMessage])
+      await streamAnswer(q)
     } catch (error) {
       const errorMessage = {
         role: 'assistant',
@@ -227,10 +213,52 @@ function App() {
       }
       setMessages((prev) => [...prev, errorMessage])
     } finally {
+      setIsStreaming(false)
       setIsLoading(false)
     }
   }
 
+  // Stream an answer from /api/chat/stream (Server-Sent Events): `sources` first,
+  // then `token` events appended to the assistant message as they arrive, then `done`.
+  const streamAnswer = (q) =>
+    new Promise((resolve, reject) => {
+      const source = new EventSource(`/api/chat/stream?q=${encodeURIComponent(q)}`)
+      let sources = []
+      let started = false
+
+      source.addEventListener('sources', (e) => {
+        sources = JSON.parse(e.data).sources || []
+      })
+      source.addEventListener('token', (e) => {
+        const { text } = JSON.parse(e.data)
+        if (!started) {
+          started = true
+          setIsStreaming(true)
+          setMessages((prev) => [...prev, { role: 'assistant', content: text, sources }])
+          return
+        }
+        setMessages((prev) => {
+          const last = prev[prev.length - 1]
+          return [...prev.slice(0, -1), { ...last, content: last.content + text }]
+        })
+      })
+      source.addEventListener('done', () => {
+        source.close()
+        if (!started) {
+          setMessages((prev) => [...prev, { role: 'assistant', content: '', sources }])
+        }
+        resolve()
+      })
+      // Fires for both server `error` events and connection failures
+      source.addEventListener('error', () => {
+        source.close()
+        if (started) {
+          setMessages((prev) => prev.slice(0, -1))
+        }
+        reject(new Error('Failed to get response'))
+      })
+    })
+
   const handleLicenseLookup = async (e) => {
     e.preventDefault()
     const email = licenseEmail.trim()
@@ -474,7 +502,7 @@ function App() {
             </div>
           )}
           {/* Loading indicator */}
-          {(isLoading || licenseLoading) && (
+          {((isLoading && !isStreaming) || licenseLoading) && (
             <div className="flex justify-start">
               <div className="bg-white rounded-2xl rounded-bl-md px-4 py-3 shadow-md border border-gray-100">
                 <div className="flex space-x-2">
@@ -4,7 +4,12 @@ Ingest script for Oregon Soccer Referee Concierge.
 This script handles document ingestion and vector store creation.
 """
 
+import argparse
+import json
 import os
+import re
+import shutil
+import time
 from pathlib import Path
 
 # Load .env file if it exists (before importing modules that need env vars)
@@ -29,6 +34,14 @@ from langchain_community.document_loaders import DirectoryLoader, TextLoader, Py
 from langchain_core.documents import Document
 
 import reftown_auth
+from backend.ann import (
+    COMPRESSED_INDEX_TYPES, INDEX_TYPES, build_index, read_index_meta, reconstruct_all, resolve_params,
+    write_index_meta,
+)
+from backend.chunk_store import CHUNKS_FILE, ChunkStore
+from backend.lexical import BM25_FILE, BM25Index
+from backend.shards import MANIFEST_FILE, SHARDS_DIR, shard_name
+from backend.versions import new_version_dir, publish_version
 from langchain_community.vectorstores import FAISS
 from langchain_community.embeddings import FastEmbedEmbeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
@@ -253,33 +266,211 @@ def load_documents() -> list:
 
 
 def split_documents(documents: list) -> list:
-    """Split documents into chunks for embedding. Uses markdown-aware separators and larger chunks."""
+    """
+    Split documents into chunks for embedding. Uses markdown-aware separators and larger chunks.
+    Each chunk records its start_index so the backend can merge overlapping neighbours.
+    """
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=1200,
         chunk_overlap=250,
         length_function=len,
         separators=["\n## ", "\n### ", "\n\n", "\n", " "],
+        add_start_index=True,
     )
     chunks = text_splitter.split_documents(documents)
     print(f"Split into {len(chunks)} chunks")
     return chunks
 
 
-def create_vector_store(chunks: list, store_path: Path) -> FAISS:
-    """Create and save FAISS vector store from document chunks."""
+def create_vector_store(chunks: list, store_path: Path, index_type: str = "flat",
+                        params: dict | None = None) -> FAISS:
+    """
+    Create and save FAISS vector store from document chunks.
+    index_type picks the FAISS index (see backend/ann.py); the choice and its
+    parameters are saved to index_meta.json for the backend. Chunk text and
+    metadata go to chunks.sqlite (row i = FAISS row i) instead of a pickle.
+    """
+    import faiss
+    from langchain_community.docstore.in_memory import InMemoryDocstore
+    import numpy as np
+
     embeddings = FastEmbedEmbeddings(model_name="BAAI/bge-small-en-v1.5")
-    
-    vector_store = FAISS.from_documents(chunks, embeddings)
-    
+    vectors = np.asarray(embeddings.embed_documents([chunk.page_content for chunk in chunks]), dtype=np.float32)
+    index, params = build_index(vectors, index_type, params)
+
+    ids = [str(i) for i in range(len(chunks))]
+    vector_store = FAISS(
+        embedding_function=embeddings,
+        index=index,
+        docstore=InMemoryDocstore(dict(zip(ids, chunks))),
+        index_to_docstore_id=dict(enumerate(ids)),
+    )
+
     store_path.mkdir(parents=True, exist_ok=True)
-    vector_store.save_local(str(store_path))
-    print(f"Vector store saved to {store_path}")
-    
+    faiss.write_index(index, str(store_path / "index.faiss"))
+    ChunkStore.write(store_path / CHUNKS_FILE, chunks)
+    (store_path / "index.pkl").unlink(missing_ok=True)  # pickled docstore from older ingests
+    write_index_meta(store_path, index_type, params, vectors.shape[1], len(chunks))
+    print(f"Vector store ({index_type}, {len(chunks)} vectors) saved to {store_path}")
+
     return vector_store
 
 
+def index_report(vector_store: FAISS, store_path: Path, k: int = 5, queries: int = 200) -> dict:
+    """
+    Compare every index type against exact (flat) search on this corpus: recall@k,
+    mean per-query latency, serialized size and the backend's resident size for it
+    (flat and HNSW also keep a float32 copy of every vector for MMR; IVF-PQ and SQ8
+    do not, IVF adds an 8-byte id map per vector). Queries are stored chunk vectors
+    plus a little noise, so they land near but not exactly on indexed points.
+    Writes <store>/index_report.json and prints a table.
+    """
+    import faiss
+    import numpy as np
+
+    vectors = reconstruct_all(vector_store.index)
+    rng = np.random.default_rng(0)
+    sample = vectors[rng.choice(len(vectors), size=min(queries, len(vectors)), replace=False)]
+    noisy = sample + rng.normal(scale=0.01, size=sample.shape).astype(np.float32)
+
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(noisy, k)
+
+    results = {}
+    for index_type in INDEX_TYPES:
+        try:
+            index, params = build_index(vectors, index_type)
+        except ValueError as e:
+            results[index_type] = {"skipped": str(e)}
+            continue
+        started = time.perf_counter()
+        for q in noisy:
+            index.search(q.reshape(1, -1), k)
+        latency_ms = (time.perf_counter() - started) * 1000 / len(noisy)
+        _, found = index.search(noisy, k)
+        recall = np.mean([len(set(f) & set(t)) / k for f, t in zip(found, truth)])
+        size_bytes = int(faiss.serialize_index(index).nbytes)
+        if index_type in COMPRESSED_INDEX_TYPES:
+            runtime_bytes = size_bytes + (8 * len(vectors) if index_type == "ivfpq" else 0)
+        else:
+            runtime_bytes = size_bytes + vectors.nbytes
+        results[index_type] = {
+            "params": params,
+            f"recall@{k}": round(float(recall), 4),
+            "latency_ms": round(latency_ms, 4),
+            "size_bytes": size_bytes,
+            "runtime_bytes": runtime_bytes,
+        }
+
+    report = {"vectors": len(vectors), "dim": int(vectors.shape[1]), "queries": len(noisy), "k": k,
+              "results": results}
+    (store_path / "index_report.json").write_text(json.dumps(report, indent=2))
+    print(f"{'index':<8}{'recall@' + str(k):>10}{'ms/query':>10}{'size KB':>10}{'RAM KB':>10}")
+    for index_type, row in results.items():
+        if "skipped" in row:
+            print(f"{index_type:<8}  skipped: {row['skipped']}")
+        else:
+            print(f"{index_type:<8}{row[f'recall@{k}']:>10.3f}{row['latency_ms']:>10.3f}{row['size_bytes'] / 1024:>10.0f}"
+                  f"{row['runtime_bytes'] / 1024:>10.0f}")
+    return report
+
+
+def create_lexical_index(chunks: list, store_path: Path) -> BM25Index:
+    """Build the BM25 index over the same chunks (row i = FAISS row i) and save it next to the vector store."""
+    index = BM25Index.build([chunk.page_content for chunk in chunks])
+    store_path.mkdir(parents=True, exist_ok=True)
+    index.save(store_path / BM25_FILE)
+    print(f"Lexical index ({len(index.terms)} terms) saved to {store_path / BM25_FILE}")
+    return index
+
+
+def _org_aliases(chunks: list) -> dict[str, list[str]]:
+    """
+    Names each org is known by: the data/orgs/<Club> folder name plus the full name and
+    abbreviation from titles like "Lake Oswego Soccer Club (LOSC) - Referee Information".
+    """
+    aliases: dict[str, set[str]] = {}
+    for chunk in chunks:
+        org = chunk.metadata.get("org")
+        if not org:
+            continue
+        names = aliases.setdefault(org, {org, org.replace("_", " ").replace("-", " ")})
+        m = re.match(r"^(.*?)\s*(?:\(([^)]+)\))?\s*-\s*Referee Information", chunk.metadata.get("title") or "")
+        if m:
+            names.add(m.group(1).strip())
+            if m.group(2):
+                names.add(m.group(2).strip())
+    return {shard_name("org", org): sorted(names) for org, names in aliases.items()}
+
+
+def create_shards(vector_store: FAISS, chunks: list, store_path: Path) -> dict:
+    """
+    Write one sub-index per org and per doc_type under <store>/shards/, holding the
+    same vectors as the global index with global row ids, plus a manifest for routing.
+    Shards of a compressed (IVF-PQ, SQ8) store reuse the global index's trained encoding,
+    so together they cost what the global index does; other stores get flat shards.
+    """
+    import faiss
+    import numpy as np
+
+    meta = read_index_meta(store_path) or {}
+    shard_type = meta.get("index_type", "flat") if meta.get("index_type") in COMPRESSED_INDEX_TYPES else "flat"
+    vectors = reconstruct_all(vector_store.index)
+    groups: dict[tuple[str, str], list[int]] = {}
+    for i, chunk in enumerate(chunks):
+        for kind in ("org", "doc_type"):
+            value = chunk.metadata.get(kind)
+            if value:
+                groups.setdefault((kind, value), []).append(i)
+
+    shard_dir = store_path / SHARDS_DIR
+    shard_dir.mkdir(parents=True, exist_ok=True)
+    for old in shard_dir.glob("*.faiss"):
+        old.unlink()
+    shards = []
+    for (kind, value), ids in sorted(groups.items()):
+        if shard_type == "flat":
+            index = faiss.IndexIDMap2(faiss.IndexFlatL2(vectors.shape[1]))
+        else:
+            codec = faiss.clone_index(vector_store.index)
+            codec.reset()  # keeps the trained quantizers, drops the vectors
+            index = faiss.IndexIDMap2(codec)
+        index.add_with_ids(vectors[ids], np.array(ids, dtype=np.int64))
+        filename = f"{kind}-{re.sub(r'[^A-Za-z0-9_-]+', '_', value)}.faiss"
+        faiss.write_index(index, str(shard_dir / filename))
+        shards.append({"name": shard_name(kind, value), "kind": kind, "value": value,
+                       "file": filename, "count": len(ids)})
+    manifest = {"shards": shards, "aliases": _org_aliases(chunks), "index_type": shard_type,
+                "params": meta.get("params", {}) if shard_type != "flat" else {}}
+    (shard_dir / MANIFEST_FILE).write_text(json.dumps(manifest, indent=2))
+    print(f"Wrote {len(shards)} {shard_type} shards to {shard_dir}")
+    return manifest
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Ingest documents and build the vector store.")
+    parser.add_argument("--index-type", choices=INDEX_TYPES, default=os.environ.get("INDEX_TYPE", "flat"),
+                        help="FAISS index type (default: $INDEX_TYPE or flat)")
+    parser.add_argument("--hnsw-m", dest="m", type=int, help="HNSW neighbors per node")
+    parser.add_argument("--ef-construction", type=int, help="HNSW build-time candidate list size")
+    parser.add_argument("--ef-search", type=int, help="HNSW search-time candidate list size")
+    parser.add_argument("--nlist", type=int, help="IVF-PQ inverted lists (default ~4*sqrt(n))")
+    parser.add_argument("--pq-m", type=int, help="IVF-PQ sub-quantizers (must divide the dimension)")
+    parser.add_argument("--nprobe", type=int, help="IVF-PQ lists probed per query")
+    parser.add_argument("--index-report", action="store_true",
+                        help="Compare recall/latency/size of every index type on this corpus")
+    parser.add_argument("--keep-versions", type=int, default=3,
+                        help="Published store versions to keep under vector_store/versions (default 3)")
+    return parser.parse_args()
+
+
 def main():
     """Main ingestion pipeline."""
+    args = parse_args()
+    overrides = {key: getattr(args, key) for key in ("m", "ef_construction", "ef_search", "nlist", "pq_m", "nprobe")}
+    params = resolve_params(args.index_type, overrides)
+
     print("Starting document ingestion...")
     
     # Load documents from subdirectories
@@ -292,8 +483,20 @@ def main():
     # Split documents into chunks
     chunks = split_documents(documents)
     
-    # Create vector store
-    create_vector_store(chunks, VECTOR_STORE_PATH)
+    # Build the vector store, the matching BM25 lexical index, and org/doc_type shards in a new
+    # version directory, then publish it: running servers hot-reload once CURRENT points at it
+    version_dir = new_version_dir(VECTOR_STORE_PATH)
+    try:
+        vector_store = create_vector_store(chunks, version_dir, args.index_type, params)
+        create_lexical_index(chunks, version_dir)
+        create_shards(vector_store, chunks, version_dir)
+        if args.index_report:
+            index_report(vector_store, version_dir)
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)  # never leave a half-built version behind
+        raise
+    publish_version(VECTOR_STORE_PATH, version_dir, keep=args.keep_versions)
+    print(f"Published vector store version {version_dir.name}")
     
     print("Ingestion complete!")
 
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: LangChain FAISS MMR vs. the NumPy MMRRetriever (backend/retrieval.py).
+
+Uses synthetic embeddings (no model, no network), sized like the real index by default.
+
+Usage:
+    ./scripts/bench_mmr.py [--chunks 5000] [--dim 384] [--queries 200] [--k 5] [--fetch-k 20]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Allow importing backend when run as ./scripts/bench_mmr.py
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+
+from backend.retrieval import MMRRetriever
+
+
+class _TableEmbeddings(Embeddings):
+    """Looks up precomputed vectors by text."""
+
+    def __init__(self, table: dict):
+        self.table = table
+
+    def embed_documents(self, texts):
+        return [self.table[t].tolist() for t in texts]
+
+    def embed_query(self, text):
+        return self.table[text].tolist()
+
+
+def _time_per_call(fn, queries) -> list[float]:
+    """Run fn once per query; return per-call latency in microseconds."""
+    times = []
+    for q in queries:
+        start = time.perf_counter()
+        fn(q)
+        times.append((time.perf_counter() - start) * 1e6)
+    return times
+
+
+def _report(name: str, times: list[float]) -> None:
+    times = sorted(times)
+    p95 = times[int(0.95 * (len(times) - 1))]
+    print(f"  {name:<28} mean {statistics.mean(times):9.1f} us   p50 {statistics.median(times):9.1f} us   p95 {p95:9.1f} us")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LangChain MMR vs NumPy MMR.")
+    parser.add_argument("--chunks", type=int, default=5000, help="Number of indexed chunks")
+    parser.add_argument("--dim", type=int, default=384, help="Embedding dimension (bge-small = 384)")
+    parser.add_argument("--queries", type=int, default=200, help="Number of queries to time")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.normal(size=(args.chunks, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    texts = [f"chunk {i}" for i in range(args.chunks)]
+    store = FAISS.from_texts(texts, _TableEmbeddings(dict(zip(texts, vectors))))
+    retriever = MMRRetriever.from_langchain(store)
+    queries = rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+    query_lists = [q.tolist() for q in queries]
+
+    print(f"{args.chunks} chunks x {args.dim} dims, {args.queries} queries, k={args.k}, fetch_k={args.fetch_k}")
+    lc = _time_per_call(
+        lambda q: store.max_marginal_relevance_search_by_vector(q, k=args.k, fetch_k=args.fetch_k), query_lists)
+    _report("LangChain FAISS MMR", lc)
+    np_times = _time_per_call(
+        lambda q: retriever.documents(retriever.search(q, k=args.k, fetch_k=args.fetch_k)), queries)
+    _report("MMRRetriever.search", np_times)
+
+    start = time.perf_counter()
+    retriever.search_batch(queries, k=args.k, fetch_k=args.fetch_k)
+    batch_us = (time.perf_counter() - start) * 1e6 / args.queries
+    print(f"  {'MMRRetriever.search_batch':<28} mean {batch_us:9.1f} us per query")
+    print(f"Speedup (mean, single query): {statistics.mean(lc) / statistics.mean(np_times):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Offline retrieval benchmark: golden referee questions against the built vector_store/.
+
+For every question in scripts/golden_questions.json, times the three retrieval stages
+separately -- query embedding (FastEmbed, bypassing the query cache), candidate search
+(shard routing, FAISS, BM25 fusion) and MMR selection -- and checks the retrieved
+chunks against the expected sources. Reports p50/p95/p99 per stage and recall@k, and
+writes everything as JSON so index or parameter changes can be compared run to run.
+
+Runs without network access once the embedding model is in the local FastEmbed cache
+(it is after any ingest). Pass --allow-download to fetch it if missing.
+
+Usage:
+    ./scripts/bench_retrieval.py [--store vector_store] [--k 5] [--fetch-k 20] [--repeat 5]
+                                 [--output bench_retrieval.json] [--baseline previous.json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+# Allow importing backend when run as ./scripts/bench_retrieval.py
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+GOLDEN_FILE = Path(__file__).parent / "golden_questions.json"
+STAGES = ("embed", "search", "mmr")
+
+
+def _percentiles(times: list[float]) -> dict:
+    times = sorted(times)
+
+    def pct(p):
+        return times[min(len(times) - 1, int(round(p / 100 * (len(times) - 1))))]
+
+    return {
+        "p50": round(pct(50), 3),
+        "p95": round(pct(95), 3),
+        "p99": round(pct(99), 3),
+        "mean": round(statistics.mean(times), 3),
+    }
+
+
+def _matches(doc, expected: str) -> bool:
+    expected = expected.lower()
+    meta = doc.metadata
+    return any(expected in str(meta.get(key) or "").lower() for key in ("source", "title"))
+
+
+def _label(doc) -> str:
+    return doc.metadata.get("title") or doc.metadata.get("source", "Unknown")
+
+
+def run(store_path: Path, golden: list[dict], k: int, fetch_k: int, repeat: int) -> dict:
+    from backend import store as store_state
+    from backend.ann import read_index_meta
+    from backend.retrieval import LEXICAL_WEIGHT, retrieve_candidates
+
+    store_state.VECTOR_STORE_PATH = store_path
+    started = time.perf_counter()
+    store = store_state.get_vector_store()
+    if store is None:
+        raise SystemExit(f"Could not load the vector store from {store_path}: {store_state.load_error}")
+    load_seconds = time.perf_counter() - started
+    retriever = store_state.retriever
+    lexical = store_state.get_lexical()
+    router = store_state.get_shard_router()
+    model = store.embeddings.inner  # bypass the query embedding cache: time real inference
+    model.embed_query("warm up")
+
+    timings = {stage: [] for stage in STAGES}
+    results = []
+    for item in golden:
+        question = item["question"]
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            query = np.asarray(model.embed_query(question), dtype=np.float32)
+            t1 = time.perf_counter()
+            candidates = retrieve_candidates(question, query, retriever, lexical, router, k, fetch_k)
+            t2 = time.perf_counter()
+            ids = retriever.search_in(query, candidates, k=k)
+            t3 = time.perf_counter()
+            timings["embed"].append((t1 - t0) * 1000)
+            timings["search"].append((t2 - t1) * 1000)
+            timings["mmr"].append((t3 - t2) * 1000)
+        docs = retriever.documents(ids)
+        expected = item["expected_sources"]
+        found = [e for e in expected if any(_matches(doc, e) for doc in docs)]
+        results.append({
+            "question": question,
+            "expected_sources": expected,
+            "retrieved": [_label(doc) for doc in docs],
+            "recall": len(found) / len(expected),
+            "rank": next((rank + 1 for rank, doc in enumerate(docs) if any(_matches(doc, e) for e in expected)), None),
+        })
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "store": {
+            "path": str(store_path),
+            "index_type": (read_index_meta(store_path) or {}).get("index_type", "flat"),
+            "vectors": len(retriever),
+            "lexical_index": lexical is not None,
+            "shards": len(router.indexes) if router is not None else 0,
+            "load_seconds": round(load_seconds, 3),
+        },
+        "params": {"k": k, "fetch_k": fetch_k, "repeat": repeat, "lexical_weight": LEXICAL_WEIGHT},
+        "latency_ms": {stage: _percentiles(times) for stage, times in timings.items()},
+        f"recall@{k}": round(statistics.mean(r["recall"] for r in results), 4),
+        f"hit_rate@{k}": round(sum(r["rank"] is not None for r in results) / len(results), 4),
+        "questions": results,
+    }
+
+
+def _print_report(report: dict, baseline: dict | None) -> None:
+    k = report["params"]["k"]
+    store = report["store"]
+    print(f"{store['vectors']} vectors ({store['index_type']}), {len(report['questions'])} questions "
+          f"x {report['params']['repeat']}, k={k}, fetch_k={report['params']['fetch_k']}")
+    for stage in STAGES:
+        row = report["latency_ms"][stage]
+        line = f"  {stage:<7} p50 {row['p50']:8.3f} ms   p95 {row['p95']:8.3f} ms   p99 {row['p99']:8.3f} ms"
+        if baseline:
+            before = baseline["latency_ms"][stage]["p50"]
+            line += f"   (p50 was {before:.3f} ms)"
+        print(line)
+    for metric in (f"recall@{k}", f"hit_rate@{k}"):
+        line = f"  {metric:<12} {report[metric]:.3f}"
+        if baseline and metric in baseline:
+            line += f"   (was {baseline[metric]:.3f})"
+        print(line)
+    misses = [r for r in report["questions"] if r["rank"] is None]
+    for r in misses:
+        print(f"  MISS: {r['question']}  -> {r['retrieved']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline retrieval latency and recall benchmark.")
+    parser.add_argument("--store", type=Path, default=ROOT_DIR / "vector_store", help="Vector store directory")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_FILE, help="Golden questions JSON")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5, help="Timed runs per question")
+    parser.add_argument("--output", type=Path, default=Path("bench_retrieval.json"), help="Where to write the JSON report")
+    parser.add_argument("--baseline", type=Path, help="Earlier JSON report to compare against")
+    parser.add_argument("--allow-download", action="store_true", help="Allow fetching the embedding model")
+    args = parser.parse_args()
+
+    if not args.allow_download:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    golden = json.loads(args.golden.read_text())["questions"]
+    report = run(args.store, golden, args.k, args.fetch_k, args.repeat)
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    _print_report(report, baseline)
+    args.output.write_text(json.dumps(report, indent=2))
+    print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -45,7 +45,8 @@ gcloud run deploy osro-agent-api \
   --execution-environment gen2 \
   --ingress all \
   --allow-unauthenticated \
-  --set-env-vars "GOOGLE_API_KEY=${GOOGLE_API_KEY}" \
+  --set-env-vars "GOOGLE_API_KEY=${GOOGLE_API_KEY},WARMUP_ON_STARTUP=1" \
+  --startup-probe "httpGet.path=/readyz,periodSeconds=10,timeoutSeconds=5,failureThreshold=24" \
   --memory 1Gi \
   --min-instances 1
 
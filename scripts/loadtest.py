@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+End-to-end load test: drives /chat, /license-status and /feedback at a target
+concurrency and reports throughput, latency percentiles and errors per endpoint.
+
+By default it starts everything locally with no external calls: the Gemini and
+USSF stand-ins (scripts/loadtest_fakes.py fakes) and the backend wired to them,
+with a fake Google Sheets client behind the chat/feedback log. The fakes' latency
+and error rates are configurable, so you can see how the backend behaves when
+Gemini slows down or the USSF API starts failing. Pass --target to load an
+already-running backend instead (then the fakes are not started).
+
+Chat questions come from scripts/golden_questions.json. Repeated questions hit the
+answer cache; pass --unique-questions to make every chat request a cache miss.
+
+Usage:
+    ./scripts/loadtest.py [--concurrency 20] [--duration 30] [--mix chat=6,license=3,feedback=1]
+                          [--gemini-latency-ms 800] [--gemini-error-rate 0.02]
+                          [--ussf-latency-ms 150] [--ussf-error-rate 0.0]
+                          [--sheets-latency-ms 300] [--sheets-error-rate 0.0]
+                          [--target http://127.0.0.1:8000] [--output loadtest.json]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+
+ROOT_DIR = Path(__file__).parent.parent
+FAKES_SCRIPT = Path(__file__).parent / "loadtest_fakes.py"
+GOLDEN_FILE = Path(__file__).parent / "golden_questions.json"
+ENDPOINTS = ("chat", "license", "feedback")
+
+
+def _parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint in --mix: {name!r} (choose from {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return {name: weight for name, weight in mix.items() if weight > 0}
+
+
+def _percentiles(times: list[float]) -> dict:
+    if not times:
+        return {}
+    times = sorted(times)
+
+    def pct(p):
+        return times[min(len(times) - 1, int(round(p / 100 * (len(times) - 1))))]
+
+    return {
+        "p50": round(pct(50), 1),
+        "p95": round(pct(95), 1),
+        "p99": round(pct(99), 1),
+        "max": round(times[-1], 1),
+        "mean": round(statistics.mean(times), 1),
+    }
+
+
+class Workload:
+    """Builds one request per call for the chosen endpoint."""
+
+    def __init__(self, questions: list[str], unique_questions: bool):
+        self.questions = questions
+        self.unique_questions = unique_questions
+        self._counter = itertools.count()
+
+    def request(self, endpoint: str) -> tuple[str, str, dict]:
+        n = next(self._counter)
+        if endpoint == "chat":
+            question = random.choice(self.questions)
+            if self.unique_questions:
+                question = f"{question} (load test {n})"
+            return "POST", "/chat", {"json": {"question": question}}
+        if endpoint == "license":
+            # The USSF fake knows every address at example.com; one in five is unknown (404 path)
+            domain = "example.org" if n % 5 == 4 else "example.com"
+            return "GET", "/license-status", {"params": {"email": f"referee{n % 500}@{domain}"}}
+        return "POST", "/feedback", {"json": {"name": "load test", "description": f"Load test feedback {n}"}}
+
+
+async def run_load(base_url: str, mix: dict[str, float], workload: Workload, concurrency: int,
+                   duration: float, timeout: float) -> dict:
+    """Run concurrency workers for duration seconds; return per-endpoint latencies and outcomes."""
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    latencies = {name: [] for name in names}
+    outcomes = {name: Counter() for name in names}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    deadline = time.perf_counter() + duration
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def worker():
+            while time.perf_counter() < deadline:
+                endpoint = random.choices(names, weights)[0]
+                method, path, kwargs = workload.request(endpoint)
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path, **kwargs)
+                    outcome = str(response.status_code)
+                except httpx.TimeoutException:
+                    outcome = "timeout"
+                except httpx.HTTPError as e:
+                    outcome = type(e).__name__
+                latencies[endpoint].append((time.perf_counter() - started) * 1000)
+                outcomes[endpoint][outcome] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    endpoints = {}
+    for name in names:
+        total = sum(outcomes[name].values())
+        errors = sum(count for outcome, count in outcomes[name].items()
+                     if not (outcome.isdigit() and int(outcome) < 500 and outcome != "429"))
+        endpoints[name] = {
+            "requests": total,
+            "throughput_rps": round(total / elapsed, 2),
+            "errors": errors,
+            "error_rate": round(errors / total, 4) if total else 0.0,
+            "status": dict(sorted(outcomes[name].items())),
+            "latency_ms": _percentiles(latencies[name]),
+        }
+    total = sum(e["requests"] for e in endpoints.values())
+    all_latencies = [t for name in names for t in latencies[name]]
+    return {
+        "elapsed_seconds": round(elapsed, 2),
+        "requests": total,
+        "throughput_rps": round(total / elapsed, 2),
+        "errors": sum(e["errors"] for e in endpoints.values()),
+        "latency_ms": _percentiles(all_latencies),
+        "endpoints": endpoints,
+    }
+
+
+def _wait_ready(url: str, timeout: float, processes: list) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        for proc in processes:
+            if proc.poll() is not None:
+                raise SystemExit(f"{' '.join(proc.args)} exited with status {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise SystemExit(f"Timed out waiting for {url}")
+
+
+def start_local_stack(args) -> tuple[str, list]:
+    """Start the fakes and a backend pointed at them; return (backend URL, processes)."""
+    fakes_url = f"http://127.0.0.1:{args.fakes_port}"
+    fakes = subprocess.Popen([
+        sys.executable, str(FAKES_SCRIPT), "fakes", "--port", str(args.fakes_port),
+        "--gemini-latency-ms", str(args.gemini_latency_ms), "--gemini-error-rate", str(args.gemini_error_rate),
+        "--ussf-latency-ms", str(args.ussf_latency_ms), "--ussf-error-rate", str(args.ussf_error_rate),
+    ], cwd=ROOT_DIR)
+    processes = [fakes]
+    _wait_ready(f"{fakes_url}/docs", 30, processes)
+
+    env = {
+        **os.environ,
+        "GEMINI_API_KEY": "loadtest",
+        "GEMINI_BASE_URL": fakes_url,
+        "USSF_API_BASE_URL": f"{fakes_url}/certifications/public",
+    }
+    backend = subprocess.Popen([
+        sys.executable, str(FAKES_SCRIPT), "backend", "--port", str(args.backend_port),
+        "--sheets-latency-ms", str(args.sheets_latency_ms), "--sheets-error-rate", str(args.sheets_error_rate),
+    ], cwd=ROOT_DIR, env=env)
+    processes.append(backend)
+    base_url = f"http://127.0.0.1:{args.backend_port}"
+    _wait_ready(f"{base_url}/livez", 60, processes)
+    # /chat needs the vector store; wait for it so the first seconds do not measure 503s
+    _wait_ready(f"{base_url}/readyz", args.ready_timeout, processes)
+    return base_url, processes
+
+
+def _print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['elapsed_seconds']} s "
+          f"({report['throughput_rps']} req/s) at concurrency {report['params']['concurrency']}, "
+          f"{report['errors']} errors")
+    for name, row in report["endpoints"].items():
+        lat = row["latency_ms"]
+        print(f"  {name:<9} {row['requests']:>6} req  {row['throughput_rps']:>7.2f} req/s  "
+              f"p50 {lat.get('p50', 0):>7.1f}  p95 {lat.get('p95', 0):>7.1f}  p99 {lat.get('p99', 0):>7.1f}  "
+              f"max {lat.get('max', 0):>7.1f} ms  errors {row['errors']}  {row['status']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="End-to-end load test against local fakes.")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent clients")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--mix", default="chat=6,license=3,feedback=1", help="Endpoint weights")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--unique-questions", action="store_true", help="Make every chat question a cache miss")
+    parser.add_argument("--golden", type=Path, default=GOLDEN_FILE, help="Questions JSON")
+    parser.add_argument("--target", help="Load an already-running backend at this URL (no fakes started)")
+    parser.add_argument("--fakes-port", type=int, default=9100)
+    parser.add_argument("--backend-port", type=int, default=8181)
+    parser.add_argument("--ready-timeout", type=float, default=300, help="Seconds to wait for /readyz")
+    parser.add_argument("--gemini-latency-ms", type=float, default=800)
+    parser.add_argument("--gemini-error-rate", type=float, default=0.0)
+    parser.add_argument("--ussf-latency-ms", type=float, default=150)
+    parser.add_argument("--ussf-error-rate", type=float, default=0.0)
+    parser.add_argument("--sheets-latency-ms", type=float, default=300)
+    parser.add_argument("--sheets-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", type=Path, help="Write the JSON report here")
+    args = parser.parse_args()
+
+    mix = _parse_mix(args.mix)
+    questions = [item["question"] for item in json.loads(args.golden.read_text())["questions"]]
+    processes = []
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            base_url, processes = start_local_stack(args)
+        result = asyncio.run(run_load(base_url, mix, Workload(questions, args.unique_questions),
+                                      args.concurrency, args.duration, args.timeout))
+    finally:
+        for proc in processes:
+            proc.terminate()
+        for proc in processes:
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    report = {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "target": args.target or "local fakes",
+        "params": {
+            "concurrency": args.concurrency, "duration": args.duration, "mix": mix,
+            "unique_questions": args.unique_questions,
+        },
+        **result,
+    }
+    if not args.target:
+        report["fakes"] = {
+            "gemini": {"latency_ms": args.gemini_latency_ms, "error_rate": args.gemini_error_rate},
+            "ussf": {"latency_ms": args.ussf_latency_ms, "error_rate": args.ussf_error_rate},
+            "sheets": {"latency_ms": args.sheets_latency_ms, "error_rate": args.sheets_error_rate},
+        }
+    _print_report(report)
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2))
+        print(f"Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Local stand-ins for the services the backend calls, for scripts/loadtest.py.
+
+- Gemini API: generateContent and streamGenerateContent (SSE) on /v1beta/models/...
+  Point the backend at it with GEMINI_BASE_URL.
+- USSF certification API: /certifications/public/users and .../user-licenses.
+  Point the backend at it with USSF_API_BASE_URL.
+- Google Sheets: FakeSheetsClient, a gspread look-alike patched into
+  backend.chat_log by the `backend` command (gspread's endpoints are not configurable).
+
+Each fake has a configurable latency (mean, with uniform jitter) and error rate.
+
+Usage:
+    ./scripts/loadtest_fakes.py fakes --port 9100 [--gemini-latency-ms 800] [--gemini-error-rate 0.02] ...
+    ./scripts/loadtest_fakes.py backend --port 8181 [--sheets-latency-ms 300] [--sheets-error-rate 0.05]
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Allow importing backend when run as ./scripts/loadtest_fakes.py
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+ANSWER = ("Under Law 11, a player is in an offside position if any part of the head, body or feet "
+          "is in the opponents' half and nearer to the opponents' goal line than both the ball and "
+          "the second-last opponent. Being in an offside position is not an offence in itself.")
+KNOWN_EMAIL_DOMAIN = "example.com"  # USSF fake: emails at this domain exist, others get 404
+
+
+class Fault:
+    """Latency (mean +/- jitter, in ms) and error injection for one fake service."""
+
+    def __init__(self, latency_ms: float = 0.0, jitter: float = 0.5, error_rate: float = 0.0):
+        self.latency_ms = latency_ms
+        self.jitter = jitter
+        self.error_rate = error_rate
+
+    def delay(self) -> float:
+        spread = self.latency_ms * self.jitter
+        return max(0.0, random.uniform(self.latency_ms - spread, self.latency_ms + spread)) / 1000
+
+    def fails(self) -> bool:
+        return random.random() < self.error_rate
+
+
+def _gemini_chunk(text: str, finish: bool) -> dict:
+    candidate = {"content": {"parts": [{"text": text}], "role": "model"}, "index": 0}
+    if finish:
+        candidate["finishReason"] = "STOP"
+    return {"candidates": [candidate]}
+
+
+def create_fake_app(gemini: Fault, ussf: Fault, tokens: int = 20):
+    """FastAPI app serving the Gemini and USSF stand-ins."""
+    from fastapi import FastAPI
+    from fastapi.responses import JSONResponse, StreamingResponse
+
+    app = FastAPI(title="Load-test fakes")
+    words = ANSWER.split(" ")
+    size = max(1, -(-len(words) // max(1, tokens)))
+    pieces = [" ".join(words[i:i + size]) for i in range(0, len(words), size)]
+
+    def gemini_error():
+        return JSONResponse(status_code=503, content={"error": {
+            "code": 503, "message": "The model is overloaded (injected).", "status": "UNAVAILABLE"}})
+
+    @app.post("/v1beta/models/{model_action:path}")
+    async def gemini_generate(model_action: str):
+        if gemini.fails():
+            await asyncio.sleep(gemini.delay() / 4)
+            return gemini_error()
+        if model_action.endswith(":streamGenerateContent"):
+            delay = gemini.delay()
+
+            async def sse():
+                for i, piece in enumerate(pieces):
+                    await asyncio.sleep(delay / len(pieces))
+                    chunk = _gemini_chunk(piece + ("" if i == len(pieces) - 1 else " "), i == len(pieces) - 1)
+                    yield f"data: {json.dumps(chunk)}\r\n\r\n"
+
+            return StreamingResponse(sse(), media_type="text/event-stream")
+        await asyncio.sleep(gemini.delay())
+        return _gemini_chunk(ANSWER, True)
+
+    @app.get("/certifications/public/users")
+    async def ussf_users(email: str = ""):
+        await asyncio.sleep(ussf.delay())
+        if ussf.fails():
+            return JSONResponse(status_code=500, content={"error": "injected"})
+        if not email.lower().endswith("@" + KNOWN_EMAIL_DOMAIN):
+            return JSONResponse(status_code=404, content=[])
+        ussf_id = str(abs(hash(email.lower())) % 10**16).zfill(16)
+        return [{"ussf_id": ussf_id, "full_name": email.split("@")[0].replace(".", " ").title()}]
+
+    @app.get("/certifications/public/users/{ussf_id}/user-licenses")
+    async def ussf_licenses(ussf_id: str):
+        await asyncio.sleep(ussf.delay())
+        if ussf.fails():
+            return JSONResponse(status_code=500, content={"error": "injected"})
+        return [
+            {"discipline": "referee", "license_id": 10, "issue_date": "2025-01-15",
+             "expiration_date": "2099-12-31", "issuer": "OYSA"},
+            {"discipline": "referee", "license_id": 20, "issue_date": "2024-03-01",
+             "expiration_date": "2099-06-30", "issuer": "OYSA"},
+        ]
+
+    return app
+
+
+class FakeWorksheet:
+    def __init__(self, fault: Fault, stats: dict, lock: threading.Lock):
+        self.fault = fault
+        self.stats = stats
+        self.lock = lock
+
+    def append_rows(self, rows, value_input_option=None):
+        time.sleep(self.fault.delay())
+        if self.fault.fails():
+            raise RuntimeError("Sheets API error (injected)")
+        with self.lock:
+            self.stats["batches"] += 1
+            self.stats["rows"] += len(rows)
+
+    def append_row(self, row, value_input_option=None):
+        self.append_rows([row], value_input_option)
+
+
+class FakeSheetsClient:
+    """Just enough of gspread's Client for backend.chat_log: open_by_key -> sheet1 / worksheet(name)."""
+
+    def __init__(self, fault: Fault):
+        self.stats = {"batches": 0, "rows": 0}
+        self._sheet = FakeWorksheet(fault, self.stats, threading.Lock())
+
+    def open_by_key(self, key):
+        return self
+
+    @property
+    def sheet1(self):
+        return self._sheet
+
+    def worksheet(self, title):
+        return self._sheet
+
+    def add_worksheet(self, title, rows, cols):
+        return self._sheet
+
+
+def serve_backend(port: int, sheets: Fault) -> None:
+    """Run backend.main:app with the fake Sheets client patched into the chat log."""
+    import os
+    import uvicorn
+
+    os.environ.setdefault("CHAT_LOG_SPOOL", str(Path(tempfile.mkdtemp()) / "chat_log_spool.jsonl"))
+    from backend import chat_log
+
+    chat_log._sheet_client = FakeSheetsClient(sheets)
+    chat_log._sheet_id = "loadtest"
+    chat_log._configured = True
+    uvicorn.run("backend.main:app", host="127.0.0.1", port=port, log_level="warning")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local fakes for load testing.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    fakes = sub.add_parser("fakes", help="Serve the Gemini and USSF stand-ins")
+    fakes.add_argument("--port", type=int, default=9100)
+    fakes.add_argument("--gemini-latency-ms", type=float, default=800)
+    fakes.add_argument("--gemini-error-rate", type=float, default=0.0)
+    fakes.add_argument("--gemini-tokens", type=int, default=20, help="Chunks per streamed answer")
+    fakes.add_argument("--ussf-latency-ms", type=float, default=150)
+    fakes.add_argument("--ussf-error-rate", type=float, default=0.0)
+    backend = sub.add_parser("backend", help="Serve the backend with a fake Sheets client")
+    backend.add_argument("--port", type=int, default=8181)
+    backend.add_argument("--sheets-latency-ms", type=float, default=300)
+    backend.add_argument("--sheets-error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    if args.command == "fakes":
+        import uvicorn
+
+        app = create_fake_app(Fault(args.gemini_latency_ms, error_rate=args.gemini_error_rate),
+                              Fault(args.ussf_latency_ms, error_rate=args.ussf_error_rate),
+                              tokens=args.gemini_tokens)
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+    else:
+        serve_backend(args.port, Fault(args.sheets_latency_ms, error_rate=args.sheets_error_rate))
+
+
+if __name__ == "__main__":
+    main()
@@ -4,6 +4,7 @@ set -e
 # Run from project root after ./ingest.py. Requires: gcloud CLI.
 # If you changed the Dockerfile or backend code, run ./scripts/build-push.sh first.
 # Uses same env vars as deploy-cloudrun.sh (GCP_PROJECT, GCP_REGION, VECTOR_STORE_BUCKET, TAG).
+# HOT_RELOAD=1: only sync; running instances hot-reload the new version instead of a redeploy.
 
 # Auto-source .env file if it exists and GOOGLE_API_KEY is not set
 SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
@@ -38,7 +39,17 @@ if [[ ! -d ./vector_store ]]; then
 fi
 
 echo "Syncing ./vector_store to gs://${BUCKET}/..."
-gcloud storage rsync ./vector_store "gs://${BUCKET}/" --delete-unmatched-destination-objects
+# Version directories first, the CURRENT pointer last, so readers never see a pointer to a partial upload
+gcloud storage rsync ./vector_store "gs://${BUCKET}/" --recursive --delete-unmatched-destination-objects \
+  --exclude '^CURRENT$'
+if [[ -f ./vector_store/CURRENT ]]; then
+  gcloud storage cp ./vector_store/CURRENT "gs://${BUCKET}/CURRENT"
+fi
+
+if [[ "${HOT_RELOAD:-}" == "1" ]]; then
+  echo "Done. Running instances pick up the new version within VECTOR_STORE_RELOAD_SECONDS (or POST /admin/reload)."
+  exit 0
+fi
 
 echo "Deploying new API revision (same image) so new instances load the updated index..."
 # Use same options as deploy-cloudrun.sh so ingress/env/min-instances are not reverted (ingress all required for UI→API).
@@ -51,7 +62,8 @@ gcloud run deploy osro-agent-api \
   --execution-environment gen2 \
   --ingress all \
   --allow-unauthenticated \
-  --set-env-vars "GOOGLE_API_KEY=${GOOGLE_API_KEY}" \
+  --set-env-vars "GOOGLE_API_KEY=${GOOGLE_API_KEY},WARMUP_ON_STARTUP=1" \
+  --startup-probe "httpGet.path=/readyz,periodSeconds=10,timeoutSeconds=5,failureThreshold=24" \
   --memory 1Gi \
   --min-instances 1
 